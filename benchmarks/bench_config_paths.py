@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Mikrobenchmark odczytu wartości konfiguracji po key_path.
+
+Porównuje:
+- legacy:   dawny get_value (split('.') + przejście po dictach przy każdym wywołaniu)
+            na zwykłym dict w zwykłym cache, jak przed OverlayConfig
+- get_value: obecny get_value (powtórny odczyt liścia z cache odczytów serwera)
+- ConfigKey: akcesor z GuildConfigManager.key() trzymany przez coga
+
+Uruchomienie (z katalogu głównego repo):
+    python benchmarks/bench_config_paths.py
+"""
+import copy
+import logging
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config_manager import GuildConfigManager  # noqa: E402
+
+GUILD_ID = 123456789
+KEY_PATH = "welcome_message.embed.title"
+NUMBER = 200_000
+
+
+def legacy_get_value(config_cache: dict, guild_id: int, key_path: str, default=None):
+    """Kopia implementacji sprzed kompilowanych ścieżek (cache: guild_id -> zwykły dict)"""
+    if guild_id in config_cache:
+        config = config_cache[guild_id]
+    keys = key_path.split('.')
+    current = config
+    try:
+        for key in keys:
+            current = current[key]
+        return current
+    except (KeyError, TypeError):
+        return default
+
+
+def main():
+    logging.getLogger('discord').setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = GuildConfigManager(tmp)
+        # Dawny cache trzymał pełną konfigurację jako zwykły dict
+        legacy_cache = {GUILD_ID: copy.deepcopy(manager.get_guild_config(GUILD_ID).to_dict())}
+        accessor = manager.key(KEY_PATH)
+
+        cases = {
+            "legacy get_value": lambda: legacy_get_value(legacy_cache, GUILD_ID, KEY_PATH),
+            "get_value": lambda: manager.get_value(GUILD_ID, KEY_PATH),
+            "ConfigKey.get": lambda: accessor.get(GUILD_ID),
+        }
+
+        baseline = None
+        for name, func in cases.items():
+            best = min(timeit.repeat(func, number=NUMBER, repeat=5))
+            per_call_ns = best / NUMBER * 1e9
+            if baseline is None:
+                baseline = per_call_ns
+            print(f"{name:<18} {per_call_ns:8.1f} ns/lookup  ({baseline / per_call_ns:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
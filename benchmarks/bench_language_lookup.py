@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Mikrobenchmark LanguageManager.get.
+
+Porównuje:
+- legacy:   dawny get (split('.') + przejście po zagnieżdżonych dictach,
+            fallback na en przy każdym wywołaniu, str.format w try/except)
+- compiled: obecny get (płaski katalog skompilowany przy ładowaniu)
+
+Dla każdej implementacji mierzy trzy przypadki: tekst statyczny w języku
+użytkownika, tekst z placeholderem z fallbacku na en oraz zwykły fallback na en.
+
+Uruchomienie (z katalogu głównego repo):
+    python benchmarks/bench_language_lookup.py
+"""
+import logging
+import os
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+from language_manager import LanguageManager  # noqa: E402
+
+USER_ID = 42
+NUMBER = 200_000
+CASES = {
+    "static": ("translator.setlang_title", {}),
+    "fallback + placeholder": ("modules.module_not_found", {"module": "leaderboard"}),
+    "fallback to en": ("common.yes", {}),
+}
+
+
+def legacy_get(lm: LanguageManager, key: str, user_id: int = None, **kwargs):
+    """Kopia implementacji sprzed kompilowanego katalogu"""
+    def nested(lang, key):
+        try:
+            data = lm.translations.get(lang, {})
+            for part in key.split('.'):
+                data = data[part]
+            return data
+        except:
+            return None
+
+    lang = lm.get_pref(user_id) or "en"
+    text = nested(lang, key)
+    if text is None and lang != "en":
+        text = nested("en", key)
+    if text is None:
+        return key
+    try:
+        return text.format(**kwargs)
+    except:
+        return text
+
+
+def main():
+    logging.getLogger('discord').setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Preferencje w katalogu tymczasowym - benchmark nie dotyka data/
+        lm = LanguageManager(None, data_dir=tmp)
+        lm.save_pref(USER_ID, "de")
+        run(lm)
+        lm.prefs.flush()
+
+
+def run(lm: LanguageManager):
+    for case, (key, kwargs) in CASES.items():
+        assert legacy_get(lm, key, USER_ID, **kwargs) == lm.get(key, USER_ID, **kwargs)
+        legacy = min(timeit.repeat(lambda: legacy_get(lm, key, USER_ID, **kwargs), number=NUMBER, repeat=5))
+        compiled = min(timeit.repeat(lambda: lm.get(key, USER_ID, **kwargs), number=NUMBER, repeat=5))
+        print(
+            f"{case:<23} legacy {legacy / NUMBER * 1e9:7.1f} ns  "
+            f"compiled {compiled / NUMBER * 1e9:7.1f} ns  ({legacy / compiled:4.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 # Import naszego managera konfiguracji
 from config_manager import GuildConfigManager
 from language_manager import LanguageManager
+from command_translator import CatalogTranslator
 
 # Wczytuje zmienne z pliku .env do środowiska
 load_dotenv()
@@ -36,10 +37,20 @@ class MultiGuildBot(commands.Bot):
         super().__init__(*args, **kwargs)
         
         # Inicjalizuj manager konfiguracji
-        self.config_manager = GuildConfigManager()
+        # write_behind: seria update_guild_config z komend /setup-* daje jeden zapis na dysk
+        self.config_manager = GuildConfigManager(write_behind=True)
         
-        # Inicjalizuj manager języków
-        self.language_manager = LanguageManager(self)
+        # Inicjalizuj manager języków (lazy: katalogi kompilowane przy pierwszym użyciu)
+        global_config = self.config_manager.global_config
+        budget_kb = global_config.get("language_memory_budget_kb")
+        self.language_manager = LanguageManager(
+            self,
+            lazy=global_config.get("language_lazy_loading", False),
+            memory_budget=budget_kb * 1024 if budget_kb else None,
+            reload_interval=global_config.get("language_reload_interval", 5.0),
+            default_language=global_config.get("default_language", "en"),
+            resolve_cache_size=global_config.get("language_resolve_cache_size", 10000)
+        )
         
         # Backward compatibility - dla starych cogów które używają bot.config
         # Będzie zawierać globalną konfigurację
@@ -68,6 +79,15 @@ class MultiGuildBot(commands.Bot):
         Wywoływane podczas startu bota.
         Ładuje wszystkie cogi.
         """
+        # Zadania w tle zapisujące zmiany konfiguracji i preferencji językowych na dysk
+        self.config_manager.start_write_behind()
+        self.language_manager.start_write_behind()
+        # Zmiany w languages/*.json są wczytywane bez restartu i bez przeładowania cogów
+        self.language_manager.start_hot_reload()
+        
+        # Wczytaj wszystkie konfiguracje równolegle, zanim cogi zaczną ich używać
+        await self.config_manager.warm_up()
+        
         # Sprawdź czy trzeba zmigrować starą konfigurację
         if not self.config_manager.global_config.get("migration_completed", False):
             logger.info("🔄 Wykryto starą konfigurację - rozpoczynam migrację...")
@@ -92,14 +112,24 @@ class MultiGuildBot(commands.Bot):
         else:
             logger.warning(f"⚠️ Katalog '{cogs_dir}' nie istnieje!")
         
-        # Synchronizacja komend slash
+        # Synchronizacja komend slash (z lokalizacjami nazw i opisów z languages/*.json)
         logger.info("🔄 Synchronizacja komend slash...")
+        await self.tree.set_translator(CatalogTranslator(self.language_manager))
         try:
             synced = await self.tree.sync()
             logger.info(f"✅ Zsynchronizowano {len(synced)} globalnych komend")
         except Exception as e:
             logger.error(f"❌ Błąd podczas synchronizacji komend: {e}")
     
+    async def close(self):
+        """Zamyka bota i zapisuje oczekujące zmiany konfiguracji"""
+        try:
+            await super().close()
+        finally:
+            await self.config_manager.shutdown()
+            await self.language_manager.shutdown()
+            logger.info("💾 Zapisano oczekujące zmiany konfiguracji")
+    
     async def on_ready(self):
         """Wywoływane gdy bot jest gotowy"""
         logger.info("=" * 50)
@@ -115,6 +145,10 @@ class MultiGuildBot(commands.Bot):
             logger.info(f"📋 Serwer: {guild.name} (ID: {guild.id})")
             logger.info(f"   └─ Włączone moduły: {config.get('enabled_modules', [])}")
     
+    async def on_guild_available(self, guild: discord.Guild):
+        """Dociąga konfigurację serwera, jeśli nie została wczytana przy starcie"""
+        await self.config_manager.warm_up([guild.id])
+    
     async def on_guild_join(self, guild: discord.Guild):
         """Wywoływane gdy bot dołącza do nowego serwera"""
         logger.info(f"🎉 Bot dołączył do nowego serwera: {guild.name} (ID: {guild.id})")
@@ -159,6 +193,7 @@ class MultiGuildBot(commands.Bot):
     async def on_guild_remove(self, guild: discord.Guild):
         """Wywoływane gdy bot zostaje usunięty z serwera"""
         logger.info(f"👋 Bot został usunięty z serwera: {guild.name} (ID: {guild.id})")
+        self.language_manager.forget_guild(guild.id)
         
         # Opcjonalnie: usuń konfigurację (z backupem)
         # self.config_manager.delete_guild_config(guild.id, create_backup=True)
@@ -33,5 +33,42 @@ class DevTools(commands.Cog):
         except Exception as e:
             await interaction.response.send_message(f"⚠️ Error loading `{module}`: {e}", ephemeral=True)
 
+    @commands.command(name="cachestats")
+    @commands.is_owner()
+    async def cachestats(self, ctx: commands.Context):
+        """Shows guild config cache statistics (owner only)."""
+        stats = self.bot.config_manager.cache_stats()
+        capacity = stats["capacity"] if stats["capacity"] is not None else "∞"
+        # Trafienia są liczone tylko, gdy cache z limitem jest pełny
+        if stats["hit_rate"] is not None:
+            hit_rate = f"**{stats['hit_rate'] * 100:.1f}%** ({stats['hits']} hits / {stats['misses']} misses)"
+        else:
+            hit_rate = f"not tracked ({stats['misses']} misses)"
+        await ctx.send(
+            f"📦 Config cache: **{stats['entries']}/{capacity}** entries, "
+            f"~{stats['approx_bytes'] / 1024:.1f} KiB\n"
+            f"🎯 Hit rate: {hit_rate}\n"
+            f"🗑️ Evictions: {stats['evictions']} • ✏️ Dirty: {stats['dirty']}"
+        )
+
+    @commands.command(name="langstats")
+    @commands.is_owner()
+    async def langstats(self, ctx: commands.Context):
+        """Shows which language catalogs are resident and how often they are used (owner only)."""
+        stats = self.bot.language_manager.language_stats()
+        budget = f"{stats['memory_budget'] / 1024:.0f} KiB" if stats["memory_budget"] else "∞"
+        lines = [
+            f"🌐 Language catalogs: **{stats['resident']}/{stats['available']}** resident "
+            f"({'lazy' if stats['lazy'] else 'eager'}), ~{stats['approx_bytes'] / 1024:.1f} KiB / {budget}"
+        ]
+        ranked = sorted(stats["languages"].items(), key=lambda item: item[1]["hits"], reverse=True)
+        for lang, info in ranked[:15]:
+            state = "🟢" if info["resident"] else "⚪"
+            lines.append(
+                f"{state} `{lang}` {info['hits']} hits • {info['loads']} loads • "
+                f"{info['evictions']} evictions • ~{info['approx_bytes'] / 1024:.1f} KiB"
+            )
+        await ctx.send("\n".join(lines))
+
 async def setup(bot):
     await bot.add_cog(DevTools(bot))
\ No newline at end of file
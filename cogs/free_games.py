@@ -365,9 +365,10 @@ class FreeGames(commands.Cog):
     @tasks.loop(minutes=60)
     async def check_free_games(self):
         """Okresowo sprawdza dostępność darmowych gier dla wszystkich serwerów"""
-        for guild in self.bot.guilds:
-            # Sprawdź czy moduł jest włączony dla tego serwera
-            if not self.bot.config_manager.is_module_enabled(guild.id, "free_games"):
+        # Tylko serwery z włączonym modułem
+        for guild_id in self.bot.config_manager.guilds_with_module("free_games"):
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
                 continue
             
             try:
@@ -378,10 +379,9 @@ class FreeGames(commands.Cog):
     async def _check_games_for_guild(self, guild: discord.Guild):
         """Sprawdza gry dla konkretnego serwera"""
         guild_id = guild.id
-        config = self.bot.get_guild_config(guild_id)
-        fg_config = config.get("free_games", {})
+        fg_config = self.bot.get_guild_config(guild_id)["free_games"]
         
-        channel_id = fg_config.get("channel_id")
+        channel_id = fg_config["channel_id"]
         if not channel_id:
             return
         
@@ -390,8 +390,8 @@ class FreeGames(commands.Cog):
             logger.error(f"Nie znaleziono kanału {channel_id} na serwerze {guild_id}")
             return
         
-        enabled_platforms = fg_config.get("enabled_platforms", ["steam", "epic-games-store"])
-        ping_role_id = fg_config.get("ping_role_id")
+        enabled_platforms = fg_config["enabled_platforms"]
+        ping_role_id = fg_config["ping_role_id"]
         
         # Pobierz posted games dla tego serwera
         posted_games = self.load_posted_games(guild_id)
@@ -481,9 +481,7 @@ class FreeGames(commands.Cog):
         await interaction.response.defer(ephemeral=True)
         
         try:
-            config = self.bot.get_guild_config(guild_id)
-            fg_config = config.get("free_games", {})
-            enabled_platforms = fg_config.get("enabled_platforms", ["steam", "epic-games-store"])
+            enabled_platforms = self.bot.get_guild_config(guild_id)["free_games"]["enabled_platforms"]
             
             all_games = []
             
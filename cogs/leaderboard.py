@@ -5,15 +5,45 @@ from discord import app_commands
 from datetime import datetime
 import sqlite3
 from pathlib import Path
+from typing import NamedTuple, Optional
 import logging
 
+from config_manager import hex_color
+
 logger = logging.getLogger('discord')
 
+
+class LeaderboardSettings(NamedTuple):
+    """Przeliczona konfiguracja rankingu (odświeżana tylko po zmianie sekcji)"""
+    channel_id: Optional[int]
+    message_id: Optional[int]
+    title: str
+    color: int
+    main_field_name: str
+    second_field_name: str
+    footer_prefix: str
+
+
+def build_leaderboard_settings(config) -> LeaderboardSettings:
+    lb_config = config["leaderboard"]
+    return LeaderboardSettings(
+        channel_id=lb_config.get("channel_id"),
+        message_id=lb_config.get("message_id"),
+        title=lb_config.get("embed_title", "APC Leaderboard"),
+        color=hex_color(lb_config.get("embed_color", config.get("embed_color", "#d07d23"))),
+        main_field_name=lb_config.get("main_apc_field_name", "Main APC"),
+        second_field_name=lb_config.get("second_apc_field_name", "Second APC"),
+        footer_prefix=lb_config.get("embed_footer_text_prefix", "Ostatnia aktualizacja")
+    )
+
 class Leaderboard(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         # Słownik przechowujący połączenia do baz danych per-guild
         self.db_connections = {}
+        self.settings = bot.config_manager.register_view(
+            ("leaderboard", "embed_color"), build_leaderboard_settings
+        )
     
     def get_db_path(self, guild_id: int) -> Path:
         """Zwraca ścieżkę do bazy danych dla danego serwera"""
@@ -75,8 +105,7 @@ class Leaderboard(commands.Cog):
     def generate_embed(self, guild: discord.Guild) -> discord.Embed:
         """Generuje embed z rankingiem dla danego serwera"""
         guild_id = guild.id
-        config = self.bot.get_guild_config(guild_id)
-        lb_config = config.get("leaderboard", {})
+        settings = self.settings.get(guild_id)
         
         con = self.get_db_connection(guild_id)
         cur = con.cursor()
@@ -107,38 +136,32 @@ class Leaderboard(commands.Cog):
             for uid, strength, date in second_data
         ] or ["Brak danych"]
 
-        # Pobierz kolor z konfiguracji
-        embed_color_hex = lb_config.get("embed_color", config.get("embed_color", "#d07d23"))
-        embed_color = int(embed_color_hex.replace("#", ""), 16)
-        
         embed = discord.Embed(
-            title=lb_config.get("embed_title", "APC Leaderboard"),
-            color=embed_color
+            title=settings.title,
+            color=settings.color
         )
         
         embed.add_field(
-            name=lb_config.get("main_apc_field_name", "Main APC"),
+            name=settings.main_field_name,
             value="\n".join(main_text_lines),
             inline=True
         )
         embed.add_field(
-            name=lb_config.get("second_apc_field_name", "Second APC"),
+            name=settings.second_field_name,
             value="\n".join(second_text_lines),
             inline=True
         )
         
-        footer_text = lb_config.get("embed_footer_text_prefix", "Ostatnia aktualizacja")
-        embed.set_footer(text=f"{footer_text}: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        embed.set_footer(text=f"{settings.footer_prefix}: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         return embed
 
     async def update_leaderboard_message(self, guild: discord.Guild):
         """Aktualizuje wiadomość z rankingiem na serwerze"""
         guild_id = guild.id
-        config = self.bot.get_guild_config(guild_id)
-        lb_config = config.get("leaderboard", {})
+        settings = self.settings.get(guild_id)
         
-        channel_id = lb_config.get("channel_id")
+        channel_id = settings.channel_id
         if not channel_id:
             logger.warning(f"Brak channel_id dla leaderboard na serwerze {guild_id}")
             return
@@ -149,7 +172,7 @@ class Leaderboard(commands.Cog):
             return
         
         embed = self.generate_embed(guild)
-        message_id = lb_config.get("message_id")
+        message_id = settings.message_id
         
         try:
             if message_id:
@@ -172,15 +195,13 @@ class Leaderboard(commands.Cog):
     @commands.Cog.listener()
     async def on_ready(self):
         """Aktualizuje wszystkie leaderboardy po starcie bota"""
-        for guild in self.bot.guilds:
-            # Sprawdź czy moduł jest włączony dla tego serwera
-            if not self.bot.config_manager.is_module_enabled(guild.id, "leaderboard"):
+        # Tylko serwery z włączonym modułem
+        for guild_id in self.bot.config_manager.guilds_with_module("leaderboard"):
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
                 continue
             
-            config = self.bot.get_guild_config(guild.id)
-            lb_config = config.get("leaderboard", {})
-            
-            if lb_config.get("channel_id"):
+            if self.settings.get(guild.id).channel_id:
                 try:
                     await self.update_leaderboard_message(guild)
                     logger.info(f"✅ Zaktualizowano leaderboard dla {guild.name}")
@@ -205,11 +226,9 @@ class Leaderboard(commands.Cog):
             return
         
         guild_id = interaction.guild.id
-        config = self.bot.get_guild_config(guild_id)
-        lb_config = config.get("leaderboard", {})
         
         # Sprawdź czy leaderboard jest skonfigurowany
-        if not lb_config.get("channel_id"):
+        if not self.settings.get(guild_id).channel_id:
             await interaction.response.send_message(
                 "❌ Leaderboard nie jest jeszcze skonfigurowany na tym serwerze!\n"
                 "Administrator powinien użyć `/setup leaderboard`",
@@ -340,7 +359,8 @@ class Leaderboard(commands.Cog):
         logger.info(f"Skonfigurowano leaderboard dla serwera {interaction.guild.name}")
     
     def cog_unload(self):
-        """Zamyka wszystkie połączenia z bazami danych"""
+        """Zamyka wszystkie połączenia z bazami danych i wyrejestrowuje widok konfiguracji"""
+        self.bot.config_manager.unregister_view(self.settings)
         for guild_id, con in self.db_connections.items():
             con.close()
             logger.info(f"Zamknięto połączenie z bazą leaderboard dla {guild_id}")
@@ -11,6 +11,7 @@ class Moderation(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.moderator_roles_key = bot.config_manager.key("moderation.moderator_roles")
 
     def is_allowed(self, interaction: discord.Interaction) -> bool:
         """
@@ -20,10 +21,7 @@ class Moderation(commands.Cog):
         if interaction.user.guild_permissions.administrator:
             return True
         
-        guild_id = interaction.guild.id
-        config = self.bot.get_guild_config(guild_id)
-        mod_config = config.get("moderation", {})
-        allowed_roles = mod_config.get("moderator_roles", [])
+        allowed_roles = self.moderator_roles_key.get(interaction.guild.id)
         
         # Sprawdź role użytkownika
         user_role_names = [role.name for role in interaction.user.roles]
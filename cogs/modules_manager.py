@@ -15,9 +15,9 @@ class ModulesManager(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         
-        # Skrót do pobierania tłumaczeń zgodny z nowym LanguageManager
+        # Skrót do pobierania tłumaczeń: język użytkownika -> język serwera -> globalny
         self.get_lang = lambda key, interaction, **kwargs: self.bot.language_manager.get(
-            key, user_id=interaction.user.id, **kwargs
+            key, user_id=interaction.user.id, guild_id=interaction.guild_id, **kwargs
         )
         
         # Lista dostępnych modułów z opisami
@@ -132,20 +132,16 @@ class ModulesManager(commands.Cog):
             return
             
         guild_id = interaction.guild_id
-        config = self.bot.config_manager.get_guild_config(guild_id)
         
-        if "enabled_modules" not in config:
-            config["enabled_modules"] = []
-            
-        if module in config["enabled_modules"]:
+        if self.bot.config_manager.is_module_enabled(guild_id, module):
             await interaction.response.send_message(
                 self.get_lang("modules.already_enabled", interaction, module=module),
                 ephemeral=True
             )
             return
             
-        config["enabled_modules"].append(module)
-        self.bot.config_manager.save_guild_config(guild_id, config)
+        # enable_module aktualizuje też indeks moduł -> serwery
+        self.bot.config_manager.enable_module(guild_id, module)
         
         await interaction.response.send_message(
             self.get_lang("modules.module_enabled", interaction),
@@ -165,17 +161,15 @@ class ModulesManager(commands.Cog):
             return
             
         guild_id = interaction.guild_id
-        config = self.bot.config_manager.get_guild_config(guild_id)
         
-        if "enabled_modules" not in config or module not in config["enabled_modules"]:
+        if not self.bot.config_manager.is_module_enabled(guild_id, module):
             await interaction.response.send_message(
                 self.get_lang("modules.not_enabled", interaction, module=module),
                 ephemeral=True
             )
             return
             
-        config["enabled_modules"].remove(module)
-        self.bot.config_manager.save_guild_config(guild_id, config)
+        self.bot.config_manager.disable_module(guild_id, module)
         
         await interaction.response.send_message(
             self.get_lang("modules.module_disabled", interaction),
@@ -216,6 +210,42 @@ class ModulesManager(commands.Cog):
         )
         await interaction.response.send_message(embed=confirm_embed, ephemeral=True)
 
+    @modules_group.command(name="language", description="Ustaw domyślny język bota na serwerze")
+    @app_commands.describe(language="Kod języka (np. pl, de, en-gb); puste = język globalny")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def modules_language(self, interaction: discord.Interaction, language: str = None):
+        """Ustawia język serwera - używany, gdy użytkownik nie wybrał własnego"""
+        lm = self.bot.language_manager
+        code = language.strip().lower() if language else None
+        
+        if code and code not in lm.available_languages():
+            await interaction.response.send_message(
+                self.get_lang("modules.language_not_found", interaction, language=code),
+                ephemeral=True
+            )
+            return
+        
+        # Zmiana sekcji "language" czyści zapamiętane języki użytkowników tego serwera
+        self.bot.config_manager.update_guild_config(interaction.guild_id, "language", code)
+        
+        await interaction.response.send_message(
+            self.get_lang("modules.language_set", interaction, language=lm.resolve_language(guild_id=interaction.guild_id)),
+            ephemeral=True
+        )
+
+    @modules_language.autocomplete('language')
+    async def language_autocomplete(
+        self,
+        interaction: discord.Interaction,
+        current: str,
+    ) -> list[app_commands.Choice[str]]:
+        current = current.lower()
+        return [
+            app_commands.Choice(name=code, value=code)
+            for code in self.bot.language_manager.available_languages()
+            if current in code
+        ][:25]
+
     # Autocomplete dla nazw modułów
     @modules_enable.autocomplete('module')
     @modules_disable.autocomplete('module')
@@ -2,11 +2,50 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from typing import List
+from typing import List, NamedTuple, Optional, Tuple
 import logging
 
+from config_manager import hex_color
+
 logger = logging.getLogger('discord')
 
+
+class ReactionRoleSettings(NamedTuple):
+    """Przeliczona konfiguracja ról (odświeżana tylko po zmianie sekcji)"""
+    channel_id: Optional[int]
+    message_id: Optional[int]
+    role_ids: Tuple[int, ...]
+    traveler_role_id: Optional[int]
+    has_embed: bool
+    embed_title: str
+    embed_description: str
+    embed_color: int
+    base_color: int
+    feedback_enabled: bool
+    feedback_color: int
+    feedback_message: str
+
+
+def build_reaction_role_settings(config) -> ReactionRoleSettings:
+    rr_config = config["reaction_roles"]
+    embed_config = rr_config.get("embed", {})
+    feedback_config = rr_config["feedback"]
+    base_color = config.get("embed_color", "#d07d23")
+    return ReactionRoleSettings(
+        channel_id=rr_config.get("channel_id"),
+        message_id=rr_config.get("message_id"),
+        role_ids=tuple(mapping["role_id"] for mapping in rr_config.get("role_mappings") or []),
+        traveler_role_id=rr_config.get("traveler_role_id"),
+        has_embed=bool(embed_config),
+        embed_title=embed_config.get("title", "Wybierz swoją rolę"),
+        embed_description=embed_config.get("description", "Kliknij przycisk aby wybrać rolę"),
+        embed_color=hex_color(embed_config.get("color", base_color)),
+        base_color=hex_color(base_color),
+        feedback_enabled=feedback_config.get("enabled", True),
+        feedback_color=hex_color(feedback_config.get("color", 0x00ff00), 0x00ff00),
+        feedback_message=feedback_config.get("message", "")
+    )
+
 class PersistentRoleView(discord.ui.View):
     def __init__(self, guild_id: int):
         super().__init__(timeout=None)
@@ -30,19 +69,24 @@ class PersistentRoleView(discord.ui.View):
 class ReactionRoles(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        
+        # Widok przeliczany tylko po zmianie konfiguracji - używany przy każdym kliknięciu przycisku
+        self.settings = bot.config_manager.register_view(
+            ("reaction_roles", "embed_color"), build_reaction_role_settings
+        )
 
     @commands.Cog.listener()
     async def on_ready(self):
         """Dodaj persistent views dla wszystkich serwerów z włączonym modułem"""
-        for guild in self.bot.guilds:
-            if not self.bot.config_manager.is_module_enabled(guild.id, "reaction_roles"):
+        for guild_id in self.bot.config_manager.guilds_with_module("reaction_roles"):
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
                 continue
             
-            config = self.bot.get_guild_config(guild.id)
-            rr_config = config.get("reaction_roles", {})
+            settings = self.settings.get(guild.id)
             
-            channel_id = rr_config.get("channel_id")
-            message_id = rr_config.get("message_id")
+            channel_id = settings.channel_id
+            message_id = settings.message_id
             
             if not channel_id or not message_id:
                 continue
@@ -71,24 +115,22 @@ class ReactionRoles(commands.Cog):
             )
             return
         
-        config = self.bot.get_guild_config(guild_id)
-        rr_config = config.get("reaction_roles", {})
+        settings = self.settings.get(guild_id)
         
         guild = interaction.guild
         member = interaction.user
         
         # Pobierz mapowania ról
-        role_mappings = rr_config.get("role_mappings", [])
+        role_ids = settings.role_ids
         
-        if button_index >= len(role_mappings):
+        if button_index >= len(role_ids):
             await interaction.response.send_message(
                 "❌ Błąd konfiguracji ról!",
                 ephemeral=True
             )
             return
         
-        role_mapping = role_mappings[button_index]
-        role_to_assign = guild.get_role(role_mapping["role_id"])
+        role_to_assign = guild.get_role(role_ids[button_index])
         
         if not role_to_assign:
             await interaction.response.send_message(
@@ -97,18 +139,16 @@ class ReactionRoles(commands.Cog):
             )
             return
 
-        # Pobierz wszystkie role z systemu reaction roles
-        all_reaction_role_ids = [mapping["role_id"] for mapping in role_mappings]
         roles_to_remove: List[discord.Role] = []
 
         # Usuń wszystkie inne role z systemu
-        for role_id_check in all_reaction_role_ids:
+        for role_id_check in role_ids:
             role = member.get_role(role_id_check)
             if role and role.id != role_to_assign.id:
                 roles_to_remove.append(role)
 
         # Usuń traveler role jeśli ustawiona
-        traveler_role_id = rr_config.get("traveler_role_id")
+        traveler_role_id = settings.traveler_role_id
         if traveler_role_id:
             traveler_role = guild.get_role(traveler_role_id)
             if traveler_role and traveler_role in member.roles:
@@ -133,7 +173,7 @@ class ReactionRoles(commands.Cog):
             logger.info(f"✅ Przypisano rolę {role_to_assign.name} użytkownikowi {member.display_name} na {guild.name}")
             
             # Wyślij feedback
-            await self.send_ephemeral_feedback(interaction, role_to_assign, roles_to_remove, config)
+            await self.send_ephemeral_feedback(interaction, role_to_assign, roles_to_remove, settings)
 
         except discord.Forbidden:
             await interaction.response.send_message(
@@ -153,25 +193,20 @@ class ReactionRoles(commands.Cog):
         interaction: discord.Interaction, 
         role: discord.Role, 
         removed_roles: List[discord.Role],
-        config: dict
+        settings: ReactionRoleSettings
     ):
         """Wysyła feedback dla użytkownika"""
         try:
-            rr_config = config.get("reaction_roles", {})
-            feedback_config = rr_config.get("feedback", {})
-            
-            if not feedback_config.get("enabled", True):
+            if not settings.feedback_enabled:
                 await interaction.response.send_message(
                     "✅ Rola zaktualizowana!",
                     ephemeral=True
                 )
                 return
             
-            embed_color = feedback_config.get("color", 0x00ff00)
-            
             embed = discord.Embed(
                 title="✅ Rola zaktualizowana pomyślnie!",
-                color=embed_color,
+                color=settings.feedback_color,
                 timestamp=discord.utils.utcnow()
             )
             
@@ -189,7 +224,7 @@ class ReactionRoles(commands.Cog):
                     inline=False
                 )
             
-            custom_message = feedback_config.get("message", "")
+            custom_message = settings.feedback_message
             if custom_message:
                 embed.add_field(
                     name="💬 Wiadomość",
@@ -228,24 +263,19 @@ class ReactionRoles(commands.Cog):
             )
             return
         
-        config = self.bot.get_guild_config(guild_id)
-        rr_config = config.get("reaction_roles", {})
-        embed_config = rr_config.get("embed", {})
+        settings = self.settings.get(guild_id)
         
-        if not embed_config:
+        if not settings.has_embed:
             await interaction.response.send_message(
                 "❌ Brak konfiguracji embeda! Użyj `/setup-reaction-roles`",
                 ephemeral=True
             )
             return
         
-        embed_color_hex = embed_config.get("color", config.get("embed_color", "#d07d23"))
-        embed_color = int(embed_color_hex.replace("#", ""), 16)
-
         embed = discord.Embed(
-            title=embed_config.get("title", "Wybierz swoją rolę"),
-            description=embed_config.get("description", "Kliknij przycisk aby wybrać rolę"),
-            color=embed_color
+            title=settings.embed_title,
+            description=settings.embed_description,
+            color=settings.embed_color
         )
         
         view = PersistentRoleView(guild_id)
@@ -312,10 +342,6 @@ class ReactionRoles(commands.Cog):
             self.bot.update_guild_config(guild_id, "reaction_roles.traveler_role_id", traveler_role.id)
         
         # Utwórz embed
-        config = self.bot.get_guild_config(guild_id)
-        embed_color_hex = config.get("embed_color", "#d07d23")
-        embed_color = int(embed_color_hex.replace("#", ""), 16)
-        
         description = "Wybierz swoją rolę klikając odpowiedni przycisk:\n\n"
         for i, mapping in enumerate(role_mappings, 1):
             description += f"{mapping['emoji']} — {mapping['name']}\n"
@@ -323,7 +349,7 @@ class ReactionRoles(commands.Cog):
         embed = discord.Embed(
             title="🎭 Wybierz swoją rolę",
             description=description,
-            color=embed_color
+            color=self.settings.get(guild_id).base_color
         )
         
         view = PersistentRoleView(guild_id)
@@ -338,7 +364,7 @@ class ReactionRoles(commands.Cog):
         embed_config = {
             "title": "🎭 Wybierz swoją rolę",
             "description": description,
-            "color": embed_color_hex
+            "color": self.bot.get_guild_config(guild_id).get("embed_color", "#d07d23")
         }
         self.bot.update_guild_config(guild_id, "reaction_roles.embed", embed_config)
         
@@ -366,6 +392,10 @@ class ReactionRoles(commands.Cog):
         
         await interaction.response.send_message(embed=response_embed, ephemeral=True)
         logger.info(f"Skonfigurowano reaction roles dla {interaction.guild.name}")
+    
+    def cog_unload(self):
+        """Wyrejestrowuje widok konfiguracji (przeładowanie coga rejestruje nowy)"""
+        self.bot.config_manager.unregister_view(self.settings)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(ReactionRoles(bot))
\ No newline at end of file
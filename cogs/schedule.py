@@ -1,16 +1,102 @@
 # -*- coding: utf-8 -*-
 # cogs/schedule.py - Part 1/2
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import copy
+import heapq
+import itertools
 import json
 import logging
+import time
+import weakref
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+from schedule_render import RenderPlanCache
+from schedule_windows import (
+    WeeklyWindow, WindowCache, countdown_edit_time, dynamic_interval, next_fire_time,
+    upcoming_fire_times, upgrade_last_week_sent, week_allowed, week_index
+)
+
 logger = logging.getLogger('discord')
 SERVER_TIMEZONE = timezone(timedelta(hours=-2))
+# Co ile sekund (najczęściej) sprawdzać mtime pliku w cache - wyłapuje ręczne edycje JSON-ów
+CACHE_REVALIDATE_SECONDS = 2.0
+# Co ile sekund sprawdzać mtime plików schedule (ręczne edycje poza komendami bota)
+FILE_RECHECK_SECONDS = 30.0
+# Ile serwerów dispatchery obsługują równocześnie (wspólny limit eventów i recurring)
+MAX_CONCURRENT_GUILDS = 8
+
+
+class _CachedFile:
+    """Zawartość pliku JSON serwera w pamięci + mtime, z którym była zgodna"""
+    
+    __slots__ = ("data", "mtime", "checked_at")
+    
+    def __init__(self, data: Any, mtime: Optional[int]):
+        self.data = data
+        self.mtime = mtime
+        self.checked_at = time.monotonic()
+
+
+class _DueQueue:
+    """
+    Min-heap terminów per serwer: (timestamp, seq, guild_id). Serwer ma w danej chwili
+    jeden ważny termin (_due); starsze wpisy w kopcu są pomijane przy zdjęciu.
+    Serwery oznaczone jako "dirty" dispatcher przelicza przed kolejnym snem.
+    """
+    
+    def __init__(self):
+        self._heap: List[Tuple[float, int, int]] = []
+        self._due: Dict[int, float] = {}
+        self._seq = itertools.count()
+        self._dirty: Set[int] = set()
+        self.changed = asyncio.Event()
+    
+    def __len__(self) -> int:
+        return len(self._due)
+    
+    def mark_dirty(self, guild_id: int):
+        self._dirty.add(guild_id)
+        self.changed.set()
+    
+    def take_dirty(self) -> Set[int]:
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+    
+    def discard_dirty(self, guild_id: int):
+        self._dirty.discard(guild_id)
+    
+    def due(self, guild_id: int) -> Optional[float]:
+        return self._due.get(guild_id)
+    
+    def set_due(self, guild_id: int, timestamp: Optional[float]):
+        """Ustawia termin serwera (None = brak terminu - serwer wypada z kolejki)"""
+        if timestamp is None:
+            self._due.pop(guild_id, None)
+            return
+        self._due[guild_id] = timestamp
+        heapq.heappush(self._heap, (timestamp, next(self._seq), guild_id))
+    
+    def peek(self) -> Optional[float]:
+        while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+    
+    def pop(self) -> int:
+        """Zdejmuje serwer z najbliższym terminem (wywoływać po peek())"""
+        _, _, guild_id = heapq.heappop(self._heap)
+        del self._due[guild_id]
+        return guild_id
+    
+    async def wait(self, timeout: Optional[float]):
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
 
 # [MODALS AND VIEWS - Copy from original but add guild_id parameter]
 class TemplateBuilderModal(discord.ui.Modal, title="Create Message Template"):
@@ -976,22 +1062,81 @@ class Schedule(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.timezone = SERVER_TIMEZONE
-        self.check_events.start()
-        self.check_recurring_schedules.start()
+        
+        # Cache plików JSON: (guild_id, plik) -> zawartość; aktualizowany przez save_*,
+        # a zmiany z zewnątrz wykrywa mtime (sprawdzany co CACHE_REVALIDATE_SECONDS)
+        self._file_cache: Dict[Tuple[int, str], _CachedFile] = {}
+        # Skompilowane okna tygodniowe recurring schedules (przebudowa tylko po edycji okna)
+        self._windows = WindowCache()
+        self._render_plans = RenderPlanCache()
+        # Ostatnio wysłany/edytowany tekst wiadomości z odliczaniem (guild_id -> message_id -> (content, embed))
+        self._countdown_renders: Dict[int, Dict[int, tuple]] = {}
+        
+        # Kolejki terminów: one-time eventy i recurring schedules. Dispatchery śpią
+        # dokładnie do najbliższego terminu i są budzone przy zmianie danych serwera.
+        self._event_queue = _DueQueue()
+        self._recurring_queue = _DueQueue()
+        # Serwery są obsługiwane w osobnych taskach (najwyżej MAX_CONCURRENT_GUILDS naraz),
+        # więc wolny lub rate-limitowany kanał nie opóźnia innych serwerów.
+        # Wysyłki na ten sam kanał idą po kolei przez blokadę kanału.
+        self._dispatch_slots = asyncio.Semaphore(MAX_CONCURRENT_GUILDS)
+        self._dispatch_tasks: Set[asyncio.Task] = set()
+        self._channel_locks: Dict[int, asyncio.Lock] = weakref.WeakValueDictionary()
+        loop = asyncio.get_running_loop()
+        self._event_task = loop.create_task(self._run_dispatcher(
+            "Event", self._event_queue, self._schedule_guild_events, self._check_events_for_guild
+        ))
+        self._recurring_task = loop.create_task(self._run_dispatcher(
+            "Recurring", self._recurring_queue, self._schedule_guild_recurring, self._check_recurring_for_guild
+        ))
+        self._watch_task = loop.create_task(self._watch_schedule_files())
+        self.bot.config_manager.subscribe("enabled_modules", self._on_modules_changed)
+        
         logger.info("✅ Schedule cog loaded (multi-guild)")
 
     def get_data_path(self, guild_id: int, filename: str) -> Path:
         return self.bot.config_manager.get_data_path(guild_id, "schedules", filename)
 
-    def load_json_file(self, guild_id: int, filename: str, default: Any) -> Any:
+    @staticmethod
+    def _file_mtime(path: Path) -> Optional[int]:
         try:
-            path = self.get_data_path(guild_id, filename)
-            if path.exists():
+            return path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read_cached(self, guild_id: int, filename: str, default: Any) -> Any:
+        """
+        Zawartość pliku z cache (współdzielona - tylko do odczytu!).
+        Dysk jest czytany tylko przy pierwszym użyciu albo gdy zmienił się mtime.
+        """
+        key = (guild_id, filename)
+        entry = self._file_cache.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < CACHE_REVALIDATE_SECONDS:
+            return entry.data
+        
+        path = self.get_data_path(guild_id, filename)
+        mtime = self._file_mtime(path)
+        if entry is not None and entry.mtime == mtime:
+            entry.checked_at = now
+            return entry.data
+        
+        data = default
+        if mtime is not None:
+            try:
                 with open(path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading {filename} for {guild_id}: {e}")
-        return default
+                    data = json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading {filename} for {guild_id}: {e}")
+                if entry is not None:
+                    # Uszkodzony plik (np. zapis w trakcie ręcznej edycji) - zostaje ostatnia dobra wersja
+                    return entry.data
+        self._file_cache[key] = _CachedFile(data, mtime)
+        return data
+
+    def load_json_file(self, guild_id: int, filename: str, default: Any) -> Any:
+        # Kopia - wywołujący modyfikują wynik przed save_*, cache zmienia się dopiero przy zapisie
+        return copy.deepcopy(self._read_cached(guild_id, filename, default))
 
     def save_json_file(self, guild_id: int, filename: str, data: Any):
         try:
@@ -999,26 +1144,42 @@ class Schedule(commands.Cog):
             path.parent.mkdir(parents=True, exist_ok=True)
             with open(path, "w", encoding="utf-8") as f:
                 json.dump(data, f, indent=4, ensure_ascii=False)
+            self._file_cache[(guild_id, filename)] = _CachedFile(copy.deepcopy(data), self._file_mtime(path))
         except Exception as e:
             logger.error(f"Error saving {filename} for {guild_id}: {e}")
+            # Nie wiemy, co jest na dysku - następny odczyt wczyta plik od nowa
+            self._file_cache.pop((guild_id, filename), None)
 
     def load_events(self, guild_id: int) -> list:
         return self.load_json_file(guild_id, "scheduled_events.json", [])
 
     def save_events(self, guild_id: int, events: list):
         self.save_json_file(guild_id, "scheduled_events.json", events)
+        # Utworzenie/edycja/usunięcie eventu budzi dispatcher, żeby przeliczył termin serwera
+        self._event_queue.mark_dirty(guild_id)
 
     def load_templates(self, guild_id: int) -> dict:
         return self.load_json_file(guild_id, "templates.json", {})
 
     def save_templates(self, guild_id: int, templates: dict):
         self.save_json_file(guild_id, "templates.json", templates)
+        # Edycja/kopia/zmiana nazwy/usunięcie szablonu - plany renderowania serwera do przebudowy
+        self._render_plans.invalidate(guild_id)
 
     def load_recurring_schedules(self, guild_id: int) -> dict:
         return self.load_json_file(guild_id, "recurring_schedules.json", {"schedules": []})
+    
+    def get_templates_cached(self, guild_id: int) -> dict:
+        """Szablony bez kopiowania (autocomplete, wysyłka) - nie modyfikować!"""
+        return self._read_cached(guild_id, "templates.json", {})
+    
+    def get_recurring_cached(self, guild_id: int) -> dict:
+        """Recurring schedules bez kopiowania - nie modyfikować!"""
+        return self._read_cached(guild_id, "recurring_schedules.json", {"schedules": []})
         
     def save_recurring_schedules(self, guild_id: int, data: dict):
         self.save_json_file(guild_id, "recurring_schedules.json", data)
+        self._recurring_queue.mark_dirty(guild_id)
 
     async def log_schedule_creation(self, interaction: discord.Interaction, event: dict):
         try:
@@ -1052,7 +1213,7 @@ class Schedule(commands.Cog):
         if not self.bot.config_manager.is_module_enabled(interaction.guild.id, "schedule"):
             await interaction.response.send_message("❌ Module not enabled!", ephemeral=True)
             return
-        templates = self.load_templates(interaction.guild.id)
+        templates = self.get_templates_cached(interaction.guild.id)
         if not templates:
             await interaction.response.send_message("❌ No templates! Create one with `/create-template`", ephemeral=True)
             return
@@ -1061,7 +1222,7 @@ class Schedule(commands.Cog):
 
     @app_commands.command(name="list-schedule-templates", description="List all templates")
     async def list_templates(self, interaction: discord.Interaction):
-        templates = self.load_templates(interaction.guild.id)
+        templates = self.get_templates_cached(interaction.guild.id)
         if not templates:
             await interaction.response.send_message("📋 No templates saved.", ephemeral=True)
             return
@@ -1092,7 +1253,8 @@ class Schedule(commands.Cog):
             lines = []
             for i, e in enumerate(guild_events, 1):
                 end = datetime.fromisoformat(e["end"])
-                lines.append(f"**{i}. {e['template']}**\nEnds: {end.strftime('%Y-%m-%d %H:%M')}")
+                mode = " ✏️" if e.get("mode") == "edit" else ""
+                lines.append(f"**{i}. {e['template']}**{mode}\nEnds: {end.strftime('%Y-%m-%d %H:%M')}")
             embed.description = "\n\n".join(lines)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -1355,6 +1517,22 @@ class Schedule(commands.Cog):
                     inline=True
                 )
                 
+                window = self.compiled_window(schedule)
+                window_end = window.window_end(now)
+                next_start = window.next_window_start(now)
+                if window_end:
+                    embed.add_field(
+                        name="Window Closes",
+                        value=f"{days[window_end.weekday()]} {window_end.strftime('%H:%M')}",
+                        inline=False
+                    )
+                if next_start:
+                    embed.add_field(
+                        name="Next Window",
+                        value=f"{days[next_start.weekday()]} {next_start.strftime('%Y-%m-%d %H:%M')}",
+                        inline=False
+                    )
+                
                 # Check interval
                 last_sent = schedule.get("last_sent")
                 if last_sent:
@@ -1418,7 +1596,7 @@ class Schedule(commands.Cog):
     async def view_template(self, interaction: discord.Interaction, name: str):
         """Podgląd template"""
         
-        templates = self.load_templates(interaction.guild.id)
+        templates = self.get_templates_cached(interaction.guild.id)
         
         if name not in templates:
             await interaction.response.send_message(
@@ -1608,6 +1786,61 @@ class Schedule(commands.Cog):
             ephemeral=True
         )
 
+    @app_commands.command(
+        name="recurring-preview",
+        description="[Admin] Show when a recurring schedule will send next"
+    )
+    @app_commands.describe(
+        name="Schedule name",
+        count="How many upcoming sends to show (1-10)"
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def recurring_preview(
+        self,
+        interaction: discord.Interaction,
+        name: str,
+        count: int = 5
+    ):
+        """Pokazuje najbliższe wysyłki recurring schedule (next_fire_time)"""
+        
+        count = max(1, min(count, 10))
+        recurring_data = self.get_recurring_cached(interaction.guild.id)
+        schedule = next(
+            (s for s in recurring_data.get("schedules", []) if s.get("name", "").lower() == name.lower()),
+            None
+        )
+        if schedule is None:
+            await interaction.response.send_message(
+                f"❌ Recurring schedule `{name}` not found!",
+                ephemeral=True
+            )
+            return
+        
+        now = datetime.now(self.timezone)
+        fires = upcoming_fire_times(schedule, now, count, self.compiled_window(schedule))
+        
+        embed = discord.Embed(
+            title=f"🔮 Preview: {schedule.get('name', name)}",
+            color=0x5865F2 if fires else 0xED4245
+        )
+        if fires:
+            days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+            embed.description = "\n".join(
+                f"**{i}.** {days[fire.weekday()]}, {fire.strftime('%Y-%m-%d %H:%M')} "
+                f"(<t:{int(fire.timestamp())}:R>)"
+                for i, fire in enumerate(fires, 1)
+            )
+        elif not schedule.get("enabled", True):
+            embed.description = "❌ Schedule is disabled."
+        else:
+            embed.description = "⚠️ Schedule window is empty - it will never send."
+        
+        due = self._recurring_queue.due(interaction.guild.id)
+        if due is not None:
+            embed.set_footer(text=f"Next dispatcher wake-up: {datetime.fromtimestamp(due, self.timezone).strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     @app_commands.command(
         name="recurring-edit",
         description="[Admin] Edit recurring schedule"
@@ -1688,6 +1921,62 @@ class Schedule(commands.Cog):
             ephemeral=True
         )
 
+    @app_commands.command(
+        name="schedule-countdown-mode",
+        description="[Admin] Edit one message with the countdown instead of posting new ones"
+    )
+    @app_commands.describe(
+        schedule_index="Schedule number from /schedule-list",
+        enabled="Edit in place (True) or post a new message every interval (False)"
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def schedule_countdown_mode(
+        self,
+        interaction: discord.Interaction,
+        schedule_index: int,
+        enabled: bool
+    ):
+        """Przełącza one-time event między trybem wysyłania a edycją jednej wiadomości"""
+        
+        events = self.load_events(interaction.guild.id)
+        guild_events = [
+            e for e in events 
+            if e.get("guild_id") == interaction.guild.id
+        ]
+        
+        if schedule_index < 1 or schedule_index > len(guild_events):
+            await interaction.response.send_message(
+                f"❌ Invalid index! Use 1-{len(guild_events)}",
+                ephemeral=True
+            )
+            return
+        
+        event = guild_events[schedule_index - 1]
+        if event.get("type", "one_time") != "one_time":
+            await interaction.response.send_message(
+                "❌ Countdown mode is only available for one-time schedules!",
+                ephemeral=True
+            )
+            return
+        
+        if enabled:
+            event["mode"] = "edit"
+        else:
+            event.pop("mode", None)
+        # Tryb od nowa: edycja zaczyna od nowej wiadomości, wysyłanie od razu wraca do interwałów
+        message_id = event.pop("message_id", None)
+        if message_id is not None:
+            self._countdown_renders.get(interaction.guild.id, {}).pop(message_id, None)
+        if message_id is not None or event.get("last_sent"):
+            event["next_send"] = datetime.now(self.timezone).isoformat()
+        self.save_events(interaction.guild.id, events)
+        
+        await interaction.response.send_message(
+            f"✅ Schedule #{schedule_index}: "
+            + ("countdown message will be edited in place" if enabled else "a new message will be posted every interval"),
+            ephemeral=True
+        )
+
     @app_commands.command(
         name="recurring-change-template",
         description="[Admin] Change template for recurring schedule"
@@ -1748,7 +2037,7 @@ class Schedule(commands.Cog):
     ) -> list[app_commands.Choice[str]]:
         """Autocomplete dla nazw templatek"""
         
-        templates = self.load_templates(interaction.guild.id)
+        templates = self.get_templates_cached(interaction.guild.id)
         
         choices = []
         for template_name in templates.keys():
@@ -1761,6 +2050,7 @@ class Schedule(commands.Cog):
         return choices[:25]
     
     @recurring_edit.autocomplete('name')
+    @recurring_preview.autocomplete('name')
     @recurring_change_template.autocomplete('schedule_name')
     async def recurring_autocomplete(
         self,
@@ -1769,7 +2059,7 @@ class Schedule(commands.Cog):
     ) -> list[app_commands.Choice[str]]:
         """Autocomplete dla recurring schedules"""
         
-        recurring_data = self.load_recurring_schedules(interaction.guild.id)
+        recurring_data = self.get_recurring_cached(interaction.guild.id)
         
         choices = []
         for schedule in recurring_data.get("schedules", []):
@@ -1783,22 +2073,202 @@ class Schedule(commands.Cog):
         
         return choices[:25]
     
-    @tasks.loop(seconds=10)
-    async def check_events(self):
-        """Sprawdza one-time eventy dla wszystkich serwerów"""
-        now = datetime.now(SERVER_TIMEZONE)
+    def _on_modules_changed(self, guild_id: int, section: str):
+        # Włączenie/wyłączenie modułu schedule dodaje/usuwa serwer z kolejek
+        self._event_queue.mark_dirty(guild_id)
+        self._recurring_queue.mark_dirty(guild_id)
+
+    def _next_event_due(self, event: dict) -> Optional[datetime]:
+        """Najbliższy moment, w którym event wymaga obsługi (wysyłka lub usunięcie)"""
+        if event.get("type", "one_time") != "one_time":
+            return None
+        start_time = datetime.fromisoformat(event["start"])
+        end_time = datetime.fromisoformat(event["end"])
+        # Event jest usuwany, gdy now > end
+        expires = end_time + timedelta(microseconds=1)
+        
+        next_send_str = event.get("next_send")
+        if next_send_str:
+            due = max(datetime.fromisoformat(next_send_str), start_time)
+        elif event.get("last_sent"):
+            # Ostatnia wysyłka w oknie już była - zostało tylko usunięcie
+            return expires
+        else:
+            due = start_time
+        return min(due, expires)
+
+    def _schedule_guild_events(self, guild_id: int):
+        """Przelicza najbliższy termin one-time eventów serwera"""
+        if not self.bot.config_manager.is_module_enabled(guild_id, "schedule"):
+            self._event_queue.set_due(guild_id, None)
+            self._countdown_renders.pop(guild_id, None)
+            return
         
-        for guild in self.bot.guilds:
-            if not self.bot.config_manager.is_module_enabled(guild.id, "schedule"):
+        due = None
+        message_ids = set()
+        for event in self._read_cached(guild_id, "scheduled_events.json", []):
+            if event.get("guild_id") != guild_id:
                 continue
-            
+            if event.get("message_id"):
+                message_ids.add(event["message_id"])
             try:
-                await self._check_events_for_guild(guild, now)
-            except Exception as e:
-                logger.error(f"Error checking events for guild {guild.id}: {e}")
+                event_due = self._next_event_due(event)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"Invalid event in guild {guild_id}: {e}")
+                continue
+            if event_due is not None and (due is None or event_due < due):
+                due = event_due
+        
+        # Usunięty event albo zmiana trybu (message_id wyczyszczone) - zapomnij ostatni tekst wiadomości
+        renders = self._countdown_renders.get(guild_id)
+        if renders is not None:
+            for message_id in [m for m in renders if m not in message_ids]:
+                del renders[message_id]
+            if not renders:
+                del self._countdown_renders[guild_id]
+        
+        self._event_queue.set_due(guild_id, due.timestamp() if due is not None else None)
+
+    def _schedule_guild_recurring(self, guild_id: int):
+        """Przelicza najbliższą wysyłkę recurring schedules serwera"""
+        if not self.bot.config_manager.is_module_enabled(guild_id, "schedule"):
+            self._recurring_queue.set_due(guild_id, None)
+            return
+        
+        now = datetime.now(self.timezone)
+        due = None
+        for schedule in self.get_recurring_cached(guild_id).get("schedules", []):
+            try:
+                fire = next_fire_time(schedule, now, self.compiled_window(schedule))
+            except (TypeError, ValueError) as e:
+                logger.error(f"Invalid recurring schedule '{schedule.get('name')}' in guild {guild_id}: {e}")
+                continue
+            if fire is not None and (due is None or fire < due):
+                due = fire
+        
+        self._recurring_queue.set_due(guild_id, due.timestamp() if due is not None else None)
+
+    def _file_changed(self, guild_id: int, filename: str) -> bool:
+        """Czy plik na dysku różni się od wersji w cache (zmieniony/usunięty poza botem)"""
+        entry = self._file_cache.get((guild_id, filename))
+        mtime = self._file_mtime(self.get_data_path(guild_id, filename))
+        if entry is None:
+            return mtime is not None
+        if entry.mtime == mtime:
+            return False
+        # Wymuszamy ponowny odczyt przy najbliższym _read_cached
+        entry.checked_at = float("-inf")
+        return True
+
+    async def _watch_schedule_files(self):
+        """
+        Dispatchery przeliczają terminy tylko po zapisie przez bota; ręczna edycja
+        scheduled_events.json / recurring_schedules.json jest wykrywana po mtime.
+        """
+        try:
+            await self.bot.wait_until_ready()
+            while True:
+                await asyncio.sleep(FILE_RECHECK_SECONDS)
+                for guild_id in self.bot.config_manager.guilds_with_module("schedule"):
+                    if self._file_changed(guild_id, "scheduled_events.json"):
+                        logger.info(f"📝 scheduled_events.json changed on disk for guild {guild_id}")
+                        self._event_queue.mark_dirty(guild_id)
+                    if self._file_changed(guild_id, "recurring_schedules.json"):
+                        logger.info(f"📝 recurring_schedules.json changed on disk for guild {guild_id}")
+                        self._recurring_queue.mark_dirty(guild_id)
+        except asyncio.CancelledError:
+            pass
+
+    async def _run_dispatcher(self, label: str, queue: _DueQueue, schedule_guild, process_guild):
+        """
+        Wspólna pętla dispatcherów: śpi do najbliższego terminu w kolejce (albo do
+        oznaczenia serwera jako zmienionego) i uruchamia obsługę serwera w osobnym tasku.
+        Zastępuje sprawdzanie wszystkich serwerów co 10 s / 5 min.
+        """
+        running: Dict[int, asyncio.Task] = {}
+        try:
+            await self.bot.wait_until_ready()
+            for guild_id in self.bot.config_manager.guilds_with_module("schedule"):
+                schedule_guild(guild_id)
+            logger.info(f"✅ {label} dispatcher started ({len(queue)} guilds with pending work)")
+            
+            while True:
+                queue.changed.clear()
+                for guild_id in queue.take_dirty():
+                    # Obsługiwany serwer zostanie przeliczony po zakończeniu swojego taska
+                    if guild_id not in running:
+                        schedule_guild(guild_id)
+                
+                due = queue.peek()
+                timeout = due - time.time() if due is not None else None
+                if timeout is None or timeout > 0:
+                    await queue.wait(timeout)
+                    continue
+                
+                guild_id = queue.pop()
+                if guild_id in running:
+                    continue
+                guild = self.bot.get_guild(guild_id)
+                if guild is None:
+                    # Serwer chwilowo niedostępny - spróbuj ponownie za minutę
+                    queue.set_due(guild_id, time.time() + 60)
+                    continue
+                
+                task = asyncio.create_task(
+                    self._dispatch_guild(
+                        label, queue, guild, schedule_guild, process_guild, running,
+                        datetime.now(self.timezone)
+                    )
+                )
+                running[guild_id] = task
+                self._dispatch_tasks.add(task)
+                task.add_done_callback(self._dispatch_tasks.discard)
+        except asyncio.CancelledError:
+            pass
 
-    async def _check_events_for_guild(self, guild: discord.Guild, now: datetime):
-        """Sprawdza eventy dla konkretnego serwera"""
+    async def _dispatch_guild(
+        self,
+        label: str,
+        queue: _DueQueue,
+        guild: discord.Guild,
+        schedule_guild,
+        process_guild,
+        running: Dict[int, asyncio.Task],
+        picked_at: datetime
+    ):
+        """
+        Obsługa jednego serwera w slocie semafora, potem przeliczenie jego terminu.
+        picked_at - moment zdjęcia terminu z kolejki; czekanie na slot nie liczy się jako spóźnienie.
+        """
+        try:
+            async with self._dispatch_slots:
+                await process_guild(guild, datetime.now(self.timezone), picked_at)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in {label.lower()} dispatcher for guild {guild.id}: {e}")
+        finally:
+            running.pop(guild.id, None)
+            schedule_guild(guild.id)
+            # Termin, którego nie dało się obsłużyć (brak kanału/szablonu) - ponów za minutę
+            retry_due = queue.due(guild.id)
+            if retry_due is not None and retry_due <= time.time():
+                queue.set_due(guild.id, time.time() + 60)
+            queue.changed.set()
+
+    def _channel_lock(self, channel_id: int) -> asyncio.Lock:
+        lock = self._channel_locks.get(channel_id)
+        if lock is None:
+            lock = self._channel_locks[channel_id] = asyncio.Lock()
+        return lock
+
+    async def _check_events_for_guild(
+        self,
+        guild: discord.Guild,
+        now: datetime,
+        picked_at: Optional[datetime] = None
+    ):
+        """Sprawdza eventy dla konkretnego serwera (picked_at - moment zdjęcia z kolejki dispatchera)"""
         guild_id = guild.id
         events = self.load_events(guild_id)
         events_to_remove = []
@@ -1818,8 +2288,20 @@ class Schedule(commands.Cog):
 
                 # Remove expired events
                 if now > end_time:
+                    if event.get("mode") == "edit" and event.get("message_id"):
+                        # Ostatnia edycja: {countdown} -> "Event ended"
+                        channel = guild.get_channel(event["channel_id"])
+                        template = self.get_templates_cached(guild_id).get(event["template"])
+                        if channel and template:
+                            await self.update_countdown_message(channel, event, template, end_time, start_time)
+                        self._countdown_renders.get(guild_id, {}).pop(event["message_id"], None)
                     events_to_remove.append(event)
                     continue
+                
+                if event.get("mode") == "edit":
+                    if start_time <= now and await self._process_countdown_event(guild, event, start_time, end_time, now):
+                        modified = True
+                    continue
 
                 if start_time <= now <= end_time:
                     time_remaining = end_time - now
@@ -1836,9 +2318,11 @@ class Schedule(commands.Cog):
                     if next_send_time_str:
                         next_send_time = datetime.fromisoformat(next_send_time_str)
                         
-                        if now >= next_send_time and (now - next_send_time).total_seconds() <= 30:
+                        # Spóźnienie liczymy od zdjęcia z kolejki - czekanie na wolny slot/kanał nie gubi wysyłki
+                        lateness = ((picked_at or now) - next_send_time).total_seconds()
+                        if now >= next_send_time and lateness <= 30:
                             channel = guild.get_channel(event["channel_id"])
-                            templates = self.load_templates(guild_id)
+                            templates = self.get_templates_cached(guild_id)
                             template = templates.get(event["template"])
                             
                             if channel and template:
@@ -1847,7 +2331,8 @@ class Schedule(commands.Cog):
                                     f"#{channel.name} on {guild.name}"
                                 )
                                 await self.send_template(
-                                    channel, template, end_time, start_time=next_send_time
+                                    channel, template, end_time, start_time=next_send_time,
+                                    template_name=event["template"]
                                 )
                                 event["last_sent"] = now.isoformat()
                                 modified = True
@@ -1864,10 +2349,10 @@ class Schedule(commands.Cog):
                             else None
                         )
                         modified = True
-                    else:
+                    elif not event.get("last_sent"):
                         # First send
                         channel = guild.get_channel(event["channel_id"])
-                        templates = self.load_templates(guild_id)
+                        templates = self.get_templates_cached(guild_id)
                         template = templates.get(event["template"])
                         
                         if channel and template:
@@ -1875,7 +2360,8 @@ class Schedule(commands.Cog):
                                 f"[EVENT] First send for '{event['template']}' on {guild.name}"
                             )
                             await self.send_template(
-                                channel, template, end_time, start_time=now
+                                channel, template, end_time, start_time=now,
+                                template_name=event["template"]
                             )
                             event["last_sent"] = now.isoformat()
                             next_interval = self.get_dynamic_interval(
@@ -1903,37 +2389,48 @@ class Schedule(commands.Cog):
         if modified:
             self.save_events(guild_id, events)
 
+    async def _process_countdown_event(
+        self,
+        guild: discord.Guild,
+        event: dict,
+        start_time: datetime,
+        end_time: datetime,
+        now: datetime
+    ) -> bool:
+        """Event w trybie edit-in-place - jedna wiadomość edytowana zamiast nowych co interwał"""
+        next_send_str = event.get("next_send")
+        if next_send_str:
+            if now < datetime.fromisoformat(next_send_str):
+                return False
+        elif event.get("last_sent"):
+            return False
+        
+        channel = guild.get_channel(event["channel_id"])
+        template = self.get_templates_cached(guild.id).get(event["template"])
+        if not channel or not template:
+            return False
+        
+        first = not event.get("message_id")
+        if not await self.update_countdown_message(channel, event, template, end_time, start_time):
+            return False
+        if first:
+            logger.info(f"[EVENT] Posted countdown '{event['template']}' to #{channel.name} on {guild.name}")
+        
+        event["last_sent"] = now.isoformat()
+        next_edit = self.get_countdown_edit_time(now, end_time)
+        event["next_send"] = next_edit.isoformat() if next_edit <= end_time else None
+        return True
+
     def get_dynamic_interval(self, minutes_remaining: float, base_interval: int) -> int:
         """Dynamiczny interwał w zależności od pozostałego czasu"""
-        if minutes_remaining <= 10:
-            if minutes_remaining <= 1:
-                return 1
-            elif minutes_remaining <= 3:
-                return 1
-            elif minutes_remaining <= 5:
-                return 2
-            else:
-                return 5
-        elif minutes_remaining <= 30:
-            return 10
-        else:
-            return base_interval
-
-    @tasks.loop(minutes=5)
-    async def check_recurring_schedules(self):
-        """Sprawdza recurring schedules dla wszystkich serwerów"""
-        now = datetime.now(self.timezone)
-        
-        for guild in self.bot.guilds:
-            if not self.bot.config_manager.is_module_enabled(guild.id, "schedule"):
-                continue
-            
-            try:
-                await self._check_recurring_for_guild(guild, now)
-            except Exception as e:
-                logger.error(f"Error checking recurring for guild {guild.id}: {e}")
+        return dynamic_interval(minutes_remaining, base_interval)
 
-    async def _check_recurring_for_guild(self, guild: discord.Guild, now: datetime):
+    async def _check_recurring_for_guild(
+        self,
+        guild: discord.Guild,
+        now: datetime,
+        picked_at: Optional[datetime] = None
+    ):
         """Sprawdza recurring schedules dla serwera"""
         guild_id = guild.id
         recurring_data = self.load_recurring_schedules(guild_id)
@@ -1941,6 +2438,10 @@ class Schedule(commands.Cog):
         
         for schedule in recurring_data.get("schedules", []):
             try:
+                # Stary last_week_sent (numer tygodnia ISO bez roku) zamieniamy raz na week_index
+                if upgrade_last_week_sent(schedule, now):
+                    modified = True
+                
                 if not self.should_send_recurring_message(schedule, now):
                     continue
                 
@@ -1967,9 +2468,11 @@ class Schedule(commands.Cog):
                         channel, template, 
                         now + timedelta(days=1), 
                         is_recurring=True, 
-                        start_time=now
+                        start_time=now,
+                        template_name=schedule.get("template")
                     )
                     schedule["last_sent"] = now.isoformat()
+                    schedule["last_week_sent"] = week_index(now)
                     modified = True
                     logger.info(
                         f"[RECURRING] Sent '{schedule.get('name')}' to {guild.name}"
@@ -1983,92 +2486,30 @@ class Schedule(commands.Cog):
         if modified:
             self.save_recurring_schedules(guild_id, recurring_data)
 
+    def compiled_window(self, schedule: dict) -> WeeklyWindow:
+        """Okno tygodniowe schedule (bitmapa minut) - kompilowane raz na konfigurację"""
+        return self._windows.get(schedule)
+
     def should_send_recurring_message(self, schedule: dict, current_time: datetime) -> bool:
         """Sprawdza czy wysłać recurring message"""
         if not schedule.get("enabled", True):
             return False
         
-        if schedule.get("is_multiday", False):
-            return self.should_send_multiday_schedule(schedule, current_time)
-        
-        current_weekday = current_time.weekday()
-        current_time_only = current_time.time()
-        
-        scheduled_days = schedule.get("days", [])
-        if current_weekday not in scheduled_days:
-            return False
-        
-        try:
-            start_time = datetime.strptime(
-                schedule.get("start_time", "00:00"), "%H:%M"
-            ).time()
-            end_time = datetime.strptime(
-                schedule.get("end_time", "23:59"), "%H:%M"
-            ).time()
-        except ValueError:
+        if not self.compiled_window(schedule).contains(current_time):
             return False
         
-        if not (start_time <= current_time_only <= end_time):
-            return False
-        
-        week_interval = schedule.get("week_interval", 1)
-        if week_interval <= 1:
-            return True
-        
-        current_week = current_time.isocalendar()[1]
-        last_week_sent = schedule.get("last_week_sent")
-        
-        if last_week_sent is None or (current_week - last_week_sent) >= week_interval:
-            return True
-            
-        return False
+        return week_allowed(schedule, current_time)
 
     def should_send_multiday_schedule(self, schedule: dict, current_time: datetime) -> bool:
-        """Obsługa multi-day schedules"""
-        current_weekday = current_time.weekday()
-        current_time_only = current_time.time()
-        
-        multiday_config = schedule.get("multiday_config", {})
-        start_day = multiday_config.get("start_day", 4)
-        start_time_str = multiday_config.get("start_time", "14:00")
-        end_day = multiday_config.get("end_day", 5)
-        end_time_str = multiday_config.get("end_time", "20:00")
-        
-        try:
-            start_time = datetime.strptime(start_time_str, "%H:%M").time()
-            end_time = datetime.strptime(end_time_str, "%H:%M").time()
-        except ValueError:
-            return False
-        
-        if start_day == end_day:
-            if current_weekday == start_day:
-                if start_time <= current_time_only <= end_time:
-                    return True
-        else:
-            if current_weekday == start_day and current_time_only >= start_time:
-                return True
-            elif current_weekday == end_day and current_time_only <= end_time:
-                return True
-            elif start_day < end_day:
-                if start_day < current_weekday < end_day:
-                    return True
-            elif start_day > end_day:
-                if current_weekday >= start_day or current_weekday <= end_day:
-                    if current_weekday == start_day and current_time_only >= start_time:
-                        return True
-                    elif current_weekday == end_day and current_time_only <= end_time:
-                        return True
-                    elif current_weekday > start_day or current_weekday < end_day:
-                        return True
-        
-        return False
+        """Obsługa multi-day schedules (okno start_day/start_time -> end_day/end_time, także przez niedzielę)"""
+        return self.compiled_window(schedule).contains(current_time)
 
     def create_template_from_schedule(self, schedule: dict, guild_id: int) -> Optional[dict]:
         """Tworzy template z schedule"""
         try:
             template_name = schedule.get("template")
             if template_name:
-                templates = self.load_templates(guild_id)
+                templates = self.get_templates_cached(guild_id)
                 if template_name in templates:
                     return templates[template_name]
             
@@ -2094,16 +2535,18 @@ class Schedule(commands.Cog):
             logger.error(f"[RECURRING] Error creating template from schedule: {e}")
             return None
 
-    async def send_template(
-        self, 
-        channel: discord.TextChannel, 
-        template: dict, 
-        end_time: datetime, 
-        is_recurring: bool = False, 
-        start_time: Optional[datetime] = None
-    ):
-        """Wysyła template do kanału - UPDATED VERSION"""
-        try:
+    def render_template(
+        self,
+        guild_id: int,
+        template: dict,
+        end_time: datetime,
+        start_time: Optional[datetime] = None,
+        template_name: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[discord.Embed]]:
+        """Renderuje template (content, embed) z planu w cache, gdy podano template_name"""
+        plan = self._render_plans.get(guild_id, template_name, template)
+        values = {}
+        if plan.needs_values:
             now = datetime.now(self.timezone)
             event_time = start_time or now
             
@@ -2116,75 +2559,32 @@ class Schedule(commands.Cog):
                 if remaining.total_seconds() > 0 
                 else "Event ended"
             )
+            values = {
+                "countdown": countdown,
+                "time": event_time.strftime('%H:%M'),
+                "date": event_time.strftime('%d.%m.%Y'),
+                "event_date": event_time.strftime('%d.%m.%Y'),
+                "event_time": event_time.strftime('%H:%M'),
+            }
+        return plan.render(values)
 
-            def replace(text):
-                if not text or not isinstance(text, str): 
-                    return text
-                return (text
-                       .replace("{countdown}", countdown)
-                       .replace("{time}", event_time.strftime('%H:%M'))
-                       .replace("{date}", event_time.strftime('%d.%m.%Y'))
-                       .replace("{event_date}", event_time.strftime('%d.%m.%Y'))
-                       .replace("{event_time}", event_time.strftime('%H:%M'))
-                )
-            
-            content = replace(template.get("content"))
-            embed = None
-            
-            if "embed" in template:
-                embed_data = template["embed"]
-                color = int(
-                    str(embed_data.get("color", "0x00ff00")).replace("#", ""), 16
-                )
-                
-                embed = discord.Embed(
-                    title=replace(embed_data.get("title")),
-                    description=replace(embed_data.get("description")),
-                    color=color
-                )
-                
-                # Author (NEW)
-                if embed_data.get("author"):
-                    author_data = embed_data["author"]
-                    embed.set_author(
-                        name=replace(author_data.get("name", "")),
-                        icon_url=author_data.get("icon_url")
-                    )
-                
-                # Fields
-                for field in embed_data.get("fields", []):
-                    embed.add_field(
-                        name=replace(field.get("name")), 
-                        value=replace(field.get("value")), 
-                        inline=field.get("inline", False)
-                    )
-                
-                # Footer (UPDATED)
-                if embed_data.get("footer"):
-                    footer_data = embed_data.get("footer")
-                    if isinstance(footer_data, dict):
-                        embed.set_footer(
-                            text=replace(footer_data.get("text")),
-                            icon_url=footer_data.get("icon_url")
-                        )
-                    else:
-                        embed.set_footer(text=replace(footer_data))
-                
-                # Thumbnail (NEW)
-                if embed_data.get("thumbnail"):
-                    try:
-                        embed.set_thumbnail(url=embed_data["thumbnail"])
-                    except:
-                        pass
-                
-                # Main Image (NEW)
-                if embed_data.get("image"):
-                    try:
-                        embed.set_image(url=embed_data["image"])
-                    except:
-                        pass
-
-            await channel.send(content=content, embed=embed)
+    async def send_template(
+        self, 
+        channel: discord.TextChannel, 
+        template: dict, 
+        end_time: datetime, 
+        is_recurring: bool = False, 
+        start_time: Optional[datetime] = None,
+        template_name: Optional[str] = None
+    ) -> Optional[discord.Message]:
+        """Wysyła template do kanału; zwraca wysłaną wiadomość (None przy błędzie)"""
+        try:
+            content, embed = self.render_template(
+                channel.guild.id, template, end_time, start_time, template_name
+            )
+            # Event i recurring tego samego serwera mogą wysyłać równolegle - na kanale zachowujemy kolejność
+            async with self._channel_lock(channel.id):
+                return await channel.send(content=content, embed=embed)
             
         except Exception as e:
             logger.error(
@@ -2192,21 +2592,66 @@ class Schedule(commands.Cog):
                 f"#{channel.name}: {e}", 
                 exc_info=True
             )
+            return None
 
-    @check_events.before_loop
-    async def before_check_events(self):
-        await self.bot.wait_until_ready()
-        logger.info("✅ Event checker started!")
+    def get_countdown_edit_time(self, now: datetime, end_time: datetime) -> datetime:
+        """Termin kolejnej edycji wiadomości z odliczaniem (schedule_windows.countdown_edit_time)"""
+        return countdown_edit_time(now, end_time)
 
-    @check_recurring_schedules.before_loop
-    async def before_check_recurring(self):
-        await self.bot.wait_until_ready()
-        logger.info("✅ Recurring schedule checker started!")
+    async def update_countdown_message(
+        self,
+        channel: discord.TextChannel,
+        event: dict,
+        template: dict,
+        end_time: datetime,
+        start_time: datetime
+    ) -> bool:
+        """
+        Tryb edit-in-place: pierwsza wysyłka tworzy wiadomość, kolejne ją edytują.
+        Edycja jest pomijana, gdy wyrenderowany tekst się nie zmienił.
+        Zwraca False, gdy wiadomości nie udało się wysłać.
+        """
+        content, embed = self.render_template(
+            channel.guild.id, template, end_time, start_time, event["template"]
+        )
+        rendered = (content, embed.to_dict() if embed else None)
+        message_id = event.get("message_id")
+        
+        if message_id:
+            renders = self._countdown_renders.setdefault(channel.guild.id, {})
+            if renders.get(message_id) == rendered:
+                return True
+            try:
+                async with self._channel_lock(channel.id):
+                    await channel.get_partial_message(message_id).edit(content=content, embed=embed)
+                renders[message_id] = rendered
+                return True
+            except discord.NotFound:
+                # Wiadomość usunięta - wysyłamy nową
+                renders.pop(message_id, None)
+                event["message_id"] = None
+            except Exception as e:
+                logger.error(f"Error editing countdown message {message_id} in #{channel.name}: {e}")
+                return True
+        
+        try:
+            async with self._channel_lock(channel.id):
+                message = await channel.send(content=content, embed=embed)
+        except Exception as e:
+            logger.error(f"Error sending countdown message to #{channel.name}: {e}")
+            return False
+        event["message_id"] = message.id
+        self._countdown_renders.setdefault(channel.guild.id, {})[message.id] = rendered
+        return True
 
     def cog_unload(self):
         """Cleanup when cog is unloaded"""
-        self.check_events.cancel()
-        self.check_recurring_schedules.cancel()
+        self._event_task.cancel()
+        self._recurring_task.cancel()
+        self._watch_task.cancel()
+        for task in list(self._dispatch_tasks):
+            task.cancel()
+        self.bot.config_manager.unsubscribe("enabled_modules", self._on_modules_changed)
         logger.info("Schedule cog unloaded, tasks cancelled")
 
 
@@ -2,16 +2,40 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+from typing import NamedTuple, Optional
 import logging
 
+from config_manager import hex_color
+
 logger = logging.getLogger('discord')
 
+
+class SuggestionSettings(NamedTuple):
+    """Przeliczona konfiguracja sugestii (odświeżana tylko po zmianie sekcji)"""
+    channel_id: Optional[int]
+    color: int
+    log_channel_id: Optional[int]
+
+
+def build_suggestion_settings(config) -> SuggestionSettings:
+    return SuggestionSettings(
+        channel_id=config["suggestions"]["channel_id"],
+        color=hex_color(config.get("embed_color", "#5865F2"), 0x5865F2),
+        log_channel_id=config.get("log_channel")
+    )
+
+
 class Suggestions(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.close_emoji = "❌"
         self.approve_emoji = "✅"
         self.reject_emoji = "⛔"
+        
+        # Widok przeliczany tylko po zmianie konfiguracji - on_reaction_add odpala się przy każdej reakcji
+        self.settings = bot.config_manager.register_view(
+            ("suggestions", "embed_color", "log_channel"), build_suggestion_settings
+        )
 
     @app_commands.command(name="suggest", description="Prześlij sugestię na serwer")
     @app_commands.describe(suggestion="Twoja sugestia (max 1000 znaków)")
@@ -30,8 +54,7 @@ class Suggestions(commands.Cog):
             )
             return
         
-        config = self.bot.get_guild_config(guild_id)
-        suggestions_config = config.get("suggestions", {})
+        settings = self.settings.get(guild_id)
         
         try:
             # Walidacja długości
@@ -50,7 +73,7 @@ class Suggestions(commands.Cog):
                 return
             
             # Pobierz kanał sugestii
-            channel_id = suggestions_config.get("channel_id")
+            channel_id = settings.channel_id
             if not channel_id:
                 await interaction.followup.send(
                     "❌ Kanał sugestii nie jest skonfigurowany! Skontaktuj się z administratorem.",
@@ -74,15 +97,11 @@ class Suggestions(commands.Cog):
                 )
                 return
             
-            # Pobierz kolor embeda
-            embed_color_hex = config.get("embed_color", "#5865F2")
-            embed_color = int(embed_color_hex.replace("#", ""), 16)
-            
             # Utwórz embed sugestii
             embed = discord.Embed(
                 title="💡 Nowa sugestia",
                 description=suggestion,
-                color=embed_color,
+                color=settings.color,
                 timestamp=discord.utils.utcnow()
             )
             embed.set_author(
@@ -160,11 +179,8 @@ class Suggestions(commands.Cog):
         if not self.bot.config_manager.is_module_enabled(guild_id, "suggestions"):
             return
         
-        config = self.bot.get_guild_config(guild_id)
-        suggestions_config = config.get("suggestions", {})
-        
         # Sprawdź czy to kanał sugestii
-        channel_id = suggestions_config.get("channel_id")
+        channel_id = self.settings.get(guild_id).channel_id
         if not channel_id or reaction.message.channel.id != channel_id:
             return
         
@@ -246,9 +262,7 @@ class Suggestions(commands.Cog):
             )
             return
         
-        config = self.bot.get_guild_config(guild_id)
-        suggestions_config = config.get("suggestions", {})
-        channel_id = suggestions_config.get("channel_id")
+        channel_id = self.settings.get(guild_id).channel_id
         
         if not channel_id:
             await interaction.response.send_message(
@@ -372,8 +386,7 @@ class Suggestions(commands.Cog):
 
     async def log_action(self, guild: discord.Guild, message: str, color=discord.Color.blue()):
         """Log akcji do kanału logów"""
-        config = self.bot.get_guild_config(guild.id)
-        log_channel_id = config.get("log_channel")
+        log_channel_id = self.settings.get(guild.id).log_channel_id
         
         if log_channel_id:
             log_channel = guild.get_channel(log_channel_id)
@@ -387,6 +400,10 @@ class Suggestions(commands.Cog):
                     await log_channel.send(embed=embed)
                 except discord.HTTPException:
                     pass
+    
+    def cog_unload(self):
+        """Wyrejestrowuje widok konfiguracji (przeładowanie coga rejestruje nowy)"""
+        self.bot.config_manager.unregister_view(self.settings)
 
 async def setup(bot):
     await bot.add_cog(Suggestions(bot))
\ No newline at end of file
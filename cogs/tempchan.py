@@ -36,6 +36,12 @@ class TempChan(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        
+        # Sekcja tempchan jest w schemacie konfiguracji - wartości domyślne są zawsze dostępne
+        self.category_key = bot.config_manager.key("tempchan.category_id")
+        self.limit_key = bot.config_manager.key("tempchan.max_channels_per_user")
+        self.inactivity_key = bot.config_manager.key("tempchan.inactivity_days")
+        
         self.cleanup_task.start()
         logger.info("✅ TempChan cog loaded (multi-guild)")
     
@@ -75,8 +81,7 @@ class TempChan(commands.Cog):
     
     def get_channel_limit(self, guild_id: int) -> int:
         """Pobiera limit kanałów per user"""
-        config = self.bot.get_guild_config(guild_id)
-        return config.get("tempchan", {}).get("max_channels_per_user", 2)
+        return self.limit_key.get(guild_id)
     
     @app_commands.command(
         name="tempchan-create",
@@ -97,8 +102,7 @@ class TempChan(commands.Cog):
             return
         
         # Sprawdź konfigurację
-        config = self.bot.get_guild_config(guild_id)
-        category_id = config.get("tempchan", {}).get("category_id")
+        category_id = self.category_key.get(guild_id)
         
         if not category_id:
             await interaction.response.send_message(
@@ -145,8 +149,7 @@ class TempChan(commands.Cog):
         
         try:
             # Pobierz kategorię
-            config = self.bot.get_guild_config(guild_id)
-            category_id = config.get("tempchan", {}).get("category_id")
+            category_id = self.category_key.get(guild_id)
             category = guild.get_channel(category_id)
             
             if not category:
@@ -687,9 +690,9 @@ class TempChan(commands.Cog):
         
         logger.info("🔄 TempChan: Verifying channels after restart...")
         
-        for guild in self.bot.guilds:
-            # Skip if module not enabled
-            if not self.bot.config_manager.is_module_enabled(guild.id, "tempchan"):
+        for guild_id in self.bot.config_manager.guilds_with_module("tempchan"):
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
                 continue
             
             channels = self.load_channels(guild.id)
@@ -737,9 +740,10 @@ class TempChan(commands.Cog):
         
         now = datetime.now(timezone.utc)
         
-        for guild in self.bot.guilds:
-            # Skip if module not enabled
-            if not self.bot.config_manager.is_module_enabled(guild.id, "tempchan"):
+        # Only guilds with the module enabled
+        for guild_id in self.bot.config_manager.guilds_with_module("tempchan"):
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
                 continue
             
             try:
@@ -755,8 +759,7 @@ class TempChan(commands.Cog):
         modified = False
         
         # Get inactivity days from config (default 30)
-        config = self.bot.get_guild_config(guild_id)
-        inactivity_days = config.get("tempchan", {}).get("inactivity_days", 30)
+        inactivity_days = self.inactivity_key.get(guild_id)
         
         for ch_id, data in list(channels.items()):
             channel = guild.get_channel(int(ch_id))
@@ -1103,9 +1106,8 @@ class TempChan(commands.Cog):
         )
         
         # Config
-        config = self.bot.get_guild_config(guild_id)
-        limit = config.get("tempchan", {}).get("max_channels_per_user", 2)
-        inactivity = config.get("tempchan", {}).get("inactivity_days", 30)
+        limit = self.limit_key.get(guild_id)
+        inactivity = self.inactivity_key.get(guild_id)
         
         embed.add_field(
             name="⚙️ Configuration",
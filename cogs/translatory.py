@@ -3,8 +3,7 @@ from discord.ext import commands
 from discord import app_commands, ui
 import deepl
 import os
-import json
-from pathlib import Path
+from typing import Optional
 
 # Pełna lista języków z Twojego poprzedniego pliku
 AVAILABLE_LANGUAGES = {
@@ -57,20 +56,19 @@ class LanguageSelect(ui.Select):
     async def callback(self, interaction: discord.Interaction):
         lang_code = self.values[0] # np. "PL" lub "EN-US"
         uid = interaction.user.id
+        gid = interaction.guild_id
         
-        # 1. Pobieramy bazowy kod dla LanguageManagera (np. PL -> pl, EN-US -> en)
-        base_lang = lang_code.split('-')[0].lower()
+        # 1. Zapisujemy JEDNĄ preferencję w LanguageManagerze (np. "pl", "en-us") -
+        #    ten sam kod wybiera język interfejsu i docelowy język DeepL
+        interaction.client.language_manager.save_pref(uid, lang_code)
         
-        # 2. Zapisujemy JEDNĄ preferencję w LanguageManagerze
-        interaction.client.language_manager.save_pref(uid, base_lang)
-        
-        # 3. Pobieramy tłumaczenie sukcesu (już w nowym języku!)
+        # 2. Pobieramy tłumaczenie sukcesu (już w nowym języku!)
         t = interaction.client.language_manager.get
         info = AVAILABLE_LANGUAGES[lang_code]
 
         embed = discord.Embed(
-            title=t("translator.success_title", user_id=uid),
-            description=f"{t('translator.success_description', user_id=uid)}\n\n"
+            title=t("translator.success_title", user_id=uid, guild_id=gid),
+            description=f"{t('translator.success_description', user_id=uid, guild_id=gid)}\n\n"
                         f"{info['emoji']} **{info['native']}**",
             color=0x57F287
         )
@@ -80,7 +78,7 @@ class LanguageSelect(ui.Select):
         await interaction.response.edit_message(embed=embed, view=self.view)
 
 class LanguageSelectView(ui.View):
-    def __init__(self, cog, user_id: int):
+    def __init__(self, cog, user_id: int, guild_id: Optional[int] = None):
         super().__init__(timeout=180)
         self.cog = cog
         t = cog.bot.language_manager.get
@@ -89,16 +87,17 @@ class LanguageSelectView(ui.View):
         # Ponieważ mamy 32 języki, dzielimy to na dwa menu.
         all_langs = list(AVAILABLE_LANGUAGES.items())
         
-        self.add_item(LanguageSelect(all_langs[:25], t("translator.languages_col1", user_id=user_id), "select_1"))
+        self.add_item(LanguageSelect(all_langs[:25], t("translator.languages_col1", user_id=user_id, guild_id=guild_id), "select_1"))
         if len(all_langs) > 25:
-            self.add_item(LanguageSelect(all_langs[25:], t("translator.languages_col2", user_id=user_id), "select_2"))
+            self.add_item(LanguageSelect(all_langs[25:], t("translator.languages_col2", user_id=user_id, guild_id=guild_id), "select_2"))
 
 class TranslateModal(ui.Modal):
     def __init__(self, cog, message: discord.Message):
         t = cog.bot.language_manager.get
         uid = interaction.user.id if hasattr(self, 'interaction') else None # Fallback
         
-        super().__init__(title=t("translator.translation_title", user_id=message.author.id)[:45])
+        guild_id = message.guild.id if message.guild else None
+        super().__init__(title=t("translator.translation_title", user_id=message.author.id, guild_id=guild_id)[:45])
         self.cog = cog
         self.message = message
 
@@ -119,25 +118,10 @@ class Translator(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.translator = deepl.Translator(os.getenv("DEEPL_API_KEY"))
-        # Ścieżka do preferencji językowych (DeepL)
-        self.langs_file = Path("user_langs.json")
-        self.user_langs = {}
-        self.bot.loop.create_task(self.load_user_langs())
-
-    async def load_user_langs(self):
-        if self.langs_file.exists():
-            try:
-                with open(self.langs_file, "r", encoding="utf-8") as f:
-                    self.user_langs = json.load(f)
-            except: self.user_langs = {}
-
-    async def save_user_langs(self):
-        with open(self.langs_file, "w", encoding="utf-8") as f:
-            json.dump(self.user_langs, f, indent=2)
 
     async def set_user_lang(self, user_id: int, lang: str):
-        self.user_langs[str(user_id)] = lang
-        await self.save_user_langs()
+        # Preferencje DeepL i języka interfejsu to jeden magazyn w LanguageManagerze
+        self.bot.language_manager.save_pref(user_id, lang)
 
     async def process_translation(self, interaction: discord.Interaction, message: discord.Message, target_lang: str):
         try:
@@ -149,6 +133,7 @@ class Translator(commands.Cog):
             
             t = self.bot.language_manager.get
             uid = interaction.user.id
+            gid = interaction.guild_id
             
             # Pobieranie danych o języku źródłowym
             src_code = result.detected_source_lang.upper()
@@ -168,7 +153,7 @@ class Translator(commands.Cog):
             tgt_display = f"{tgt_info['emoji']} {tgt_info['native']}" if tgt_info else f"🏁 {target_lang_code}"
 
             # Pobranie słowa "Tłumaczenie" (lub "Translation") z JSONa
-            title_word = t('translator.translation_title', user_id=uid)
+            title_word = t('translator.translation_title', user_id=uid, guild_id=gid)
 
             embed = discord.Embed(
                 title=f"{title_word} | {src_display} → {tgt_display}",
@@ -188,19 +173,21 @@ class Translator(commands.Cog):
     async def setlang(self, interaction: discord.Interaction):
         t = self.bot.language_manager.get
         uid = interaction.user.id
+        gid = interaction.guild_id
         
         embed = discord.Embed(
-            title=t("translator.setlang_title", user_id=uid),
-            description=f"{t('translator.setlang_description', user_id=uid)}\n\n{t('translator.setlang_tip', user_id=uid)}",
+            title=t("translator.setlang_title", user_id=uid, guild_id=gid),
+            description=f"{t('translator.setlang_description', user_id=uid, guild_id=gid)}\n\n{t('translator.setlang_tip', user_id=uid, guild_id=gid)}",
             color=0x5865F2
         )
-        embed.set_footer(text=t("translator.setlang_footer", user_id=uid))
-        await interaction.response.send_message(embed=embed, view=LanguageSelectView(self, uid), ephemeral=True)
+        embed.set_footer(text=t("translator.setlang_footer", user_id=uid, guild_id=gid))
+        await interaction.response.send_message(embed=embed, view=LanguageSelectView(self, uid, gid), ephemeral=True)
 
     @app_commands.command(name="languages", description="Show all supported translation languages")
     async def languages(self, interaction: discord.Interaction):
         t = self.bot.language_manager.get
         uid = interaction.user.id
+        gid = interaction.guild_id
         
         # Dzielimy listę na dwie kolumny dla czytelności
         items = list(AVAILABLE_LANGUAGES.items())
@@ -210,10 +197,10 @@ class Translator(commands.Cog):
 
         fmt = lambda x: f"{x[1]['emoji']} `{x[0]}` {x[1]['native']}"
         
-        embed = discord.Embed(title=t("translator.languages_title", user_id=uid), color=0x5865F2)
-        embed.add_field(name=t("translator.languages_col1", user_id=uid), value="\n".join([fmt(i) for i in col1]))
-        embed.add_field(name=t("translator.languages_col2", user_id=uid), value="\n".join([fmt(i) for i in col2]))
-        embed.set_footer(text=t("translator.languages_footer", user_id=uid))
+        embed = discord.Embed(title=t("translator.languages_title", user_id=uid, guild_id=gid), color=0x5865F2)
+        embed.add_field(name=t("translator.languages_col1", user_id=uid, guild_id=gid), value="\n".join([fmt(i) for i in col1]))
+        embed.add_field(name=t("translator.languages_col2", user_id=uid, guild_id=gid), value="\n".join([fmt(i) for i in col2]))
+        embed.set_footer(text=t("translator.languages_footer", user_id=uid, guild_id=gid))
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -221,16 +208,17 @@ class Translator(commands.Cog):
     async def translator_help(self, interaction: discord.Interaction):
         t = self.bot.language_manager.get
         uid = interaction.user.id
+        gid = interaction.guild_id
         
         embed = discord.Embed(
-            title=t("translator.help_title", user_id=uid),
-            description=t("translator.help_description", user_id=uid),
+            title=t("translator.help_title", user_id=uid, guild_id=gid),
+            description=t("translator.help_description", user_id=uid, guild_id=gid),
             color=0x5865F2
         )
-        embed.add_field(name=t("translator.help_desktop", user_id=uid), value=t("translator.help_desktop_desc", user_id=uid), inline=False)
-        embed.add_field(name=t("translator.help_mobile", user_id=uid), value=t("translator.help_mobile_desc", user_id=uid), inline=False)
-        embed.add_field(name=t("translator.help_setup", user_id=uid), value=t("translator.help_setup_desc", user_id=uid), inline=True)
-        embed.add_field(name=t("translator.help_languages", user_id=uid), value=t("translator.help_languages_desc", user_id=uid), inline=True)
+        embed.add_field(name=t("translator.help_desktop", user_id=uid, guild_id=gid), value=t("translator.help_desktop_desc", user_id=uid, guild_id=gid), inline=False)
+        embed.add_field(name=t("translator.help_mobile", user_id=uid, guild_id=gid), value=t("translator.help_mobile_desc", user_id=uid, guild_id=gid), inline=False)
+        embed.add_field(name=t("translator.help_setup", user_id=uid, guild_id=gid), value=t("translator.help_setup_desc", user_id=uid, guild_id=gid), inline=True)
+        embed.add_field(name=t("translator.help_languages", user_id=uid, guild_id=gid), value=t("translator.help_languages_desc", user_id=uid, guild_id=gid), inline=True)
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -240,8 +228,8 @@ async def translate_context(interaction: discord.Interaction, message: discord.M
     cog = interaction.client.get_cog("Translator")
     lm = interaction.client.language_manager
     
-    # Pobieramy zapisany język (np. "pl")
-    user_lang = lm.user_prefs.get(str(interaction.user.id))
+    # Pobieramy zapisany język (np. "pl", "en-gb")
+    user_lang = lm.get_pref(interaction.user.id)
     
     if user_lang:
         # Konwertujemy "pl" na "PL" (DeepL format)
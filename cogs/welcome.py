@@ -2,10 +2,42 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+from typing import NamedTuple, Optional
 import logging
 
+from config_manager import hex_color
+
 log = logging.getLogger('discord')
 
+
+class WelcomeSettings(NamedTuple):
+    """Przeliczona konfiguracja powitań (odświeżana tylko po zmianie sekcji)"""
+    channel_id: Optional[int]
+    mention_user: bool
+    has_embed: bool
+    title: str
+    description: str
+    color: int
+    thumbnail_url: Optional[str]
+    footer_text: Optional[str]
+    footer_icon_url: Optional[str]
+
+
+def build_welcome_settings(config) -> WelcomeSettings:
+    welcome_config = config["welcome_message"]
+    embed_config = welcome_config["embed"]
+    return WelcomeSettings(
+        channel_id=welcome_config.get("channel_id"),
+        mention_user=welcome_config.get("mention_user", False),
+        has_embed=bool(embed_config),
+        title=embed_config.get("title", ""),
+        description=embed_config.get("description", ""),
+        color=hex_color(embed_config.get("color", config.get("embed_color", "#d07d23"))),
+        thumbnail_url=embed_config.get("thumbnail_url"),
+        footer_text=embed_config.get("footer_text"),
+        footer_icon_url=embed_config.get("footer_icon_url")
+    )
+
 class Welcome(commands.Cog):
     """
     Wysyła konfigurowalną wiadomość powitalną, gdy nowy użytkownik dołącza do serwera.
@@ -14,6 +46,9 @@ class Welcome(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.settings = bot.config_manager.register_view(
+            ("welcome_message", "embed_color"), build_welcome_settings
+        )
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
@@ -26,10 +61,9 @@ class Welcome(commands.Cog):
         if not self.bot.config_manager.is_module_enabled(guild_id, "welcome"):
             return
         
-        config = self.bot.get_guild_config(guild_id)
-        welcome_config = config.get("welcome_message", {})
+        settings = self.settings.get(guild_id)
         
-        channel_id = welcome_config.get("channel_id")
+        channel_id = settings.channel_id
         if not channel_id:
             log.warning(f"Welcome enabled ale brak channel_id dla serwera {guild_id}")
             return
@@ -39,43 +73,38 @@ class Welcome(commands.Cog):
             log.warning(f"Welcome channel {channel_id} nie znaleziony na serwerze {guild_id}")
             return
 
-        embed_config = welcome_config.get("embed", {})
-        if not embed_config:
+        if not settings.has_embed:
             log.warning(f"Brak konfiguracji embed dla welcome na serwerze {guild_id}")
             return
             
         try:
             # Zamień placeholdery na rzeczywiste dane
-            description = embed_config.get("description", "").replace("{member_name}", member.display_name)
+            description = settings.description.replace("{member_name}", member.display_name)
             description = description.replace("{member_mention}", member.mention)
             description = description.replace("{server_name}", member.guild.name)
             
-            title = embed_config.get("title", "").replace("{member_name}", member.display_name)
+            title = settings.title.replace("{member_name}", member.display_name)
             title = title.replace("{server_name}", member.guild.name)
-            
-            # Konwertuj kolor z hex na int
-            embed_color_hex = embed_config.get("color", config.get("embed_color", "#d07d23"))
-            embed_color = int(embed_color_hex.replace("#", ""), 16)
 
             embed = discord.Embed(
-                color=embed_color,
+                color=settings.color,
                 title=title,
                 description=description
             )
 
-            if embed_config.get("thumbnail_url"):
-                embed.set_thumbnail(url=embed_config["thumbnail_url"])
+            if settings.thumbnail_url:
+                embed.set_thumbnail(url=settings.thumbnail_url)
 
-            if embed_config.get("footer_text"):
-                footer_text = embed_config["footer_text"].replace("{server_name}", member.guild.name)
+            if settings.footer_text:
+                footer_text = settings.footer_text.replace("{server_name}", member.guild.name)
                 embed.set_footer(
                     text=footer_text,
-                    icon_url=embed_config.get("footer_icon_url")
+                    icon_url=settings.footer_icon_url
                 )
 
             # Przygotuj treść wiadomości (wzmianka)
             message_content = None
-            if welcome_config.get("mention_user", False):
+            if settings.mention_user:
                 message_content = f"👑 {member.mention}"
 
             await channel.send(content=message_content, embed=embed)
@@ -148,6 +177,10 @@ class Welcome(commands.Cog):
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
         log.info(f"Skonfigurowano welcome dla serwera {interaction.guild.name}")
+    
+    def cog_unload(self):
+        """Wyrejestrowuje widok konfiguracji (przeładowanie coga rejestruje nowy)"""
+        self.bot.config_manager.unregister_view(self.settings)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Welcome(bot))
\ No newline at end of file
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Tłumaczenie metadanych komend slash (nazwy, opisy, parametry) z katalogów
+LanguageManagera. tree.sync wysyła do Discorda lokalizacje dla każdego
+języka, dla którego istnieje tłumaczenie - teksty w dekoratorach zostają
+domyślną wersją.
+
+Klucze w languages/*.json:
+    commands.<komenda>.description
+    commands.<grupa>.<komenda>.description
+    commands.<komenda>.params.<parametr>.description
+    commands.<komenda>.name / commands.<komenda>.params.<parametr>.name (opcjonalnie)
+    commands.choices.<wartość> (nazwy wyborów)
+Klucz można też podać jawnie: locale_str("...", key="commands.coś").
+"""
+import logging
+from typing import Dict, Optional, Tuple
+
+from discord import Locale, app_commands
+from discord.app_commands import TranslationContextLocation, locale_str
+
+logger = logging.getLogger('discord')
+
+# Locale Discorda, których kod nie pokrywa się z nazwą pliku w languages/
+LOCALE_ALIASES = {
+    "no": "nb",
+    "es-419": "es",
+    "sv-se": "sv",
+    "zh-cn": "zh",
+    "zh-tw": "zh",
+}
+
+# Limity Discorda - dłuższa lokalizacja wywróciłaby cały tree.sync
+_NAME_LIMIT = 32
+_DESCRIPTION_LIMIT = 100
+
+_NAME_LOCATIONS = (
+    TranslationContextLocation.command_name,
+    TranslationContextLocation.group_name,
+    TranslationContextLocation.parameter_name,
+)
+
+
+def command_key(string: locale_str, context: app_commands.TranslationContext) -> Optional[str]:
+    """Klucz katalogu dla tłumaczonego tekstu albo None, jeśli nie da się go ustalić"""
+    explicit = string.extras.get("key")
+    if explicit:
+        return explicit
+
+    location = context.location
+    data = context.data
+    if location in (TranslationContextLocation.command_name, TranslationContextLocation.group_name):
+        return f"commands.{data.qualified_name.replace(' ', '.')}.name"
+    if location in (TranslationContextLocation.command_description, TranslationContextLocation.group_description):
+        return f"commands.{data.qualified_name.replace(' ', '.')}.description"
+    if location in (TranslationContextLocation.parameter_name, TranslationContextLocation.parameter_description):
+        field = "name" if location is TranslationContextLocation.parameter_name else "description"
+        command = data.command.qualified_name.replace(' ', '.')
+        return f"commands.{command}.params.{data.name}.{field}"
+    if location is TranslationContextLocation.choice_name:
+        return f"commands.choices.{data.value}"
+    return None
+
+
+def _valid(text: str, location: TranslationContextLocation) -> bool:
+    if location in _NAME_LOCATIONS:
+        return (
+            0 < len(text) <= _NAME_LIMIT
+            and text == text.lower()
+            and all(char.isalnum() or char in "-_" for char in text)
+        )
+    return 0 < len(text) <= _DESCRIPTION_LIMIT
+
+
+class CatalogTranslator(app_commands.Translator):
+    """
+    app_commands.Translator oparty o skompilowane katalogi LanguageManagera.
+    Wyniki są zapamiętywane per (locale, klucz), więc kolejne tree.sync
+    (np. !sync) nie rozwiązują tłumaczeń od nowa. Cache jest czyszczony,
+    gdy LanguageManager podmieni katalogi (hot-reload plików językowych).
+    """
+
+    def __init__(self, language_manager):
+        self.language_manager = language_manager
+        self._memo: Dict[Tuple[str, str, TranslationContextLocation], Optional[str]] = {}
+        self._memo_version: Optional[int] = None
+        self._languages: Dict[str, Optional[str]] = {}
+
+    async def unload(self):
+        self._memo.clear()
+        self._languages.clear()
+
+    def _language_for(self, locale: Locale) -> Optional[str]:
+        """Locale Discorda ("pt-BR", "zh-TW") -> kod pliku językowego ("pt-br", "zh")"""
+        value = locale.value
+        if value not in self._languages:
+            code = value.lower()
+            self._languages[value] = LOCALE_ALIASES.get(code, code)
+        return self._languages[value]
+
+    async def translate(
+        self,
+        string: locale_str,
+        locale: Locale,
+        context: app_commands.TranslationContext
+    ) -> Optional[str]:
+        key = command_key(string, context)
+        if key is None:
+            return None
+
+        version = self.language_manager.catalog_version
+        if self._memo_version != version:
+            self._memo.clear()
+            self._memo_version = version
+
+        memo_key = (locale.value, key, context.location)
+        try:
+            return self._memo[memo_key]
+        except KeyError:
+            pass
+
+        text = self.language_manager.lookup(key, self._language_for(locale))
+        if text is not None and not _valid(text, context.location):
+            logger.warning(f"⚠️ Pominięto lokalizację {key} ({locale.value}) - nie spełnia limitów Discorda")
+            text = None
+        self._memo[memo_key] = text
+        return text
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Adresowany treścią magazyn backupów konfiguracji serwerów.
+
+    backups/objects/<sha256>.json  - unikalne wersje konfiguracji (zapisywane raz)
+    backups/index/<guild_id>.json  - lista snapshotów serwera: [{"hash", "created_at"}]
+
+Backup niezmienionej konfiguracji nie zajmuje dodatkowego miejsca.
+Retencja: ostatnie N snapshotów + najnowszy z każdego z ostatnich D dni
++ najnowszy z każdego z ostatnich W tygodni.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config_storage import _write_text_atomic
+
+logger = logging.getLogger('discord')
+
+
+class ConfigBackupStore:
+    def __init__(self, root: Path, keep_last: int = 10, keep_daily: int = 7, keep_weekly: int = 4):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_dir = self.root / "index"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self.keep_weekly = keep_weekly
+
+    # --- ścieżki / indeks -------------------------------------------------
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / f"{digest}.json"
+
+    def _index_path(self, guild_id: int) -> Path:
+        return self.index_dir / f"{guild_id}.json"
+
+    def list_snapshots(self, guild_id: int) -> List[Dict]:
+        """Snapshoty serwera od najstarszego do najnowszego"""
+        index_path = self._index_path(guild_id)
+        if not index_path.exists():
+            return []
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Błąd odczytu indeksu backupów dla {guild_id}: {e}")
+            return []
+
+    def _save_index(self, guild_id: int, snapshots: List[Dict]):
+        _write_text_atomic(self._index_path(guild_id), json.dumps(snapshots, indent=2))
+
+    # --- zapis ------------------------------------------------------------
+
+    def snapshot(self, guild_id: int, config: Dict) -> str:
+        """
+        Zapisuje backup i zwraca jego hash.
+        Jeśli treść jest identyczna z ostatnim snapshotem, nic nie jest dopisywane.
+        """
+        payload = json.dumps(config, sort_keys=True, ensure_ascii=False, indent=4)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+        blob_path = self.object_path(digest)
+        if not blob_path.exists():
+            _write_text_atomic(blob_path, payload)
+
+        snapshots = self.list_snapshots(guild_id)
+        if snapshots and snapshots[-1]["hash"] == digest:
+            return digest
+
+        snapshots.append({"hash": digest, "created_at": datetime.now().isoformat()})
+        kept = self._apply_retention(snapshots)
+        self._save_index(guild_id, kept)
+        self._drop_unreferenced(snapshots, kept)
+        return digest
+
+    def _apply_retention(self, snapshots: List[Dict]) -> List[Dict]:
+        """Zwraca snapshoty do zachowania (w oryginalnej kolejności)"""
+        keep = set(range(max(0, len(snapshots) - self.keep_last), len(snapshots)))
+
+        days, weeks = [], []
+        for position in range(len(snapshots) - 1, -1, -1):
+            created = datetime.fromisoformat(snapshots[position]["created_at"])
+            day = created.date()
+            week = created.isocalendar()[:2]
+            if day not in days and len(days) < self.keep_daily:
+                days.append(day)
+                keep.add(position)
+            if week not in weeks and len(weeks) < self.keep_weekly:
+                weeks.append(week)
+                keep.add(position)
+
+        return [snapshot for position, snapshot in enumerate(snapshots) if position in keep]
+
+    def _drop_unreferenced(self, before: List[Dict], after: List[Dict]):
+        """
+        Usuwa bloby, które wypadły z indeksu serwera.
+        Konfiguracja zawiera guild_id, więc blob nigdy nie jest współdzielony między serwerami.
+        """
+        still_used = {snapshot["hash"] for snapshot in after}
+        for snapshot in before:
+            if snapshot["hash"] in still_used:
+                continue
+            try:
+                self.object_path(snapshot["hash"]).unlink()
+            except FileNotFoundError:
+                pass
+
+    # --- odczyt -----------------------------------------------------------
+
+    def resolve(self, guild_id: int, snapshot: Optional[str] = None) -> Optional[str]:
+        """Zwraca pełny hash snapshotu (None = najnowszy, dozwolony prefiks hasha)"""
+        snapshots = self.list_snapshots(guild_id)
+        if not snapshots:
+            return None
+        if snapshot is None:
+            return snapshots[-1]["hash"]
+        matches = [s["hash"] for s in snapshots if s["hash"].startswith(snapshot)]
+        return matches[-1] if matches else None
+
+    def load(self, guild_id: int, snapshot: Optional[str] = None) -> Optional[Dict]:
+        digest = self.resolve(guild_id, snapshot)
+        if digest is None:
+            return None
+        with open(self.object_path(digest), "r", encoding="utf-8") as f:
+            return json.load(f)
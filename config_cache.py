@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Ograniczony cache LRU konfiguracji serwerów z licznikami trafień/chybień/wyrzuceń
+i przybliżonym rozmiarem w bajtach.
+
+Trafienie to zwykły odczyt z dict: kolejność LRU i licznik trafień są
+aktualizowane dopiero, gdy cache z limitem dojdzie do pojemności (wcześniej
+o kolejności decyduje moment dodania). Cache bez limitu liczy tylko chybienia.
+
+Wpisy "przypięte" (np. brudne, czekające na zapis write-behind) nigdy nie są
+wyrzucane - cache może wtedy chwilowo przekroczyć limit.
+"""
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+def approx_size(value: Any) -> int:
+    """Przybliżony rozmiar obiektu w pamięci (rekurencyjnie po dict/list/tuple)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += approx_size(key) + approx_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += approx_size(item)
+    return size
+
+
+class ConfigCache:
+    """
+    capacity: maksymalna liczba wpisów (None = bez limitu).
+    is_pinned: funkcja guild_id -> bool; przypiętych wpisów nie wyrzucamy.
+    sizeof: funkcja licząca rozmiar wpisu (domyślnie approx_size).
+    on_evict: wywoływane z guild_id po wyrzuceniu wpisu.
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        is_pinned: Optional[Callable[[int], bool]] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        on_evict: Optional[Callable[[int], None]] = None
+    ):
+        self.capacity = capacity
+        self._is_pinned = is_pinned or (lambda guild_id: False)
+        self._sizeof = sizeof or approx_size
+        self._on_evict = on_evict
+
+        self._entries: "OrderedDict[int, Any]" = OrderedDict()
+        self._sizes: Dict[int, int] = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Śledzenie LRU/trafień włączone (cache z limitem jest pełny) i chybienia od tego momentu
+        self._tracking = False
+        self._tracked_misses = 0
+
+    def get(self, guild_id: int) -> Optional[Any]:
+        """Pobiera wpis; kolejność LRU i trafienia liczymy tylko przy pełnym cache z limitem"""
+        value = self._entries.get(guild_id)
+        if value is None:
+            self.misses += 1
+            if self._tracking:
+                self._tracked_misses += 1
+            return None
+        if self._tracking:
+            self.hits += 1
+            self._entries.move_to_end(guild_id)
+        return value
+
+    def _update_tracking(self):
+        self._tracking = self.capacity is not None and len(self._entries) >= self.capacity
+
+    def peek(self, guild_id: int) -> Optional[Any]:
+        """Pobiera wpis bez wpływu na statystyki i kolejność LRU"""
+        return self._entries.get(guild_id)
+
+    def put(self, guild_id: int, value: Any):
+        """Dodaje/odświeża wpis (także przeliczając jego rozmiar) i wyrzuca nadmiarowe"""
+        self._entries[guild_id] = value
+        self._entries.move_to_end(guild_id)
+        self.resize(guild_id)
+        self._evict(protect=guild_id)
+        self._update_tracking()
+
+    def resize(self, guild_id: int):
+        """Przelicza rozmiar wpisu po zmianie w miejscu"""
+        value = self._entries.get(guild_id)
+        if value is None:
+            return
+        new_size = self._sizeof(value)
+        self._bytes += new_size - self._sizes.get(guild_id, 0)
+        self._sizes[guild_id] = new_size
+
+    def pop(self, guild_id: int) -> Optional[Any]:
+        value = self._entries.pop(guild_id, None)
+        self._bytes -= self._sizes.pop(guild_id, 0)
+        if self._tracking:
+            self._update_tracking()
+        return value
+
+    def _evict(self, protect: Optional[int] = None):
+        if self.capacity is None or len(self._entries) <= self.capacity:
+            return
+
+        # Od najdawniej używanych; przypięte i właśnie dodany wpis pomijamy
+        for guild_id in list(self._entries):
+            if len(self._entries) <= self.capacity:
+                break
+            if guild_id == protect or self._is_pinned(guild_id):
+                continue
+            self.pop(guild_id)
+            self.evictions += 1
+            if self._on_evict is not None:
+                self._on_evict(guild_id)
+
+    def __contains__(self, guild_id: object) -> bool:
+        return guild_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self._entries))
+
+    def stats(self) -> Dict[str, Any]:
+        """hit_rate to None, dopóki trafienia nie są liczone (cache bez limitu albo jeszcze niepełny)"""
+        lookups = self.hits + self._tracked_misses
+        return {
+            "capacity": self.capacity,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else None,
+            "approx_bytes": self._bytes
+        }
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Dziennik zmian konfiguracji (append-only) dla GuildConfigManager.
+
+Każda zmiana to jedna linia JSON w pliku bieżącego procesu:
+    configs/journal/journal-<pid>-<start>-<seq>.log
+Kompaktor "zamyka" bieżący segment (roll), zapisuje snapshoty brudnych
+serwerów w backendzie i dopiero wtedy przenosi segment do archiwum
+(configs/journal/archive/), które służy jako ślad audytowy.
+Przy starcie odtwarzane są wszystkie niezarchiwizowane segmenty
+procesów, które już nie działają (snapshot + ogon dziennika).
+"""
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger('discord')
+
+
+def _pid_alive(pid: int) -> bool:
+    """Czy proces o danym PID nadal działa (sygnał 0 niczego nie wysyła)"""
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class ConfigJournal:
+    """
+    journal_dir: katalog segmentów dziennika.
+    keep_archives: ile zarchiwizowanych segmentów zachować (ślad audytowy).
+    fsync: czy wymuszać zapis na dysk po każdym rekordzie (odporność na awarie).
+    """
+
+    def __init__(self, journal_dir: Path, keep_archives: int = 50, fsync: bool = True):
+        self.journal_dir = Path(journal_dir)
+        self.archive_dir = self.journal_dir / "archive"
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.keep_archives = keep_archives
+        self.fsync = fsync
+
+        self._session = f"{os.getpid()}-{int(time.time())}"
+        self._seq = 0
+        self._file = None
+        self._path: Optional[Path] = None
+
+    # --- zapis ------------------------------------------------------------
+
+    def _open_segment(self):
+        self._seq += 1
+        self._path = self.journal_dir / f"journal-{self._session}-{self._seq:06d}.log"
+        self._file = open(self._path, "a", encoding="utf-8")
+
+    def append(self, record: Dict):
+        """Dopisuje rekord na koniec bieżącego segmentu"""
+        if self._file is None:
+            self._open_segment()
+        record = dict(record, ts=time.time())
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def roll(self) -> Optional[Path]:
+        """Zamyka bieżący segment; kolejne rekordy trafią do nowego pliku"""
+        if self._file is None:
+            return None
+        self._file.close()
+        sealed = self._path
+        self._file = None
+        self._path = None
+        return sealed
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --- odtwarzanie / archiwum --------------------------------------------
+
+    def pending_segments(self) -> List[Path]:
+        """Segmenty do odtworzenia: niezarchiwizowane, należące do martwych procesów"""
+        segments = []
+        for path in sorted(self.journal_dir.glob("journal-*.log")):
+            if path == self._path:
+                continue
+            try:
+                pid = int(path.name.split("-")[1])
+            except (IndexError, ValueError):
+                continue
+            if pid != os.getpid() and _pid_alive(pid):
+                continue
+            segments.append(path)
+        return segments
+
+    def replay(self, segments: List[Path]) -> Iterator[Dict]:
+        """Zwraca rekordy z podanych segmentów w kolejności czasowej"""
+        records = []
+        for order, path in enumerate(segments):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line_no, line in enumerate(f):
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # Urwany ostatni rekord po awarii - pomijamy
+                            logger.warning(f"Dziennik konfiguracji: uszkodzony rekord {path.name}:{line_no + 1}")
+                            continue
+                        records.append((record.get("ts", 0), order, line_no, record))
+            except OSError as e:
+                logger.error(f"Dziennik konfiguracji: błąd odczytu {path}: {e}")
+        records.sort(key=lambda item: item[:3])
+        for *_, record in records:
+            yield record
+
+    def archive(self, segments: List[Path]):
+        """Przenosi segmenty do archiwum i przycina archiwum do keep_archives"""
+        for path in segments:
+            try:
+                shutil.move(str(path), str(self.archive_dir / path.name))
+            except OSError as e:
+                logger.error(f"Dziennik konfiguracji: nie udało się zarchiwizować {path}: {e}")
+
+        archived = sorted(self.archive_dir.glob("journal-*.log"), key=lambda p: p.stat().st_mtime)
+        for old in archived[:max(0, len(archived) - self.keep_archives)]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
@@ -1,34 +1,229 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import json
-import os
-from typing import Any, Dict, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Generic, Iterable, List, Mapping, Optional, Set, Tuple, TypeVar, Union
 from pathlib import Path
 import logging
 import shutil
 from datetime import datetime
 
+from config_backups import ConfigBackupStore
+from config_cache import ConfigCache, approx_size
+from config_journal import ConfigJournal
+from config_overlay import OverlayConfig, diff_from_defaults, freeze
+from config_schema import SCHEMA_VERSION, upgrade_config
+from config_storage import JsonConfigStorage, SQLiteConfigStorage, create_storage, migrate_json_to_sqlite, _write_text_atomic
+
 logger = logging.getLogger('discord')
 
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=1024)
+def compile_key_path(key_path: str) -> Tuple[str, ...]:
+    """Parsuje "leaderboard.channel_id" -> ("leaderboard", "channel_id") tylko raz"""
+    return tuple(key_path.split('.'))
+
+
+class ConfigKey(Generic[T]):
+    """
+    Skompilowany akcesor do jednej wartości konfiguracji.
+    Tworzony przez GuildConfigManager.key() i trzymany np. w cogu:
+        self.channel_key = bot.config_manager.key("suggestions.channel_id")
+        channel_id = self.channel_key.get(guild_id)
+    """
+    
+    __slots__ = ("_manager", "key_path", "path", "default")
+    
+    def __init__(self, manager: "GuildConfigManager", key_path: str, default: Optional[T] = None):
+        self._manager = manager
+        self.key_path = key_path
+        self.path = compile_key_path(key_path)
+        self.default = default
+    
+    def get(self, guild_id: int) -> Optional[T]:
+        return self._manager._get_path(guild_id, self.key_path, self.default, self.path)
+    
+    def set(self, guild_id: int, value: T):
+        self._manager._set_path(guild_id, self.path, value)
+    
+    def __repr__(self) -> str:
+        return f"ConfigKey({self.key_path!r}, default={self.default!r})"
+
+
+_NOT_BUILT = object()
+_NOT_CACHED = object()
+# Zapamiętany brak wartości pod ścieżką - zwracamy wtedy default wywołującego
+_MISSING = object()
+# Wartości, które można bezpiecznie zwracać z cache odczytów (niemutowalne liście)
+_LEAF_TYPES = (str, int, float, bool, type(None))
+
+
+def hex_color(value: Any, default: int = 0xd07d23) -> int:
+    """Zamienia "#d07d23" (lub int) na kolor embeda; błędna wartość -> default"""
+    if isinstance(value, int):
+        return value
+    try:
+        return int(str(value).replace("#", ""), 16)
+    except (TypeError, ValueError):
+        return default
+
+
+class ConfigView(Generic[T]):
+    """
+    Pochodny, niemutowalny widok konfiguracji liczony raz per serwer.
+    Tworzony przez GuildConfigManager.register_view() - builder dostaje całą
+    konfigurację serwera, a wynik jest trzymany do czasu zmiany którejś
+    z sekcji podanych w sections:
+        self.settings = bot.config_manager.register_view(("welcome_message", "embed_color"), build_settings)
+        settings = self.settings.get(guild_id)
+    Builder powinien zwracać obiekty niemutowalne (NamedTuple, tuple, frozenset).
+    """
+    
+    __slots__ = ("_manager", "sections", "_builder", "_views", "builds")
+    
+    def __init__(self, manager: "GuildConfigManager", sections: Tuple[str, ...], builder: Callable[[Mapping], T]):
+        self._manager = manager
+        self.sections = sections
+        self._builder = builder
+        self._views: Dict[int, T] = {}
+        self.builds = 0
+    
+    def get(self, guild_id: int) -> T:
+        if self._manager.shared:
+            self._manager._revalidate(guild_id)
+        view = self._views.get(guild_id, _NOT_BUILT)
+        if view is _NOT_BUILT:
+            view = self._builder(self._manager.get_guild_config(guild_id))
+            self._views[guild_id] = view
+            self.builds += 1
+        return view
+    
+    def invalidate(self, guild_id: Optional[int] = None):
+        """Wyrzuca widok serwera (None = wszystkich serwerów)"""
+        if guild_id is None:
+            self._views.clear()
+        else:
+            self._views.pop(guild_id, None)
+    
+    def __repr__(self) -> str:
+        return f"ConfigView({self.sections!r}, cached={len(self._views)})"
+
+
 class GuildConfigManager:
     """
     Zarządza konfiguracją per-serwer (guild).
     Każdy serwer ma swój własny plik konfiguracyjny i strukturę danych.
     """
     
-    def __init__(self, base_dir: str = "."):
+    def __init__(
+        self,
+        base_dir: str = ".",
+        write_behind: bool = False,
+        flush_interval: float = 5.0,
+        storage: Optional[str] = None,
+        cache_capacity: Optional[int] = None,
+        journal: Optional[bool] = None,
+        compact_interval: float = 60.0,
+        shared: Optional[bool] = None,
+        revalidate_interval: float = 2.0
+    ):
+        """
+        write_behind: jeśli True, zapisy trafiają tylko do pamięci i są
+        zrzucane na dysk przez zadanie w tle (start_write_behind) co flush_interval
+        sekund oraz przy zamykaniu bota (shutdown).
+        storage: "json" lub "sqlite" - domyślnie wartość "config_storage" z global.json.
+        cache_capacity: limit konfiguracji trzymanych w pamięci (LRU) - domyślnie
+        "config_cache_size" z global.json, brak wartości = bez limitu.
+        journal: tryb dziennika - każda zmiana to mały rekord dopisany do dziennika,
+        a snapshoty w backendzie zapisuje kompaktor co compact_interval sekund.
+        Domyślnie wartość "config_journal" z global.json.
+        shared: kilka procesów bota (np. grupy shardów) korzysta z tych samych
+        katalogów configs/ i data/ - zapisy są blokowane między procesami, a wpisy
+        cache są sprawdzane (mtime / licznik zmian) najwyżej co revalidate_interval
+        sekund. Domyślnie wartość "config_shared" z global.json.
+        """
         self.base_dir = Path(base_dir)
         self.configs_dir = self.base_dir / "configs" / "guilds"
         self.data_dir = self.base_dir / "data"
         self.global_config_path = self.base_dir / "configs" / "global.json"
         
-        # Cache dla konfiguracji (guild_id -> config dict)
-        self._config_cache: Dict[int, Dict] = {}
+        # Jedno współdzielone, niemutowalne drzewo domyślnych wartości;
+        # każdy serwer trzyma w pamięci i na dysku tylko swoje nadpisania
+        self._shared_defaults = self._build_shared_defaults()
+        
+        # Indeks modułów: nazwa modułu -> ID serwerów z włączonym modułem
+        self._module_index: Dict[str, Set[int]] = {}
+        self._indexed_guilds: Set[int] = set()
+        self._full_index_built = False
+        
+        # Skompilowane akcesory (key_path, default) -> ConfigKey
+        self._accessors: Dict[Tuple[str, type, Any], ConfigKey] = {}
+        
+        # Odczytane wartości liści: serwer -> key_path -> wartość (albo _MISSING);
+        # czyszczone przy każdej zmianie serwera (_notify_changed) i wyrzuceniu z cache
+        self._leaf_values: Dict[int, Dict[str, Any]] = {}
+        
+        # Subskrypcje zmian: sekcja -> pochodne widoki / callbacki (guild_id, sekcja)
+        self._views: Dict[str, List[ConfigView]] = {}
+        self._subscribers: Dict[str, List[Callable[[int, str], None]]] = {}
+        
+        # Write-behind: serwer -> zmienione sekcje (None = cały dokument)
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self._dirty: Dict[int, Optional[Set[str]]] = {}
+        self._flushing: Set[int] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.compact_interval = compact_interval
+        self._last_compaction = time.monotonic()
+        self._replaying = False
         
         # Utwórz katalogi jeśli nie istnieją
         self._ensure_directories()
         
         # Załaduj globalną konfigurację
         self.global_config = self._load_global_config()
+        
+        # Tryb wieloprocesowy: serwer -> znacznik wersji z backendu i czas ostatniego sprawdzenia
+        self.shared = bool(shared if shared is not None else self.global_config.get("config_shared", False))
+        self.revalidate_interval = revalidate_interval
+        self._versions: Dict[int, Any] = {}
+        self._validated_at: Dict[int, float] = {}
+        
+        # Cache LRU konfiguracji (guild_id -> OverlayConfig); niezapisane zmiany są przypięte
+        self._config_cache = ConfigCache(
+            capacity=cache_capacity if cache_capacity is not None else self.global_config.get("config_cache_size"),
+            is_pinned=lambda guild_id: guild_id in self._dirty or guild_id in self._flushing,
+            sizeof=lambda config: approx_size(config.overrides),
+            on_evict=self._on_evict
+        )
+        
+        # Backend przechowywania konfiguracji serwerów
+        self.storage = create_storage(
+            storage or self.global_config.get("config_storage", "json"), self.base_dir, shared=self.shared
+        )
+        if isinstance(self.storage, SQLiteConfigStorage):
+            self._migrate_json_storage()
+        
+        # Dziennik zmian: odtwórz ogon po poprzednim uruchomieniu (snapshot + dziennik)
+        self.journal: Optional[ConfigJournal] = None
+        if journal if journal is not None else self.global_config.get("config_journal", False):
+            self.journal = ConfigJournal(
+                self.base_dir / "configs" / "journal",
+                keep_archives=self.global_config.get("config_journal_keep_archives", 50)
+            )
+            self._replay_journal()
+        
+        # Backupy adresowane treścią (deduplikacja + retencja)
+        self.backups = ConfigBackupStore(
+            self.configs_dir / "backups",
+            keep_last=self.global_config.get("config_backup_keep_last", 10),
+            keep_daily=self.global_config.get("config_backup_keep_daily", 7),
+            keep_weekly=self.global_config.get("config_backup_keep_weekly", 4)
+        )
     
     def _ensure_directories(self):
         """Tworzy wymagane katalogi"""
@@ -73,12 +268,19 @@ class GuildConfigManager:
     def _save_global_config(self, config: Dict):
         """Zapisuje globalną konfigurację"""
         try:
-            self.global_config_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.global_config_path, "w", encoding="utf-8") as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
+            _write_text_atomic(self.global_config_path, json.dumps(config, indent=4, ensure_ascii=False))
         except Exception as e:
             logger.error(f"Błąd zapisu globalnej konfiguracji: {e}")
     
+    def _migrate_json_storage(self):
+        """Jednorazowo przenosi istniejące pliki configs/guilds/*.json do SQLite"""
+        if self.global_config.get("sqlite_migration_completed", False):
+            return
+        
+        migrate_json_to_sqlite(JsonConfigStorage(self.configs_dir), self.storage)
+        self.global_config["sqlite_migration_completed"] = True
+        self._save_global_config(self.global_config)
+    
     def _get_guild_config_path(self, guild_id: int) -> Path:
         """Zwraca ścieżkę do pliku konfiguracyjnego serwera"""
         return self.configs_dir / f"{guild_id}.json"
@@ -89,6 +291,7 @@ class GuildConfigManager:
         To są wartości startowe, które można potem edytować.
         """
         return {
+            "schema_version": SCHEMA_VERSION,
             "guild_id": None,  # Zostanie ustawione przy zapisie
             "created_at": datetime.now().isoformat(),
             "enabled_modules": [],  # Lista włączonych modułów
@@ -97,15 +300,13 @@ class GuildConfigManager:
             "command_prefix": "!",
             "embed_color": "#d07d23",
             "timezone": "Europe/Warsaw",
+            "language": None,  # Domyślny język bota na serwerze (np. "pl"); None = globalny default_language
             
             # Kanały
             "log_channel": None,
-            "suggestions_channel": None,
-            "welcome_channel": None,
             
             # Role
             "admin_roles": [],
-            "moderator_roles": [],
             
             # Leaderboard
             "leaderboard": {
@@ -165,96 +366,562 @@ class GuildConfigManager:
             "moderation": {
                 "enabled": False,
                 "moderator_roles": []
+            },
+            
+            # Private Channels
+            "tempchan": {
+                "category_id": None,
+                "max_channels_per_user": 2,
+                "inactivity_days": 30
             }
         }
     
-    def get_guild_config(self, guild_id: int) -> Dict:
+    def _build_shared_defaults(self):
+        """Domyślna konfiguracja zamrożona do współdzielenia przez wszystkie serwery"""
+        defaults = self._get_default_guild_config()
+        # Wartości per-serwer zawsze są nadpisaniami (wersja schematu też - brak = konfiguracja sprzed wersjonowania)
+        defaults["created_at"] = None
+        defaults["schema_version"] = None
+        return freeze(defaults)
+    
+    def _wrap_config(self, config) -> OverlayConfig:
+        """Zamienia pełny dict konfiguracji na overlay (defaults + rzadkie nadpisania)"""
+        if isinstance(config, OverlayConfig):
+            return config
+        return OverlayConfig(self._shared_defaults, diff_from_defaults(self._shared_defaults, config))
+    
+    def _persistable(self, config) -> Dict:
+        """To, co faktycznie trafia do backendu - tylko nadpisania"""
+        if isinstance(config, OverlayConfig):
+            return config.sparse()
+        return config
+    
+    def get_guild_config(self, guild_id: int) -> OverlayConfig:
         """
         Pobiera konfigurację dla danego serwera.
         Jeśli nie istnieje, tworzy nową z domyślnymi wartościami.
         """
+        if self.shared:
+            self._revalidate(guild_id)
+        
         # Sprawdź cache
-        if guild_id in self._config_cache:
-            return self._config_cache[guild_id]
+        config = self._config_cache.get(guild_id)
+        if config is not None:
+            return config
         
-        config_path = self._get_guild_config_path(guild_id)
+        # Po pełnym zaindeksowaniu wiemy, że serwera spoza indeksu nie ma w backendzie
+        # (nie dotyczy trybu wieloprocesowego - inny proces mógł go utworzyć)
+        if self._full_index_built and not self.shared and guild_id not in self._indexed_guilds:
+            return self._create_guild_config(guild_id)
         
-        if config_path.exists():
-            try:
-                with open(config_path, "r", encoding="utf-8") as f:
-                    config = json.load(f)
-                    self._config_cache[guild_id] = config
-                    logger.info(f"Załadowano konfigurację dla serwera {guild_id}")
-                    return config
-            except Exception as e:
-                logger.error(f"Błąd wczytywania konfiguracji dla {guild_id}: {e}")
-                # Utwórz nową jeśli błąd
-                return self._create_guild_config(guild_id)
-        else:
+        try:
+            config = self._load_raw(guild_id)
+        except Exception as e:
+            logger.error(f"Błąd wczytywania konfiguracji dla {guild_id}: {e}")
+            # Utwórz nową jeśli błąd
+            return self._create_guild_config(guild_id)
+        
+        if config is None:
             # Utwórz nową konfigurację dla serwera
             return self._create_guild_config(guild_id)
+        
+        config = self._adopt_loaded_config(guild_id, config)
+        logger.info(f"Załadowano konfigurację dla serwera {guild_id}")
+        return config
+    
+    def _load_raw(self, guild_id: int) -> Optional[Dict]:
+        """Odczyt z backendu; w trybie wieloprocesowym zapamiętuje wersję sprzed odczytu"""
+        if self.shared:
+            self._versions[guild_id] = self.storage.version(guild_id)
+            self._validated_at[guild_id] = time.monotonic()
+        return self.storage.load(guild_id)
+    
+    def _revalidate(self, guild_id: int):
+        """
+        Sprawdza (najwyżej co revalidate_interval sekund), czy inny proces nie zmienił
+        konfiguracji serwera. Nieaktualny, czysty wpis cache jest wczytywany ponownie.
+        Wpisów z niezapisanymi zmianami nie ruszamy - zapis sekcji i tak scali się z backendem.
+        """
+        now = time.monotonic()
+        if now - self._validated_at.get(guild_id, 0.0) < self.revalidate_interval:
+            return
+        self._validated_at[guild_id] = now
+        
+        if guild_id not in self._config_cache or guild_id in self._dirty or guild_id in self._flushing:
+            return
+        try:
+            if self.storage.version(guild_id) == self._versions.get(guild_id):
+                return
+            raw_config = self._load_raw(guild_id)
+        except Exception as e:
+            logger.error(f"Błąd sprawdzania wersji konfiguracji dla {guild_id}: {e}")
+            return
+        
+        self._config_cache.pop(guild_id)
+        if raw_config is None:
+            self._unindex_guild(guild_id)
+        else:
+            self._adopt_loaded_config(guild_id, raw_config)
+        self._notify_changed(guild_id)
+        logger.info(f"🔄 Konfiguracja serwera {guild_id} zmieniona przez inny proces - przeładowano")
+    
+    def _record_write(self, guild_id: int, versions: Optional[Tuple[Any, Any]]):
+        """
+        Zapamiętuje wersję po własnym zapisie. Jeśli przed zapisem backend miał inną
+        wersję niż znana, inny proces coś zmienił - wpis zostanie przeładowany przy następnym odczycie.
+        """
+        if not self.shared or versions is None:
+            return
+        previous, current = versions
+        if guild_id in self._versions and previous != self._versions[guild_id]:
+            self._versions[guild_id] = None
+            self._validated_at.pop(guild_id, None)
+        else:
+            self._versions[guild_id] = current
+    
+    def _adopt_loaded_config(self, guild_id: int, raw_config: Dict) -> OverlayConfig:
+        """
+        Wkłada wczytaną z backendu konfigurację do cache i indeksu modułów.
+        Starsza wersja schematu jest migrowana i zapisywana z powrotem (jednorazowo).
+        """
+        raw_config, upgraded = upgrade_config(raw_config)
+        config = self._wrap_config(raw_config)
+        if upgraded:
+            self._persist(guild_id, config)
+        self._config_cache.put(guild_id, config)
+        self._index_guild_modules(guild_id, config)
+        return config
+    
+    def _timed_load(self, guild_id: int) -> Tuple[int, Optional[Dict], float, Optional[Exception]]:
+        """Wczytuje surową konfigurację i mierzy czas (wywoływane w wątku)"""
+        started = time.perf_counter()
+        try:
+            raw_config = self._load_raw(guild_id)
+            error = None
+        except Exception as e:
+            raw_config, error = None, e
+        return guild_id, raw_config, time.perf_counter() - started, error
     
-    def _create_guild_config(self, guild_id: int) -> Dict:
-        """Tworzy nową konfigurację dla serwera"""
-        config = self._get_default_guild_config()
-        config["guild_id"] = guild_id
+    async def warm_up(self, guild_ids: Optional[Iterable[int]] = None, max_workers: int = 8) -> Dict[int, float]:
+        """
+        Równolegle (pula wątków) wczytuje konfiguracje do cache, żeby pierwsze
+        odczyty w cogach nie blokowały pętli zdarzeń na json.load.
+        guild_ids=None oznacza wszystkie zapisane serwery.
+        Zwraca czas wczytania (w sekundach) per serwer.
+        """
+        full = guild_ids is None
+        candidates = self.list_guilds() if full else list(guild_ids)
+        to_load = [guild_id for guild_id in candidates if self._config_cache.peek(guild_id) is None]
+        
+        capacity = self._config_cache.capacity
+        if capacity is not None and len(to_load) > capacity:
+            logger.warning(f"Rozgrzewka konfiguracji: {len(to_load)} serwerów > limit cache {capacity}")
+            to_load = to_load[:capacity]
+            full = False
+        
+        load_times: Dict[int, float] = {}
+        if to_load:
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="config-warmup") as executor:
+                results = await asyncio.gather(
+                    *(loop.run_in_executor(executor, self._timed_load, guild_id) for guild_id in to_load)
+                )
+            
+            for guild_id, raw_config, elapsed, error in results:
+                load_times[guild_id] = elapsed
+                if error is not None:
+                    logger.error(f"Błąd wczytywania konfiguracji dla {guild_id}: {error}")
+                    continue
+                # Serwer mógł zostać wczytany/utworzony w trakcie rozgrzewki - pamięć ma pierwszeństwo
+                if raw_config is None or self._config_cache.peek(guild_id) is not None:
+                    continue
+                self._adopt_loaded_config(guild_id, raw_config)
+                logger.info(f"Załadowano konfigurację dla serwera {guild_id} w {elapsed * 1000:.1f} ms")
+            
+            logger.info(
+                f"🔥 Rozgrzano cache konfiguracji: {len(to_load)} serwerów w "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+        
+        if full:
+            self._full_index_built = True
+        return load_times
+    
+    def _create_guild_config(self, guild_id: int) -> OverlayConfig:
+        """Tworzy nową konfigurację dla serwera (same wartości domyślne + ID i data utworzenia)"""
+        config = OverlayConfig(self._shared_defaults, {
+            "schema_version": SCHEMA_VERSION,
+            "guild_id": guild_id,
+            "created_at": datetime.now().isoformat()
+        })
         self.save_guild_config(guild_id, config)
         logger.info(f"Utworzono nową konfigurację dla serwera {guild_id}")
         return config
     
     def save_guild_config(self, guild_id: int, config: Dict):
-        """Zapisuje konfigurację serwera"""
+        """
+        Zapisuje konfigurację serwera.
+        W trybie write-behind tylko oznacza serwer jako "brudny" - kolejne
+        zapisy tego samego serwera przed flushem łączą się w jeden zapis.
+        Przekazany zwykły dict jest zamieniany na overlay (zapisywane są tylko różnice).
+        """
+        config = self._wrap_config(config)
+        
+        # Najpierw zapis/oznaczenie jako brudny - brudnego wpisu cache nie wyrzuci
+        self._persist(guild_id, config)
+        self._config_cache.put(guild_id, config)
+        self._index_guild_modules(guild_id, config)
+        self._notify_changed(guild_id)
+    
+    def _persist(
+        self,
+        guild_id: int,
+        config: Dict,
+        keys: Optional[Set[str]] = None,
+        record: Optional[Dict] = None
+    ):
+        """
+        Zapisuje od razu albo odkłada zapis (write-behind). keys=None oznacza cały dokument.
+        W trybie dziennika zapisuje tylko rekord zmiany - snapshot zrobi kompaktor.
+        """
+        if self.journal is not None:
+            if not self._replaying:
+                if record is None:
+                    record = {"op": "replace", "config": self._persistable(config)}
+                self.journal.append(dict(record, guild_id=guild_id))
+            self._mark_dirty(guild_id, keys)
+            return
+        
+        if self.write_behind:
+            self._mark_dirty(guild_id, keys)
+            return
+        
+        self._write_guild_config(guild_id, config, keys)
+    
+    def _mark_dirty(self, guild_id: int, keys: Optional[Set[str]] = None):
+        """Łączy oczekujące zmiany tego samego serwera"""
+        if guild_id in self._dirty:
+            pending = self._dirty[guild_id]
+            if pending is None or keys is None:
+                self._dirty[guild_id] = None
+            else:
+                pending.update(keys)
+        else:
+            self._dirty[guild_id] = None if keys is None else set(keys)
+    
+    def _write_guild_config(self, guild_id: int, config: Dict, keys: Optional[Set[str]] = None) -> bool:
+        """Fizyczny (atomowy) zapis konfiguracji serwera w backendzie"""
         try:
-            config_path = self._get_guild_config_path(guild_id)
-            with open(config_path, "w", encoding="utf-8") as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
-            
-            # Aktualizuj cache
-            self._config_cache[guild_id] = config
+            versions = self.storage.write(guild_id, self.storage.prepare(guild_id, self._persistable(config), keys))
+            self._record_write(guild_id, versions)
             logger.info(f"Zapisano konfigurację dla serwera {guild_id}")
+            return True
         except Exception as e:
             logger.error(f"Błąd zapisu konfiguracji dla {guild_id}: {e}")
+            return False
+    
+    def flush(self):
+        """Synchronicznie zapisuje wszystkie oczekujące zmiany (write-behind)"""
+        while self._dirty:
+            guild_id, keys = self._dirty.popitem()
+            config = self._config_cache.peek(guild_id)
+            if config is None:
+                continue
+            if not self._write_guild_config(guild_id, config, keys):
+                self._mark_dirty(guild_id, keys)
+                break
+    
+    async def flush_async(self):
+        """
+        Zapisuje oczekujące zmiany bez blokowania pętli zdarzeń.
+        Przygotowanie danych odbywa się w pętli (spójny snapshot), a zapis w wątku.
+        """
+        pending = self._dirty
+        self._dirty = {}
+        
+        for guild_id, keys in pending.items():
+            config = self._config_cache.peek(guild_id)
+            if config is None:
+                continue
+            
+            # W trakcie zapisu wpis nie może wypaść z cache (odczyt z dysku byłby nieaktualny)
+            self._flushing.add(guild_id)
+            try:
+                payload = self.storage.prepare(guild_id, self._persistable(config), keys)
+                versions = await asyncio.to_thread(self.storage.write, guild_id, payload)
+                self._record_write(guild_id, versions)
+                logger.info(f"Zapisano konfigurację dla serwera {guild_id} (write-behind)")
+            except Exception as e:
+                logger.error(f"Błąd zapisu konfiguracji dla {guild_id}: {e}")
+                # Spróbuj ponownie przy następnym flushu
+                self._mark_dirty(guild_id, keys)
+            finally:
+                self._flushing.discard(guild_id)
+    
+    async def _flush_loop(self):
+        """Zadanie w tle zrzucające brudne konfiguracje co flush_interval sekund"""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                if not self._dirty:
+                    continue
+                if self.journal is None:
+                    await self.flush_async()
+                elif time.monotonic() - self._last_compaction >= self.compact_interval:
+                    await self.compact_async()
+        except asyncio.CancelledError:
+            pass
+    
+    # --- dziennik zmian ---------------------------------------------------
+    
+    def _replay_journal(self):
+        """Nakłada na snapshoty rekordy z niezarchiwizowanych segmentów i od razu kompaktuje"""
+        segments = self.journal.pending_segments()
+        if not segments:
+            return
+        
+        applied = 0
+        self._replaying = True
+        try:
+            for record in self.journal.replay(segments):
+                try:
+                    self._apply_journal_record(record)
+                    applied += 1
+                except Exception as e:
+                    logger.error(f"Dziennik konfiguracji: nie udało się odtworzyć rekordu {record}: {e}")
+        finally:
+            self._replaying = False
+        
+        self.flush()
+        if not self._dirty:
+            self.journal.archive(segments)
+        logger.info(f"Odtworzono {applied} zmian konfiguracji z {len(segments)} segmentów dziennika")
+    
+    def _apply_journal_record(self, record: Dict):
+        """Stosuje pojedynczy rekord dziennika (bez ponownego dopisywania go do dziennika)"""
+        guild_id = record["guild_id"]
+        op = record.get("op")
+        
+        if op == "set":
+            self._set_path(guild_id, compile_key_path(record["path"]), record["value"])
+        elif op == "replace":
+            self.save_guild_config(guild_id, record["config"])
+        elif op == "delete":
+            self.delete_guild_config(guild_id, create_backup=False)
+        else:
+            logger.warning(f"Dziennik konfiguracji: nieznana operacja {op!r}")
+    
+    async def compact_async(self):
+        """
+        Składa dziennik w snapshoty: zamyka bieżący segment, zapisuje brudne
+        konfiguracje w backendzie i dopiero po udanym zapisie archiwizuje segment.
+        """
+        if self.journal is None:
+            await self.flush_async()
+            return
+        
+        sealed = self.journal.roll()
+        await self.flush_async()
+        self._last_compaction = time.monotonic()
+        
+        if sealed is not None and not self._dirty:
+            await asyncio.to_thread(self.journal.archive, [sealed])
+            logger.info(f"Skompaktowano dziennik konfiguracji ({sealed.name})")
+    
+    def start_write_behind(self):
+        """Uruchamia zadanie flushujące/kompaktujące (wymaga działającej pętli zdarzeń)"""
+        if not self.write_behind and self.journal is None:
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+            logger.info(f"Uruchomiono write-behind konfiguracji (co {self.flush_interval}s)")
+    
+    async def shutdown(self):
+        """Zatrzymuje zadanie flushujące i zapisuje wszystkie oczekujące zmiany"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        
+        await self.compact_async()
+        # Jeśli coś się nie udało asynchronicznie - ostatnia próba synchroniczna
+        self.flush()
+        if self.journal is not None:
+            self.journal.close()
+        self.storage.close()
     
     def update_guild_config(self, guild_id: int, key_path: str, value: Any):
         """
         Aktualizuje konkretną wartość w konfiguracji.
         key_path może być np: "leaderboard.channel_id" lub "embed_color"
         """
+        self._set_path(guild_id, compile_key_path(key_path), value)
+    
+    def get_value(self, guild_id: int, key_path: str, default: Any = None) -> Any:
+        """
+        Pobiera wartość z konfiguracji.
+        key_path może być np: "leaderboard.channel_id"
+        """
+        return self._get_path(guild_id, key_path, default)
+    
+    def key(self, key_path: str, default: Any = None) -> ConfigKey:
+        """Zwraca (zapamiętany) skompilowany akcesor dla key_path"""
+        cache_key = (key_path, type(default), default)
+        try:
+            accessor = self._accessors.get(cache_key)
+        except TypeError:
+            # Niehaszowalny default (np. lista) - akcesor bez zapamiętywania
+            return ConfigKey(self, key_path, default)
+        
+        if accessor is None:
+            accessor = ConfigKey(self, key_path, default)
+            self._accessors[cache_key] = accessor
+        return accessor
+    
+    def _get_path(
+        self, guild_id: int, key_path: str, default: Any = None, path: Optional[Tuple[str, ...]] = None
+    ) -> Any:
+        """
+        Odczyt po key_path. Niemutowalne liście (i brak wartości) trafiają do cache
+        odczytów serwera, więc powtórny odczyt to dwa słowniki zamiast przejścia
+        po overlayu. Listy i sekcje zawsze idą przez resolve (zapis w miejscu).
+        """
+        if self.shared:
+            self._revalidate(guild_id)
+        values = self._leaf_values.get(guild_id)
+        if values is not None:
+            value = values.get(key_path, _NOT_CACHED)
+            if value is not _NOT_CACHED:
+                return default if value is _MISSING else value
+        
+        current = self.get_guild_config(guild_id)
+        try:
+            value = current.resolve(path or compile_key_path(key_path))
+        except (KeyError, TypeError, IndexError):
+            value = _MISSING
+        
+        if value is _MISSING or type(value) in _LEAF_TYPES:
+            self._leaf_values.setdefault(guild_id, {})[key_path] = value
+        return default if value is _MISSING else value
+    
+    def _set_path(self, guild_id: int, path: Tuple[str, ...], value: Any):
+        """Zapis po skompilowanej ścieżce"""
         config = self.get_guild_config(guild_id)
         
         # Obsługa zagnieżdżonych kluczy
-        keys = key_path.split('.')
         current = config
-        
-        for key in keys[:-1]:
+        for key in path[:-1]:
             if key not in current:
                 current[key] = {}
             current = current[key]
         
-        current[keys[-1]] = value
-        self.save_guild_config(guild_id, config)
-        logger.info(f"Zaktualizowano {key_path} = {value} dla serwera {guild_id}")
+        current[path[-1]] = value
+        self._config_cache.resize(guild_id)
+        if path[0] == "enabled_modules":
+            self._index_guild_modules(guild_id, config)
+        # Zapisujemy tylko zmienioną sekcję najwyższego poziomu
+        self._persist(guild_id, config, {path[0]}, {"op": "set", "path": ".".join(path), "value": value})
+        self._notify_changed(guild_id, (path[0],))
+        logger.info(f"Zaktualizowano {'.'.join(path)} = {value} dla serwera {guild_id}")
     
-    def get_value(self, guild_id: int, key_path: str, default: Any = None) -> Any:
+    def register_view(self, sections: Union[str, Iterable[str]], builder: Callable[[Mapping], T]) -> ConfigView[T]:
         """
-        Pobiera wartość z konfiguracji.
-        key_path może być np: "leaderboard.channel_id"
+        Rejestruje pochodny widok zależny od podanych sekcji najwyższego poziomu.
+        Widok serwera jest przeliczany dopiero po zmianie którejś z tych sekcji.
         """
-        config = self.get_guild_config(guild_id)
-        
-        keys = key_path.split('.')
-        current = config
+        sections = (sections,) if isinstance(sections, str) else tuple(sections)
+        view = ConfigView(self, sections, builder)
+        for section in sections:
+            self._views.setdefault(section, []).append(view)
+        return view
+    
+    def unregister_view(self, view: ConfigView):
+        """Usuwa widok zarejestrowany przez register_view (np. przy przeładowaniu coga)"""
+        for section in view.sections:
+            views = self._views.get(section, [])
+            if view in views:
+                views.remove(view)
+        view.invalidate(None)
+    
+    def subscribe(self, section: str, callback: Callable[[int, str], None]):
+        """Rejestruje callback(guild_id, sekcja) wywoływany po zmianie sekcji"""
+        self._subscribers.setdefault(section, []).append(callback)
+    
+    def unsubscribe(self, section: str, callback: Callable[[int, str], None]):
+        """Usuwa callback zarejestrowany przez subscribe (np. przy przeładowaniu coga)"""
+        callbacks = self._subscribers.get(section, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+    
+    def _notify_changed(self, guild_id: int, sections: Optional[Iterable[str]] = None):
+        """Unieważnia widoki i powiadamia subskrybentów; sections=None = cały dokument"""
+        self._leaf_values.pop(guild_id, None)
+        if sections is None:
+            sections = set(self._views) | set(self._subscribers)
         
-        try:
-            for key in keys:
-                current = current[key]
-            return current
-        except (KeyError, TypeError):
-            return default
+        for section in sections:
+            for view in self._views.get(section, ()):
+                view.invalidate(guild_id)
+            for callback in self._subscribers.get(section, ()):
+                try:
+                    callback(guild_id, section)
+                except Exception as e:
+                    logger.error(f"Błąd subskrybenta zmian '{section}' dla serwera {guild_id}: {e}")
+    
+    def _on_evict(self, guild_id: int):
+        """Wyrzucony z cache serwer nie trzyma też swoich widoków, odczytów ani znacznika wersji"""
+        self._leaf_values.pop(guild_id, None)
+        for views in self._views.values():
+            for view in views:
+                view.invalidate(guild_id)
+        self._versions.pop(guild_id, None)
+        self._validated_at.pop(guild_id, None)
+    
+    def _index_guild_modules(self, guild_id: int, config: Dict):
+        """Odświeża wpisy serwera w indeksie moduł -> serwery"""
+        enabled = set(config.get("enabled_modules") or [])
+        for module_name, guild_ids in self._module_index.items():
+            if module_name not in enabled:
+                guild_ids.discard(guild_id)
+        for module_name in enabled:
+            self._module_index.setdefault(module_name, set()).add(guild_id)
+        self._indexed_guilds.add(guild_id)
+    
+    def _unindex_guild(self, guild_id: int):
+        """Usuwa serwer z indeksu modułów"""
+        for guild_ids in self._module_index.values():
+            guild_ids.discard(guild_id)
+        self._indexed_guilds.discard(guild_id)
+    
+    def _ensure_full_index(self):
+        """Jednorazowo indeksuje wszystkie zapisane konfiguracje"""
+        if self._full_index_built:
+            return
+        for guild_id in self.list_guilds():
+            if guild_id not in self._indexed_guilds:
+                self.get_guild_config(guild_id)
+        self._full_index_built = True
     
     def is_module_enabled(self, guild_id: int, module_name: str) -> bool:
-        """Sprawdza czy moduł jest włączony dla danego serwera"""
-        return module_name in self.get_value(guild_id, "enabled_modules", [])
+        """Sprawdza czy moduł jest włączony dla danego serwera (O(1) po zaindeksowaniu)"""
+        if self.shared:
+            self._revalidate(guild_id)
+        if guild_id not in self._indexed_guilds:
+            self.get_guild_config(guild_id)
+        return guild_id in self._module_index.get(module_name, ())
+    
+    def guilds_with_module(self, module_name: str) -> Set[int]:
+        """
+        Zwraca ID serwerów z włączonym modułem.
+        Pętle okresowe iterują tylko po nich zamiast po wszystkich bot.guilds.
+        Zwracana jest kopia - można bezpiecznie włączać/wyłączać moduły w trakcie iteracji.
+        """
+        self._ensure_full_index()
+        return set(self._module_index.get(module_name, ()))
     
     def enable_module(self, guild_id: int, module_name: str):
         """Włącza moduł dla serwera"""
@@ -272,6 +939,12 @@ class GuildConfigManager:
             self.update_guild_config(guild_id, "enabled_modules", enabled_modules)
             logger.info(f"Wyłączono moduł {module_name} dla serwera {guild_id}")
     
+    def cache_stats(self) -> Dict[str, Any]:
+        """Statystyki cache konfiguracji (trafienia, chybienia, wyrzucenia, rozmiar)"""
+        stats = self._config_cache.stats()
+        stats["dirty"] = len(self._dirty)
+        return stats
+    
     def get_data_path(self, guild_id: int, data_type: str, filename: str = None) -> Path:
         """
         Zwraca ścieżkę do pliku danych dla serwera.
@@ -286,48 +959,71 @@ class GuildConfigManager:
     
     def list_guilds(self) -> list[int]:
         """Zwraca listę ID serwerów z konfiguracją"""
-        guild_ids = []
-        for config_file in self.configs_dir.glob("*.json"):
-            try:
-                guild_id = int(config_file.stem)
-                guild_ids.append(guild_id)
-            except ValueError:
-                continue
-        return guild_ids
+        guild_ids = set(self.storage.list_guilds())
+        # Nowe serwery mogą jeszcze czekać na zapis (write-behind)
+        guild_ids.update(self._dirty)
+        return list(guild_ids)
     
     def backup_guild_config(self, guild_id: int) -> Optional[Path]:
-        """Tworzy backup konfiguracji serwera"""
+        """
+        Tworzy backup konfiguracji serwera i zwraca ścieżkę bloba.
+        Niezmieniona od ostatniego backupu konfiguracja nie zajmuje dodatkowego miejsca.
+        """
         try:
-            config_path = self._get_guild_config_path(guild_id)
-            if not config_path.exists():
+            config = self._config_cache.peek(guild_id)
+            if config is None:
+                config = self.storage.load(guild_id)
+            if config is None:
                 return None
+            config = self._persistable(config)
             
-            backup_dir = self.configs_dir / "backups"
-            backup_dir.mkdir(exist_ok=True)
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = backup_dir / f"{guild_id}_{timestamp}.json"
-            
-            shutil.copy2(config_path, backup_path)
-            logger.info(f"Utworzono backup konfiguracji dla {guild_id}: {backup_path}")
-            return backup_path
+            digest = self.backups.snapshot(guild_id, config)
+            logger.info(f"Utworzono backup konfiguracji dla {guild_id}: {digest[:12]}")
+            return self.backups.object_path(digest)
         except Exception as e:
             logger.error(f"Błąd tworzenia backupu dla {guild_id}: {e}")
             return None
     
+    def list_backups(self, guild_id: int) -> list[Dict]:
+        """Zwraca snapshoty serwera (od najstarszego): [{"hash", "created_at"}]"""
+        return self.backups.list_snapshots(guild_id)
+    
+    def restore_guild_config(self, guild_id: int, snapshot: Optional[str] = None) -> bool:
+        """
+        Przywraca konfigurację serwera z backupu.
+        snapshot: hash (lub jego prefiks) - domyślnie najnowszy backup.
+        """
+        try:
+            config = self.backups.load(guild_id, snapshot)
+        except Exception as e:
+            logger.error(f"Błąd odczytu backupu dla {guild_id}: {e}")
+            return False
+        if config is None:
+            logger.warning(f"Brak backupu {snapshot or 'latest'} dla serwera {guild_id}")
+            return False
+        
+        config, _ = upgrade_config(config)
+        self.save_guild_config(guild_id, config)
+        logger.info(f"♻️ Przywrócono konfigurację serwera {guild_id} z backupu")
+        return True
+    
     def delete_guild_config(self, guild_id: int, create_backup: bool = True):
         """Usuwa konfigurację serwera (np. gdy bot zostanie wyrzucony)"""
         if create_backup:
             self.backup_guild_config(guild_id)
         
-        config_path = self._get_guild_config_path(guild_id)
-        if config_path.exists():
-            config_path.unlink()
+        if self.journal is not None and not self._replaying:
+            self.journal.append({"op": "delete", "guild_id": guild_id})
+        
+        if self.storage.delete(guild_id):
             logger.info(f"Usunięto konfigurację dla serwera {guild_id}")
         
         # Usuń z cache
-        if guild_id in self._config_cache:
-            del self._config_cache[guild_id]
+        self._config_cache.pop(guild_id)
+        self._dirty.pop(guild_id, None)
+        self._versions.pop(guild_id, None)
+        self._unindex_guild(guild_id)
+        self._notify_changed(guild_id)
     
     def migrate_old_config(self, old_config_path: str = "config.json"):
         """
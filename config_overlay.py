@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Reprezentacja konfiguracji serwera jako nakładki (overlay):
+jedno współdzielone, niemutowalne drzewo domyślnych wartości + rzadka
+warstwa nadpisań per serwer. Na dysk trafiają wyłącznie nadpisania.
+
+OverlayConfig zachowuje się jak dict (get, [], in, items, update...),
+więc cogi nie muszą wiedzieć, że pod spodem są dwie warstwy.
+"""
+from collections.abc import Mapping, MutableMapping
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Optional
+
+_MISSING = object()
+
+
+def freeze(value: Any) -> Any:
+    """Rekurencyjnie zamienia dict -> MappingProxyType i list -> tuple"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Odwrotność freeze - zwraca świeżą, mutowalną kopię (dict/list)"""
+    if isinstance(value, OverlayConfig):
+        return value.to_dict()
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
+
+
+def diff_from_defaults(defaults: Mapping, data: Mapping) -> Dict:
+    """Zwraca tylko te wartości z data, które różnią się od defaults (rekurencyjnie)"""
+    sparse = {}
+    for key, value in data.items():
+        if key in defaults:
+            default = defaults[key]
+            if isinstance(value, Mapping) and isinstance(default, Mapping):
+                nested = diff_from_defaults(default, value)
+                if nested:
+                    sparse[key] = nested
+                continue
+            if thaw(default) == thaw(value):
+                continue
+        sparse[key] = thaw(value)
+    return sparse
+
+
+class _DefaultList(list):
+    """
+    Kopia listy z defaults zwracana przy odczycie. Do nadpisań trafia dopiero
+    przy pierwszej modyfikacji (append, extend, [i] = ...), więc sam odczyt
+    nie powiększa warstwy nadpisań. owner + path wskazują miejsce listy w konfiguracji.
+    """
+
+    __slots__ = ("_owner", "_path")
+
+    def __init__(self, items, owner: "OverlayConfig", path: tuple):
+        super().__init__(items)
+        self._owner = owner
+        self._path = path
+
+    def _attach(self):
+        owner = self._owner
+        if owner is None:
+            return
+        self._owner = None
+        node = owner
+        for key in self._path[:-1]:
+            node = node[key]
+        overrides = node._ensure_overrides()
+        # Lista mogła zostać już nadpisana przez inną kopię - nie kasujemy tamtej zmiany
+        overrides.setdefault(self._path[-1], self)
+
+    def __reduce_ex__(self, protocol):
+        # copy/deepcopy/pickle dają zwykłą listę (bez odwołania do konfiguracji)
+        return (list, (list(self),))
+
+
+def _copy_on_write(name: str):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._attach()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in (
+    "append", "extend", "insert", "remove", "pop", "clear", "sort", "reverse",
+    "__setitem__", "__delitem__", "__iadd__", "__imul__"
+):
+    setattr(_DefaultList, _name, _copy_on_write(_name))
+
+
+class OverlayConfig(MutableMapping):
+    """
+    Widok dict-like łączący współdzielone defaults z nadpisaniami serwera.
+    Defaults muszą pochodzić z freeze() - sekcje to MappingProxyType.
+
+    - odczyt zagnieżdżonej sekcji zwraca podrzędny OverlayConfig,
+    - listy z defaults są zwracane jako kopie, które trafiają do nadpisań przy
+      pierwszej modyfikacji, żeby kod typu config["enabled_modules"].append(...)
+      nadal działał, a sam odczyt niczego nie zapisywał,
+    - zapis do sekcji, której serwer jeszcze nie nadpisał, tworzy ją leniwie,
+    - usunięcie klucza przywraca wartość domyślną (jeśli taka istnieje).
+    """
+
+    __slots__ = ("_defaults", "_overrides", "_parent", "_parent_key")
+
+    def __init__(
+        self,
+        defaults: Mapping,
+        overrides: Optional[Dict] = None,
+        parent: Optional["OverlayConfig"] = None,
+        parent_key: Optional[str] = None
+    ):
+        self._defaults = defaults
+        self._parent = parent
+        self._parent_key = parent_key
+        if overrides is None and parent is None:
+            overrides = {}
+        self._overrides = overrides
+
+    # --- warstwa nadpisań -------------------------------------------------
+
+    def _current_overrides(self) -> Optional[Dict]:
+        """Nadpisania tej sekcji (mogły zostać utworzone przez inny widok tej samej sekcji)"""
+        if self._overrides is None and self._parent is not None:
+            parent_overrides = self._parent._current_overrides()
+            if parent_overrides is not None:
+                existing = parent_overrides.get(self._parent_key)
+                if isinstance(existing, dict):
+                    self._overrides = existing
+        return self._overrides
+
+    def _ensure_overrides(self) -> Dict:
+        """Tworzy (leniwie) słownik nadpisań dla tej sekcji i podpina go pod rodzica"""
+        overrides = self._current_overrides()
+        if overrides is None:
+            overrides = {}
+            self._parent._ensure_overrides()[self._parent_key] = overrides
+            self._overrides = overrides
+        return overrides
+
+    # --- API Mapping ------------------------------------------------------
+
+    def __getitem__(self, key: str) -> Any:
+        overrides = self._current_overrides()
+        default = self._defaults.get(key, _MISSING)
+
+        if overrides is not None and key in overrides:
+            value = overrides[key]
+            if isinstance(value, dict) and isinstance(default, MappingProxyType):
+                return OverlayConfig(default, value, self, key)
+            return value
+
+        if default is _MISSING:
+            raise KeyError(key)
+        if isinstance(default, MappingProxyType):
+            return OverlayConfig(default, None, self, key)
+        if isinstance(default, tuple):
+            # Listy muszą być mutowalne - kopia trafi do nadpisań dopiero przy zapisie
+            return _DefaultList(thaw(default), self, (key,))
+        return default
+
+    def __setitem__(self, key: str, value: Any):
+        if isinstance(value, OverlayConfig):
+            value = value.to_dict()
+        self._ensure_overrides()[key] = value
+
+    def __delitem__(self, key: str):
+        overrides = self._current_overrides()
+        if overrides is None or key not in overrides:
+            raise KeyError(key)
+        del overrides[key]
+
+    def __contains__(self, key: object) -> bool:
+        overrides = self._current_overrides()
+        return key in self._defaults or (overrides is not None and key in overrides)
+
+    def __iter__(self) -> Iterator[str]:
+        overrides = self._current_overrides() or {}
+        yield from self._defaults
+        for key in overrides:
+            if key not in self._defaults:
+                yield key
+
+    def __len__(self) -> int:
+        overrides = self._current_overrides() or {}
+        return len(self._defaults) + sum(1 for key in overrides if key not in self._defaults)
+
+    def __repr__(self) -> str:
+        return f"OverlayConfig({self.to_dict()!r})"
+
+    def resolve(self, path: tuple) -> Any:
+        """
+        Odczyt po skompilowanej ścieżce bez tworzenia widoków pośrednich.
+        Rzuca KeyError/TypeError jak zwykłe przejście po dictach.
+        Nic nie zapisuje do nadpisań: lista z defaults wraca jako kopia
+        copy-on-write. Tylko ścieżka kończąca się na sekcji tworzy widoki
+        (OverlayConfig) przez __getitem__.
+        """
+        overrides = self._current_overrides()
+        defaults = self._defaults
+        depth = 0
+
+        for key in path:
+            depth += 1
+            default = defaults.get(key, _MISSING)
+            value = overrides.get(key, _MISSING) if overrides is not None else _MISSING
+
+            if type(default) is MappingProxyType:
+                if value is _MISSING or type(value) is dict:
+                    if depth == len(path):
+                        break
+                    overrides, defaults = (None if value is _MISSING else value), default
+                    continue
+            elif value is _MISSING:
+                if default is _MISSING:
+                    raise KeyError(key)
+                if type(default) is tuple and depth == len(path):
+                    return _DefaultList(thaw(default), self, path)
+                value = default
+
+            # Poniżej tej wartości nie ma już defaults - zwykłe dicty/listy
+            for rest in path[depth:]:
+                value = value[rest]
+            return value
+
+        current = self
+        for key in path:
+            current = current[key]
+        return current
+
+    # --- eksport ----------------------------------------------------------
+
+    @property
+    def overrides(self) -> Dict:
+        """Surowa warstwa nadpisań (bez kopiowania)"""
+        return self._current_overrides() or {}
+
+    def copy(self) -> Dict:
+        return self.to_dict()
+
+    def to_dict(self) -> Dict:
+        """Pełna (zmaterializowana) konfiguracja jako zwykły dict"""
+        overrides = self._current_overrides() or {}
+        result = {}
+        for key in self:
+            default = self._defaults.get(key, _MISSING)
+            if key in overrides:
+                value = overrides[key]
+                if isinstance(value, dict) and isinstance(default, MappingProxyType):
+                    result[key] = OverlayConfig(default, value).to_dict()
+                else:
+                    result[key] = thaw(value)
+            else:
+                result[key] = thaw(default)
+        return result
+
+    def sparse(self) -> Dict:
+        """Tylko wartości różne od domyślnych - to trafia na dysk"""
+        return diff_from_defaults(self._defaults, self._current_overrides() or {})
+
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Wersjonowany schemat konfiguracji serwerów.
+
+Każda konfiguracja ma pole "schema_version". Przy wczytaniu z backendu
+GuildConfigManager przepuszcza starsze konfiguracje przez kolejne migracje
+(raz - wynik jest od razu zapisywany z powrotem), a brakujące sekcje
+uzupełniają współdzielone defaults. Dzięki temu cogi mogą polegać na tym,
+że sekcje ze schematu zawsze istnieją.
+
+Dodanie nowej wersji:
+    @migration(3)
+    def _add_something(config):
+        ...  # modyfikacja surowego dicta w miejscu
+"""
+import logging
+from typing import Callable, Dict, Tuple
+
+logger = logging.getLogger('discord')
+
+# Konfiguracje sprzed wersjonowania nie mają pola schema_version
+LEGACY_SCHEMA_VERSION = 0
+
+_MIGRATIONS: Dict[int, Callable[[Dict], None]] = {}
+
+
+def migration(version: int):
+    """Rejestruje migrację podnoszącą konfigurację do podanej wersji"""
+    def decorator(func: Callable[[Dict], None]) -> Callable[[Dict], None]:
+        if version in _MIGRATIONS:
+            raise ValueError(f"Migracja do wersji {version} jest już zarejestrowana")
+        _MIGRATIONS[version] = func
+        return func
+    return decorator
+
+
+def _move_legacy_key(config: Dict, old_key: str, section: str, new_key: str):
+    """Przenosi stary klucz najwyższego poziomu do sekcji (jeśli sekcja go jeszcze nie ma)"""
+    if old_key not in config:
+        return
+    value = config.pop(old_key)
+    if value in (None, [], ""):
+        return
+    target = config.setdefault(section, {})
+    if target.get(new_key) in (None, []):
+        target[new_key] = value
+
+
+@migration(1)
+def _move_flat_channel_keys(config: Dict):
+    """Płaskie klucze z czasów jednego serwera -> sekcje modułów"""
+    _move_legacy_key(config, "suggestions_channel", "suggestions", "channel_id")
+    _move_legacy_key(config, "welcome_channel", "welcome_message", "channel_id")
+    _move_legacy_key(config, "moderator_roles", "moderation", "moderator_roles")
+
+
+@migration(2)
+def _add_tempchan_section(config: Dict):
+    """Sekcja tempchan trafiła do defaults; stare ustawienia mogły być zapisane jako tekst"""
+    tempchan = config.get("tempchan")
+    if not isinstance(tempchan, dict):
+        config.pop("tempchan", None)
+        return
+    for key in ("category_id", "max_channels_per_user", "inactivity_days"):
+        value = tempchan.get(key)
+        if isinstance(value, str) and value.isdigit():
+            tempchan[key] = int(value)
+
+
+SCHEMA_VERSION = max(_MIGRATIONS)
+
+
+def upgrade_config(config: Dict) -> Tuple[Dict, bool]:
+    """
+    Podnosi surową konfigurację do SCHEMA_VERSION (modyfikuje ją w miejscu).
+    Zwraca (konfiguracja, czy_zmieniona).
+    """
+    version = config.get("schema_version", LEGACY_SCHEMA_VERSION)
+    if version >= SCHEMA_VERSION:
+        return config, False
+
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        step = _MIGRATIONS.get(target)
+        if step is not None:
+            step(config)
+    config["schema_version"] = SCHEMA_VERSION
+    logger.info(f"Zmigrowano konfigurację serwera {config.get('guild_id')}: v{version} -> v{SCHEMA_VERSION}")
+    return config, True
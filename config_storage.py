@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+Backendy przechowywania konfiguracji serwerów dla GuildConfigManager.
+
+- JsonConfigStorage: jeden plik JSON na serwer (configs/guilds/<id>.json)
+- SQLiteConfigStorage: jedna baza SQLite (WAL), wiersz per sekcja konfiguracji,
+  więc zmiana "leaderboard.channel_id" przepisuje tylko wiersz "leaderboard".
+
+Każdy backend ma dwuetapowy zapis: prepare() (w pętli zdarzeń - spójny snapshot)
+oraz write() (bezpieczny do wywołania z wątku). write() zwraca parę
+(wersja_przed, wersja_po) - na tej podstawie GuildConfigManager wykrywa zmiany
+zrobione przez inne procesy korzystające z tych samych plików.
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows - brak blokad doradczych
+    fcntl = None
+
+logger = logging.getLogger('discord')
+
+
+def _write_text_atomic(path: Path, payload: str):
+    """
+    Zapisuje plik atomowo: najpierw plik tymczasowy w tym samym katalogu,
+    potem os.replace. Czytelnik nigdy nie zobaczy połowicznie zapisanego pliku.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class JsonConfigStorage:
+    """
+    Konfiguracja jako osobny plik JSON dla każdego serwera.
+    shared=True: kilka procesów pisze do tego samego katalogu - zapisy są
+    chronione blokadą fcntl per serwer, a zapis wybranych sekcji odbywa się
+    jako read-modify-write, więc nie nadpisuje sekcji zmienionych przez inny proces.
+    """
+
+    name = "json"
+
+    def __init__(self, configs_dir: Path, shared: bool = False):
+        self.configs_dir = Path(configs_dir)
+        self.configs_dir.mkdir(parents=True, exist_ok=True)
+        self.shared = shared
+        self.locks_dir = self.configs_dir / ".locks"
+        if shared:
+            if fcntl is None:
+                logger.warning("Brak fcntl - współdzielony tryb konfiguracji działa bez blokad między procesami")
+            self.locks_dir.mkdir(exist_ok=True)
+
+    def path(self, guild_id: int) -> Path:
+        return self.configs_dir / f"{guild_id}.json"
+
+    @contextmanager
+    def _locked(self, guild_id: int):
+        """Blokada doradcza na czas zapisu (tylko w trybie współdzielonym)"""
+        if not self.shared or fcntl is None:
+            yield
+            return
+        with open(self.locks_dir / f"{guild_id}.lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def version(self, guild_id: int) -> Optional[Tuple[int, int]]:
+        """Znacznik wersji pliku - każdy atomowy zapis tworzy nowy i-węzeł"""
+        try:
+            stat = self.path(guild_id).stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino)
+
+    def load(self, guild_id: int) -> Optional[Dict]:
+        """Zwraca konfigurację lub None jeśli nie istnieje (błędy parsowania są propagowane)"""
+        config_path = self.path(guild_id)
+        if not config_path.exists():
+            return None
+        with open(config_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def prepare(self, guild_id: int, config: Dict, keys: Optional[Iterable[str]] = None) -> Any:
+        """
+        Poza trybem współdzielonym plik zawsze zapisujemy w całości - keys jest ignorowane.
+        W trybie współdzielonym zmienione sekcje są scalane z aktualną zawartością pliku.
+        """
+        if not self.shared or keys is None:
+            return json.dumps(config, indent=4, ensure_ascii=False)
+        return [(key, json.dumps(config[key], ensure_ascii=False) if key in config else None) for key in keys]
+
+    def write(self, guild_id: int, payload: Any) -> Tuple[Any, Any]:
+        with self._locked(guild_id):
+            previous = self.version(guild_id)
+            if not isinstance(payload, str):
+                current = self.load(guild_id) or {}
+                for key, value in payload:
+                    if value is None:
+                        current.pop(key, None)
+                    else:
+                        current[key] = json.loads(value)
+                payload = json.dumps(current, indent=4, ensure_ascii=False)
+            _write_text_atomic(self.path(guild_id), payload)
+            return previous, self.version(guild_id)
+
+    def delete(self, guild_id: int) -> bool:
+        with self._locked(guild_id):
+            config_path = self.path(guild_id)
+            if config_path.exists():
+                config_path.unlink()
+                return True
+            return False
+
+    def list_guilds(self) -> List[int]:
+        guild_ids = []
+        for config_file in self.configs_dir.glob("*.json"):
+            try:
+                guild_ids.append(int(config_file.stem))
+            except ValueError:
+                continue
+        return guild_ids
+
+    def close(self):
+        pass
+
+
+class SQLiteConfigStorage:
+    """
+    Konfiguracja w jednej bazie SQLite w trybie WAL.
+    Tabela klucz/wartość: (guild_id, key) -> JSON wartości sekcji najwyższego poziomu.
+    Tabela guild_version to licznik zmian per serwer - SQLite sam serializuje
+    zapisy wielu procesów, a licznik pozwala im unieważniać swoje cache.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Zapisy mogą przychodzić z wątku flushującego - jedno połączenie chronione lockiem
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Inny proces może właśnie trzymać blokadę zapisu - czekamy zamiast rzucać "database is locked"
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS guild_config (
+                guild_id INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (guild_id, key)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS guild_version (
+                guild_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+        """)
+
+    def version(self, guild_id: int) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM guild_version WHERE guild_id = ?", (guild_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _bump_version(self, guild_id: int) -> Tuple[Optional[int], int]:
+        """Podbija licznik zmian serwera (wywoływane wewnątrz transakcji)"""
+        row = self._conn.execute("SELECT version FROM guild_version WHERE guild_id = ?", (guild_id,)).fetchone()
+        previous = row[0] if row else None
+        current = (previous or 0) + 1
+        self._conn.execute(
+            "INSERT OR REPLACE INTO guild_version (guild_id, version) VALUES (?, ?)", (guild_id, current)
+        )
+        return previous, current
+
+    def load(self, guild_id: int) -> Optional[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM guild_config WHERE guild_id = ?", (guild_id,)
+            ).fetchall()
+        if not rows:
+            return None
+        return {key: json.loads(value) for key, value in rows}
+
+    def prepare(self, guild_id: int, config: Dict, keys: Optional[Iterable[str]] = None) -> tuple:
+        """
+        keys=None -> pełna podmiana dokumentu, w przeciwnym razie tylko wskazane sekcje.
+        Sekcja usunięta z configu jest usuwana z bazy (wartość None w payloadzie).
+        """
+        if keys is None:
+            rows = [(key, json.dumps(value, ensure_ascii=False)) for key, value in config.items()]
+            return (True, rows)
+
+        rows = []
+        for key in keys:
+            if key in config:
+                rows.append((key, json.dumps(config[key], ensure_ascii=False)))
+            else:
+                rows.append((key, None))
+        return (False, rows)
+
+    def write(self, guild_id: int, payload: tuple) -> Tuple[Optional[int], int]:
+        replace_all, rows = payload
+        with self._lock:
+            # IMMEDIATE - blokada zapisu od razu, żeby odczyt wersji i zapis były atomowe
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                versions = self._bump_version(guild_id)
+                if replace_all:
+                    self._conn.execute("DELETE FROM guild_config WHERE guild_id = ?", (guild_id,))
+                for key, value in rows:
+                    if value is None:
+                        self._conn.execute(
+                            "DELETE FROM guild_config WHERE guild_id = ? AND key = ?", (guild_id, key)
+                        )
+                    else:
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO guild_config (guild_id, key, value) VALUES (?, ?, ?)",
+                            (guild_id, key, value)
+                        )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return versions
+
+    def delete(self, guild_id: int) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self._conn.execute("DELETE FROM guild_config WHERE guild_id = ?", (guild_id,))
+                # Licznik zostaje (podbity) - inne procesy zauważą usunięcie
+                self._bump_version(guild_id)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return cur.rowcount > 0
+
+    def list_guilds(self) -> List[int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT guild_id FROM guild_config").fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_storage(kind: str, base_dir: Path, shared: bool = False):
+    """
+    Tworzy backend na podstawie nazwy z global.json ("json" lub "sqlite").
+    shared: kilka procesów bota korzysta z tego samego katalogu configs/.
+    """
+    base_dir = Path(base_dir)
+    if kind == "sqlite":
+        return SQLiteConfigStorage(base_dir / "configs" / "guilds.db")
+    if kind != "json":
+        logger.warning(f"Nieznany backend konfiguracji '{kind}' - używam json")
+    return JsonConfigStorage(base_dir / "configs" / "guilds", shared=shared)
+
+
+def migrate_json_to_sqlite(source: JsonConfigStorage, target: SQLiteConfigStorage) -> int:
+    """
+    Jednorazowa migracja drzewa configs/guilds/*.json do bazy SQLite.
+    Zwraca liczbę zmigrowanych serwerów. Pliki JSON zostają nietknięte (backup).
+    """
+    migrated = 0
+    for guild_id in source.list_guilds():
+        try:
+            config = source.load(guild_id)
+        except Exception as e:
+            logger.error(f"Migracja SQLite: pominięto {guild_id} - błąd odczytu: {e}")
+            continue
+        if config is None:
+            continue
+        target.write(guild_id, target.prepare(guild_id, config))
+        migrated += 1
+    logger.info(f"Migracja SQLite: przeniesiono {migrated} konfiguracji serwerów")
+    return migrated
+
+
+if __name__ == "__main__":
+    # python config_storage.py [base_dir] - ręczna migracja JSON -> SQLite
+    base = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(".")
+    logging.basicConfig(level=logging.INFO)
+    json_storage = JsonConfigStorage(base / "configs" / "guilds")
+    sqlite_storage = SQLiteConfigStorage(base / "configs" / "guilds.db")
+    count = migrate_json_to_sqlite(json_storage, sqlite_storage)
+    sqlite_storage.close()
+    print(f"Zmigrowano {count} serwerów do {sqlite_storage.db_path}")
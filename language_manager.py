@@ -1,64 +1,516 @@
+import asyncio
 import discord
 import json
 import logging
+import os
+import string
+import sys
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from language_prefs import LanguagePrefStore
 
 logger = logging.getLogger('discord')
 
+_FORMATTER = string.Formatter()
+FALLBACK_LANG = "en"
+
+
+class CompiledText:
+    """
+    Tekst tłumaczenia sparsowany raz przy ładowaniu języka.
+    Teksty bez placeholderów są od razu gotowe (static), pozostałe znają
+    listę wymaganych pól - brak któregoś zwraca surowy tekst bez próby formatowania.
+    """
+
+    __slots__ = ("template", "fields", "static")
+
+    def __init__(self, template: str):
+        self.template = template
+        self.fields = frozenset()
+        self.static: Optional[str] = None
+
+        try:
+            parsed = list(_FORMATTER.parse(template))
+        except ValueError:
+            # Niedomknięte klamry - format() i tak by się nie udał
+            self.static = template
+            return
+
+        fields = set()
+        for _, field_name, _, _ in parsed:
+            if field_name is None:
+                continue
+            root = field_name.split('.', 1)[0].split('[', 1)[0]
+            if not root or root.isdigit():
+                # Pola pozycyjne - get() przyjmuje tylko argumenty nazwane
+                self.static = template
+                return
+            fields.add(root)
+
+        if not fields:
+            # Sam literał ("{{" -> "{") - formatowanie raz, przy kompilacji
+            self.static = "".join(literal for literal, *_ in parsed)
+        self.fields = frozenset(fields)
+
+    def render(self, kwargs: Dict[str, Any]) -> str:
+        if self.static is not None:
+            return self.static
+        if not self.fields.issubset(kwargs):
+            return self.template
+        try:
+            return self.template.format_map(kwargs)
+        except (ValueError, KeyError, IndexError, AttributeError, TypeError):
+            return self.template
+
+
+def flatten_translations(data: Dict, prefix: str = "") -> Dict[str, Any]:
+    """{"a": {"b": "x"}} -> {"a.b": "x"}"""
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_translations(value, f"{path}."))
+        else:
+            flat[path] = value
+    return flat
+
+
+def catalog_size(catalog: Dict[str, Any], shared: Dict[str, Any]) -> int:
+    """Przybliżony rozmiar katalogu bez wpisów współdzielonych z katalogiem en"""
+    size = sys.getsizeof(catalog)
+    for key, entry in catalog.items():
+        if shared.get(key) is entry:
+            continue
+        size += sys.getsizeof(key) + sys.getsizeof(entry)
+        if type(entry) is CompiledText:
+            size += sys.getsizeof(entry.template)
+    return size
+
+
 class LanguageManager:
-    def __init__(self, bot):
+    """
+    lazy: języki są kompilowane przy pierwszym użyciu zamiast wszystkich przy starcie
+    (en jest zawsze załadowany - to fallback dla pozostałych).
+    memory_budget: limit bajtów na katalogi inne niż en (tylko w trybie lazy);
+    po przekroczeniu najdawniej używane języki są wyrzucane z pamięci.
+    reload_interval: co ile sekund sprawdzać mtime plików languages/*.json
+    (0/None wyłącza); zmienione języki są kompilowane od nowa i podmieniane jednym przypisaniem.
+    default_language: język globalny - ostatnie ogniwo łańcucha użytkownik -> serwer -> globalny
+    (przed en). Wynik łańcucha jest zapamiętywany per (użytkownik, serwer).
+    resolve_cache_size: limit zapamiętanych par (serwer, użytkownik); najdawniej używane są wyrzucane.
+    """
+
+    def __init__(
+        self,
+        bot,
+        languages_dir: str = "languages",
+        data_dir: str = "data",
+        lazy: bool = False,
+        memory_budget: Optional[int] = None,
+        reload_interval: Optional[float] = 5.0,
+        default_language: str = FALLBACK_LANG,
+        resolve_cache_size: int = 10000
+    ):
         self.bot = bot
-        self.languages_dir = Path("languages")
+        self.languages_dir = Path(languages_dir)
         self.languages_dir.mkdir(exist_ok=True)
         self.translations = {}
-        
-        # Jedna wspólna baza preferencji
-        self.prefs_path = Path("data/user_language_prefs.json")
-        self.prefs_path.parent.mkdir(parents=True, exist_ok=True)
-        self.user_prefs = self._load_prefs()
-        
+        # Skompilowane katalogi: język -> {"sekcja.klucz": CompiledText}, z fallbackiem na en
+        self.catalogs: Dict[str, Dict[str, Any]] = {}
+
+        # Tryb lazy: dostępne pliki, kolejność LRU i rozmiary załadowanych katalogów
+        self.lazy = lazy
+        self.memory_budget = memory_budget
+        self._available: Dict[str, Path] = {}
+        self._lru: "OrderedDict[str, int]" = OrderedDict()
+        self._resident_bytes = 0
+        self._hits: Dict[str, int] = {}
+        self._loads: Dict[str, int] = {}
+        self._evictions: Dict[str, int] = {}
+
+        # Hot-reload: mtime plików z ostatniego skanu; catalog_version rośnie przy każdej podmianie
+        self.reload_interval = reload_interval
+        self._mtimes: Dict[str, int] = {}
+        self._reload_task: Optional[asyncio.Task] = None
+        self.catalog_version = 0
+
+        # Rozwiązane języki (LRU): (serwer, użytkownik) -> kod języka (None = brak serwera / użytkownika).
+        # Zmiana preferencji czyści wpisy użytkownika, zmiana konfiguracji serwera - cały serwer;
+        # indeksy po użytkowniku i po serwerze pozwalają to zrobić bez przeglądania całego LRU.
+        self.default_language = (default_language or FALLBACK_LANG).lower()
+        self.resolve_cache_size = max(1, resolve_cache_size)
+        self._resolved: "OrderedDict[Tuple[Optional[int], Optional[int]], str]" = OrderedDict()
+        self._resolved_by_user: Dict[Optional[int], Set[Tuple[Optional[int], Optional[int]]]] = {}
+        self._resolved_by_guild: Dict[Optional[int], Set[Tuple[Optional[int], Optional[int]]]] = {}
+        self._config_manager = getattr(bot, "config_manager", None)
+        if self._config_manager is not None:
+            self._config_manager.subscribe("language", self._on_guild_language_changed)
+
+        # Jedna wspólna baza preferencji (także dla tłumacza DeepL) - zastępuje
+        # data/user_language_prefs.json i user_langs.json, które są importowane raz
+        self.prefs = LanguagePrefStore(
+            Path(data_dir) / "user_language_prefs.db",
+            legacy_files=[Path("user_langs.json"), Path(data_dir) / "user_language_prefs.json"],
+            cache_size=self.resolve_cache_size
+        )
+
         self.load_languages()
 
-    def _load_prefs(self) -> dict:
-        if self.prefs_path.exists():
-            with open(self.prefs_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+    def get_pref(self, user_id: int) -> Optional[str]:
+        """Zapisany kod języka użytkownika (np. "pl", "en-gb") lub None"""
+        return self.prefs.get(user_id)
 
     def save_pref(self, user_id: int, lang_code: str):
-        # Zapisujemy małe litery (np. "pl") dla plików JSON
-        self.user_prefs[str(user_id)] = lang_code.lower()
-        with open(self.prefs_path, 'w', encoding='utf-8') as f:
-            json.dump(self.user_prefs, f, indent=2)
+        # Zapisujemy małe litery (np. "pl", "en-gb"); na dysk trafi przy najbliższym flushu
+        self.prefs.set(user_id, lang_code)
+        for key in list(self._resolved_by_user.get(user_id, ())):
+            self._forget_resolved(key)
 
-    def load_languages(self):
-        self.translations = {}
+    def _on_guild_language_changed(self, guild_id: int, section: str):
+        self.forget_guild(guild_id)
+
+    def forget_guild(self, guild_id: int):
+        """Usuwa zapamiętane języki serwera (zmiana konfiguracji albo bot opuścił serwer)"""
+        for key in list(self._resolved_by_guild.get(guild_id, ())):
+            self._forget_resolved(key)
+
+    def _remember_resolved(self, key: Tuple[Optional[int], Optional[int]], lang: str):
+        self._resolved[key] = lang
+        self._resolved_by_guild.setdefault(key[0], set()).add(key)
+        self._resolved_by_user.setdefault(key[1], set()).add(key)
+        if len(self._resolved) > self.resolve_cache_size:
+            self._forget_resolved(next(iter(self._resolved)))
+
+    def _forget_resolved(self, key: Tuple[Optional[int], Optional[int]]):
+        """Usuwa wpis z LRU i z obu indeksów"""
+        del self._resolved[key]
+        for index, owner in ((self._resolved_by_guild, key[0]), (self._resolved_by_user, key[1])):
+            keys = index.get(owner)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[owner]
+
+    def _clear_resolved(self):
+        self._resolved = OrderedDict()
+        self._resolved_by_guild = {}
+        self._resolved_by_user = {}
+
+    def _guild_language(self, guild_id: int) -> Optional[str]:
+        if self._config_manager is None:
+            return None
+        return self._config_manager.get_value(guild_id, "language")
+
+    def _available_code(self, lang: Optional[str]) -> Optional[str]:
+        """Kod, dla którego istnieje katalog: dokładny ("en-gb"), bazowy ("pt-pt" -> "pt") albo None"""
+        if not lang:
+            return None
+        lang = lang.lower()
+        if lang in self.catalogs or lang in self._available:
+            return lang
+        base = lang.split('-')[0]
+        if base in self.catalogs or base in self._available:
+            return base
+        return None
+
+    def available_languages(self) -> List[str]:
+        """Kody języków z plikami w languages/ (także niezaładowanych w trybie lazy)"""
+        return sorted(set(self._available) | set(self.catalogs))
+
+    def resolve_language(self, user_id: Optional[int] = None, guild_id: Optional[int] = None) -> str:
+        """Język dla pary (użytkownik, serwer): preferencja -> język serwera -> globalny -> en"""
+        key = (guild_id, user_id)
+        lang = self._resolved.get(key)
+        if lang is not None:
+            self._resolved.move_to_end(key)
+            return lang
+
+        lang = (
+            (self._available_code(self.prefs.get(user_id)) if user_id is not None else None)
+            or (self._available_code(self._guild_language(guild_id)) if guild_id is not None else None)
+            or self._available_code(self.default_language)
+            or FALLBACK_LANG
+        )
+        self._remember_resolved(key, lang)
+        return lang
+
+    def start_write_behind(self):
+        """Uruchamia zadanie w tle zapisujące preferencje paczkami"""
+        self.prefs.start()
+
+    def start_hot_reload(self):
+        """Uruchamia zadanie w tle przeładowujące zmienione pliki językowe"""
+        if not self.reload_interval:
+            return
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = asyncio.get_running_loop().create_task(self._reload_loop())
+
+    async def shutdown(self):
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+            self._reload_task = None
+        await self.prefs.close()
+
+    def _scan_languages(self) -> Dict[str, Tuple[Path, int]]:
+        """język -> (plik, mtime_ns); sam stat, bez czytania plików"""
+        found = {}
         for lang_file in self.languages_dir.glob("*.json"):
             try:
-                with open(lang_file, 'r', encoding='utf-8') as f:
-                    self.translations[lang_file.stem] = json.load(f)
-            except Exception as e:
-                logger.error(f"❌ Error loading {lang_file.name}: {e}")
-
-    def get(self, key: str, user_id: int = None, **kwargs) -> str:
-        lang = self.user_prefs.get(str(user_id), "en")
-        text = self._get_nested_value(lang, key)
-        if text is None and lang != "en":
-            text = self._get_nested_value("en", key)
-        
-        if text is None: return key
-        
+                found[lang_file.stem] = (lang_file, os.stat(lang_file).st_mtime_ns)
+            except OSError:
+                # Plik zniknął między glob a stat - potraktujemy go jak usunięty
+                continue
+        return found
+
+    def load_languages(self):
+        self.translations = {}
+        scanned = self._scan_languages()
+        self._available = {lang: lang_file for lang, (lang_file, _) in scanned.items()}
+        self._mtimes = {lang: mtime for lang, (_, mtime) in scanned.items()}
+        for lang, lang_file in self._available.items():
+            if self.lazy and lang != FALLBACK_LANG:
+                continue
+            data = self._read_language(lang_file)
+            if data is not None:
+                self.translations[lang] = data
+        self._compile_catalogs()
+
+    @staticmethod
+    def _read_language(lang_file: Path) -> Optional[Dict]:
         try:
-            return text.format(**kwargs)
-        except:
-            return text
+            with open(lang_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"❌ Error loading {lang_file.name}: {e}")
+            return None
 
-    def _get_nested_value(self, lang: str, key: str) -> Any:
+    def _compile_catalogs(self):
+        """Spłaszcza języki i rozwiązuje fallback na en raz, przy ładowaniu"""
+        fallback = self._compile(self.translations.get(FALLBACK_LANG, {}))
+        catalogs = {FALLBACK_LANG: fallback}
+        for lang, data in self.translations.items():
+            if lang != FALLBACK_LANG:
+                catalogs[lang] = {**fallback, **self._compile(data)}
+        self.catalogs = catalogs
+        self._lru.clear()
+        self._resident_bytes = 0
+        self.catalog_version += 1
+        logger.info(f"🌐 Skompilowano {len(catalogs)} katalogów tłumaczeń ({len(fallback)} kluczy en)")
+
+    async def _reload_loop(self):
         try:
-            data = self.translations.get(lang, {})
-            for part in key.split('.'):
-                data = data[part]
-            return data
-        except:
-            return None
\ No newline at end of file
+            while True:
+                await asyncio.sleep(self.reload_interval)
+                try:
+                    await self.reload_changed()
+                except Exception as e:
+                    logger.error(f"❌ Błąd przeładowania plików językowych: {e}")
+        except asyncio.CancelledError:
+            pass
+
+    async def reload_changed(self) -> List[str]:
+        """
+        Przeładowuje języki, których pliki zmieniły się od ostatniego skanu.
+        Stat i odczyt plików odbywają się w wątku; kompilacja i podmiana katalogów
+        w pętli zdarzeń, więc get() widzi albo stary, albo nowy katalog - nigdy
+        stan pośredni. Zwraca listę przeładowanych (lub usuniętych) języków.
+        """
+        scanned = await asyncio.to_thread(self._scan_languages)
+        changed = [lang for lang, (_, mtime) in scanned.items() if self._mtimes.get(lang) != mtime]
+        removed = [lang for lang in self._mtimes if lang not in scanned]
+        if not changed and not removed:
+            return []
+
+        # Zmiana en zmienia fallback wszystkich katalogów - kompilujemy od nowa każdy załadowany
+        full = FALLBACK_LANG in changed or FALLBACK_LANG in removed
+        resident = set(self.catalogs)
+        if full:
+            to_read = [lang for lang in scanned if lang in resident or lang == FALLBACK_LANG or not self.lazy]
+        else:
+            # W trybie lazy niezaładowany język i tak zostanie wczytany świeży przy pierwszym użyciu
+            to_read = [lang for lang in changed if lang in resident or not self.lazy]
+        paths = {lang: scanned[lang][0] for lang in to_read}
+        loaded = await asyncio.to_thread(lambda: {lang: self._read_language(path) for lang, path in paths.items()})
+
+        self._swap_catalogs(scanned, loaded, removed, full)
+        reloaded = sorted(set(changed) | set(removed))
+        logger.info(f"🔄 Przeładowano pliki językowe: {', '.join(reloaded)}")
+        return reloaded
+
+    def _swap_catalogs(self, scanned, loaded: Dict[str, Optional[Dict]], removed: List[str], full: bool):
+        """Buduje nowe słowniki obok starych i podmienia je jednym przypisaniem"""
+        translations = dict(self.translations)
+        for lang, data in loaded.items():
+            # Uszkodzony JSON (np. zapis w trakcie edycji) - zostaje poprzednia wersja
+            if data is not None:
+                translations[lang] = data
+        for lang in removed:
+            if lang != FALLBACK_LANG:
+                translations.pop(lang, None)
+
+        if full:
+            fallback = self._compile(translations.get(FALLBACK_LANG, {}))
+            sources = {lang: translations.get(lang) for lang in self.catalogs if lang not in removed}
+            sources.update(loaded)
+        else:
+            fallback = self.catalogs.get(FALLBACK_LANG, {})
+            sources = loaded
+        catalogs = {**self.catalogs, FALLBACK_LANG: fallback}
+        for lang, data in sources.items():
+            if lang == FALLBACK_LANG:
+                continue
+            if self.lazy and lang not in self.catalogs:
+                # Wyrzucony z pamięci w trakcie odczytu - wczyta się świeży przy następnym użyciu
+                continue
+            if data is None:
+                data = translations.get(lang)
+            if data is None:
+                continue
+            catalogs[lang] = {**fallback, **self._compile(data)}
+        for lang in removed:
+            if lang != FALLBACK_LANG:
+                catalogs.pop(lang, None)
+
+        # Rozmiary katalogów lazy liczymy od nowa dla podmienionych wpisów
+        lru = OrderedDict(
+            (lang, catalog_size(catalogs[lang], fallback)) for lang in self._lru if lang in catalogs
+        )
+
+        if self.lazy:
+            translations = {lang: data for lang, data in translations.items() if lang == FALLBACK_LANG}
+        self.translations = translations
+        self.catalogs = catalogs
+        self._lru = lru
+        self._resident_bytes = sum(lru.values())
+        self._available = {lang: lang_file for lang, (lang_file, _) in scanned.items()}
+        self._mtimes = {lang: mtime for lang, (_, mtime) in scanned.items()}
+        self._clear_resolved()
+        self.catalog_version += 1
+
+    def _load_lazy(self, lang: str) -> Optional[Dict[str, Any]]:
+        """Kompiluje język przy pierwszym użyciu i pilnuje budżetu pamięci"""
+        lang_file = self._available.get(lang)
+        if lang_file is None:
+            return None
+        data = self._read_language(lang_file)
+        if data is None:
+            return None
+
+        fallback = self.catalogs.get(FALLBACK_LANG, {})
+        catalog = {**fallback, **self._compile(data)}
+        size = catalog_size(catalog, fallback)
+
+        self.catalogs[lang] = catalog
+        self._lru[lang] = size
+        self._resident_bytes += size
+        self._loads[lang] = self._loads.get(lang, 0) + 1
+        self._evict(protect=lang)
+        return catalog
+
+    def _evict(self, protect: str):
+        if self.memory_budget is None:
+            return
+        for lang in list(self._lru):
+            if self._resident_bytes <= self.memory_budget:
+                break
+            if lang == protect:
+                continue
+            self._resident_bytes -= self._lru.pop(lang)
+            del self.catalogs[lang]
+            self._evictions[lang] = self._evictions.get(lang, 0) + 1
+            logger.info(f"🗑️ Wyrzucono z pamięci katalog języka {lang}")
+
+    @staticmethod
+    def _compile(data: Dict) -> Dict[str, Any]:
+        return {
+            key: CompiledText(value) if isinstance(value, str) else value
+            for key, value in flatten_translations(data).items()
+        }
+
+    def _resolve_catalog(self, lang: str) -> Optional[Dict[str, Any]]:
+        catalog = self.catalogs.get(lang)
+        if catalog is not None:
+            if lang in self._lru:
+                self._lru.move_to_end(lang)
+            return catalog
+        if self.lazy:
+            return self._load_lazy(lang)
+        return None
+
+    def _catalog_for(self, lang: Optional[str]) -> Dict[str, Any]:
+        """Katalog dla kodu języka: dokładny ("en-gb"), bazowy ("pt-pt" -> "pt") albo en"""
+        catalog = None
+        if lang:
+            catalog = self._resolve_catalog(lang)
+            if catalog is None:
+                lang = lang.split('-')[0]
+                catalog = self._resolve_catalog(lang)
+        if catalog is None:
+            lang = FALLBACK_LANG
+            catalog = self.catalogs.get(FALLBACK_LANG, {})
+        self._hits[lang] = self._hits.get(lang, 0) + 1
+        return catalog
+
+    def language_stats(self) -> Dict[str, Any]:
+        """Które katalogi są w pamięci, ile ważą i jak często są używane"""
+        fallback = self.catalogs.get(FALLBACK_LANG, {})
+        languages = {}
+        for lang in sorted(set(self._available) | set(self.catalogs)):
+            resident = lang in self.catalogs
+            if lang in self._lru:
+                size = self._lru[lang]
+            elif resident:
+                size = catalog_size(self.catalogs[lang], {} if lang == FALLBACK_LANG else fallback)
+            else:
+                size = 0
+            languages[lang] = {
+                "resident": resident,
+                "hits": self._hits.get(lang, 0),
+                "loads": self._loads.get(lang, 0),
+                "evictions": self._evictions.get(lang, 0),
+                "approx_bytes": size
+            }
+        return {
+            "lazy": self.lazy,
+            "memory_budget": self.memory_budget,
+            "resident": sum(1 for info in languages.values() if info["resident"]),
+            "available": len(self._available),
+            "approx_bytes": sum(info["approx_bytes"] for info in languages.values()),
+            "languages": languages
+        }
+
+    def lookup(self, key: str, lang: str) -> Optional[str]:
+        """
+        Surowy tekst klucza w danym języku (exact albo bazowy kod) bez formatowania.
+        Zwraca None, gdy język nie ma własnego tłumaczenia - fallback en dostają
+        tylko odmiany angielskiego. Nie liczy się do statystyk trafień.
+        """
+        catalog = self._resolve_catalog(lang)
+        if catalog is None:
+            lang = lang.split('-')[0]
+            catalog = self._resolve_catalog(lang)
+        if catalog is None:
+            return None
+
+        entry = catalog.get(key)
+        if type(entry) is not CompiledText:
+            return None
+        if lang.split('-')[0] != FALLBACK_LANG and entry is self.catalogs.get(FALLBACK_LANG, {}).get(key):
+            return None
+        return entry.static if entry.static is not None else entry.template
+
+    def get(self, key: str, user_id: int = None, guild_id: int = None, **kwargs) -> str:
+        catalog = self._catalog_for(self.resolve_language(user_id, guild_id))
+
+        entry = catalog.get(key)
+        if entry is None:
+            return key
+        if type(entry) is CompiledText:
+            return entry.render(kwargs)
+        return entry
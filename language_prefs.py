@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Magazyn preferencji językowych użytkowników (jedno źródło prawdy dla
+LanguageManagera i tłumacza DeepL).
+
+SQLite (WAL), jeden wiersz na użytkownika - zmiana języka to zapis jednego
+wiersza, a nie przepisanie pliku ze wszystkimi użytkownikami. Zapisy są
+buforowane w pamięci i zrzucane paczkami (write-behind) przez zadanie w tle.
+
+Kody przechowujemy małymi literami w formacie DeepL ("pl", "en-gb", "pt-br").
+Przy pierwszym uruchomieniu importowane są stare pliki JSON:
+data/user_language_prefs.json oraz user_langs.json.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger('discord')
+
+_UNKNOWN = object()
+
+
+class LanguagePrefStore:
+    """
+    db_path: plik bazy SQLite.
+    flush_interval: co ile sekund zadanie w tle zrzuca oczekujące zmiany.
+    legacy_files: stare pliki JSON do jednorazowego importu (kolejność = priorytet rosnąco).
+    cache_size: limit użytkowników w cache odczytów (LRU); najdawniej używani są wyrzucani.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        flush_interval: float = 5.0,
+        legacy_files: Iterable[Path] = (),
+        cache_size: int = 10000
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.cache_size = max(1, cache_size)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_language (
+                user_id INTEGER PRIMARY KEY,
+                lang TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+        # Cache odczytów LRU (także "brak preferencji"), bufor niezapisanych zmian
+        # i paczka właśnie zapisywana przez flush - obie czytamy przed bazą
+        self._cache: "OrderedDict[int, Optional[str]]" = OrderedDict()
+        self._pending: Dict[int, str] = {}
+        self._flushing: Dict[int, str] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self._import_legacy(list(legacy_files))
+
+    # --- migracja ---------------------------------------------------------
+
+    def _import_legacy(self, legacy_files):
+        """Jednorazowy import starych plików JSON (pliki zostają na dysku jako backup)"""
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM meta WHERE key = 'legacy_imported'").fetchone()
+        if done:
+            return
+
+        merged: Dict[int, str] = {}
+        for path in legacy_files:
+            path = Path(path)
+            if not path.exists():
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                logger.error(f"❌ Nie udało się zaimportować preferencji z {path}: {e}")
+                continue
+            if not isinstance(data, dict):
+                logger.error(f"❌ Nie udało się zaimportować preferencji z {path}: oczekiwano obiektu JSON")
+                continue
+            for user_id, lang in data.items():
+                try:
+                    user_id = int(user_id)
+                except (TypeError, ValueError):
+                    logger.warning(f"⚠️ Pominięto preferencję z {path}: nieprawidłowe ID użytkownika {user_id!r}")
+                    continue
+                lang = str(lang).lower()
+                previous = merged.get(user_id)
+                # "pl" z nowszego pliku nie nadpisuje dokładniejszego "pl" / "en-gb" z DeepL
+                if previous and previous.split('-')[0] == lang:
+                    continue
+                merged[user_id] = lang
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO user_language (user_id, lang) VALUES (?, ?)", merged.items()
+            )
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_imported', '1')")
+            self._conn.execute("COMMIT")
+        if merged:
+            logger.info(f"🌐 Zaimportowano {len(merged)} preferencji językowych ze starych plików JSON")
+
+    # --- odczyt / zapis ----------------------------------------------------
+
+    def get(self, user_id: int) -> Optional[str]:
+        """Kod języka użytkownika lub None (wynik, również brak, trafia do cache)"""
+        lang = self._cache.get(user_id, _UNKNOWN)
+        if lang is not _UNKNOWN:
+            self._cache.move_to_end(user_id)
+            return lang
+        # Wpis mógł wypaść z cache, zanim trafił na dysk
+        lang = self._pending.get(user_id) or self._flushing.get(user_id)
+        if lang is None:
+            with self._lock:
+                row = self._conn.execute("SELECT lang FROM user_language WHERE user_id = ?", (user_id,)).fetchone()
+            lang = row[0] if row else None
+        self._remember(user_id, lang)
+        return lang
+
+    def set(self, user_id: int, lang: str):
+        """Zmiana trafia od razu do pamięci, na dysk - przy najbliższym flushu"""
+        lang = lang.lower()
+        self._remember(user_id, lang)
+        self._pending[user_id] = lang
+
+    def _remember(self, user_id: int, lang: Optional[str]):
+        self._cache[user_id] = lang
+        self._cache.move_to_end(user_id)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _write_batch(self, pending: Dict[int, str]) -> bool:
+        """Zapis paczki jedną transakcją (bezpieczne do wywołania z wątku)"""
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO user_language (user_id, lang) VALUES (?, ?)", pending.items()
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            return True
+        except Exception as e:
+            logger.error(f"❌ Błąd zapisu preferencji językowych: {e}")
+            return False
+
+    def _requeue(self, pending: Dict[int, str]):
+        # Nowsze zmiany z bufora mają pierwszeństwo
+        self._pending = {**pending, **self._pending}
+
+    def flush(self) -> int:
+        """Synchronicznie zapisuje oczekujące zmiany; zwraca liczbę zapisanych wierszy"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        self._flushing = pending
+        try:
+            written = self._write_batch(pending)
+        finally:
+            self._flushing = {}
+        if not written:
+            self._requeue(pending)
+            return 0
+        return len(pending)
+
+    async def flush_async(self) -> int:
+        """Jak flush(), ale zapis odbywa się w wątku - bufor podmieniamy w pętli zdarzeń"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        self._flushing = pending
+        try:
+            written = await asyncio.to_thread(self._write_batch, pending)
+        finally:
+            self._flushing = {}
+        if not written:
+            self._requeue(pending)
+            return 0
+        return len(pending)
+
+    async def _flush_loop(self):
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush_async()
+        except asyncio.CancelledError:
+            pass
+
+    def start(self):
+        """Uruchamia zadanie w tle (wymaga działającej pętli zdarzeń)"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def close(self):
+        """Zatrzymuje zadanie w tle, zapisuje resztę zmian i zamyka bazę"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        self.flush()
+        with self._lock:
+            self._conn.close()
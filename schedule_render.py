@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Skompilowane plany renderowania szablonów schedule.
+
+Szablon (dict z templates.json) jest raz zamieniany na RenderPlan:
+gotowy szkielet discord.Embed ze statycznymi polami, listę miejsc, w których
+występują placeholdery ({countdown}, {time}, {date}, {event_date}, {event_time})
+i kolor sparsowany z hex. Wysyłka kopiuje szkielet i podstawia tylko
+dynamiczne teksty - bez parsowania koloru i budowania embedu od zera.
+"""
+import re
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import discord
+
+PLACEHOLDERS = ("countdown", "time", "date", "event_date", "event_time")
+_PLACEHOLDER_RE = re.compile(r"\{(" + "|".join(PLACEHOLDERS) + r")\}")
+
+# Tekst z placeholderami: naprzemiennie literał i nazwa placeholdera (re.split z grupą)
+CompiledText = Tuple[str, ...]
+
+
+def compile_text(text) -> Union[str, None, CompiledText]:
+    """Zwraca tekst bez zmian, jeśli nie ma placeholderów, albo jego skompilowaną postać"""
+    if not text or not isinstance(text, str) or "{" not in text:
+        return text
+    parts = _PLACEHOLDER_RE.split(text)
+    return tuple(parts) if len(parts) > 1 else text
+
+
+def is_dynamic(text) -> bool:
+    return isinstance(text, tuple)
+
+
+def render_text(compiled, values: Dict[str, str]):
+    if not isinstance(compiled, tuple):
+        return compiled
+    # Indeksy nieparzyste to nazwy placeholderów
+    return "".join(
+        values[part] if index % 2 else part
+        for index, part in enumerate(compiled)
+    )
+
+
+class RenderPlan:
+    """
+    content: tekst wiadomości (statyczny albo skompilowany)
+    skeleton: embed z wypełnionymi statycznymi polami (None dla szablonu bez embedu)
+    dynamic: operacje podstawiające dynamiczne teksty w kopii szkieletu
+    """
+
+    __slots__ = ("content", "skeleton", "dynamic")
+
+    def __init__(self, template: dict):
+        self.content = compile_text(template.get("content"))
+        self.skeleton: Optional[discord.Embed] = None
+        self.dynamic: List[Callable[[discord.Embed, Dict[str, str]], None]] = []
+
+        if "embed" in template:
+            self._compile_embed(template["embed"])
+
+    @property
+    def needs_values(self) -> bool:
+        return is_dynamic(self.content) or bool(self.dynamic)
+
+    def _compile_embed(self, embed_data: dict):
+        color = int(str(embed_data.get("color", "0x00ff00")).replace("#", ""), 16)
+        title = compile_text(embed_data.get("title"))
+        description = compile_text(embed_data.get("description"))
+
+        embed = discord.Embed(
+            title=None if is_dynamic(title) else title,
+            description=None if is_dynamic(description) else description,
+            color=color
+        )
+        if is_dynamic(title):
+            self.dynamic.append(lambda e, v, t=title: setattr(e, "title", render_text(t, v)))
+        if is_dynamic(description):
+            self.dynamic.append(lambda e, v, t=description: setattr(e, "description", render_text(t, v)))
+
+        if embed_data.get("author"):
+            author_data = embed_data["author"]
+            name = compile_text(author_data.get("name", ""))
+            icon_url = author_data.get("icon_url")
+            embed.set_author(name="" if is_dynamic(name) else name, icon_url=icon_url)
+            if is_dynamic(name):
+                self.dynamic.append(
+                    lambda e, v, t=name, u=icon_url: e.set_author(name=render_text(t, v), icon_url=u)
+                )
+
+        for index, field in enumerate(embed_data.get("fields", [])):
+            name = compile_text(field.get("name"))
+            value = compile_text(field.get("value"))
+            inline = field.get("inline", False)
+            embed.add_field(
+                name="" if is_dynamic(name) else name,
+                value="" if is_dynamic(value) else value,
+                inline=inline
+            )
+            if is_dynamic(name) or is_dynamic(value):
+                self.dynamic.append(
+                    lambda e, v, i=index, n=name, val=value, inl=inline: e.set_field_at(
+                        i, name=render_text(n, v), value=render_text(val, v), inline=inl
+                    )
+                )
+
+        if embed_data.get("footer"):
+            footer_data = embed_data.get("footer")
+            if isinstance(footer_data, dict):
+                text = compile_text(footer_data.get("text"))
+                icon_url = footer_data.get("icon_url")
+            else:
+                text = compile_text(footer_data)
+                icon_url = None
+            embed.set_footer(text=None if is_dynamic(text) else text, icon_url=icon_url)
+            if is_dynamic(text):
+                self.dynamic.append(
+                    lambda e, v, t=text, u=icon_url: e.set_footer(text=render_text(t, v), icon_url=u)
+                )
+
+        if embed_data.get("thumbnail"):
+            try:
+                embed.set_thumbnail(url=embed_data["thumbnail"])
+            except:
+                pass
+
+        if embed_data.get("image"):
+            try:
+                embed.set_image(url=embed_data["image"])
+            except:
+                pass
+
+        self.skeleton = embed
+
+    def render(self, values: Dict[str, str]) -> Tuple[Optional[str], Optional[discord.Embed]]:
+        """(content, embed) gotowe do channel.send - szkielet jest kopiowany, nie modyfikowany"""
+        content = render_text(self.content, values)
+        if self.skeleton is None:
+            return content, None
+        embed = self.skeleton.copy()
+        for apply in self.dynamic:
+            apply(embed, values)
+        return content, embed
+
+
+class RenderPlanCache:
+    """
+    Plany per (guild_id, nazwa szablonu). Wpis jest ważny, dopóki pod nazwą
+    leży ten sam obiekt szablonu (cache plików podmienia obiekty przy zmianie
+    templates.json); zapis szablonów unieważnia plany serwera jawnie.
+    """
+
+    def __init__(self):
+        self._plans: Dict[Tuple[int, str], Tuple[dict, RenderPlan]] = {}
+
+    def get(self, guild_id: int, name: Optional[str], template: dict) -> RenderPlan:
+        if name is None:
+            return RenderPlan(template)
+        key = (guild_id, name)
+        entry = self._plans.get(key)
+        if entry is None or entry[0] is not template:
+            entry = self._plans[key] = (template, RenderPlan(template))
+        return entry[1]
+
+    def invalidate(self, guild_id: int):
+        for key in [key for key in self._plans if key[0] == guild_id]:
+            del self._plans[key]
+
+    def __len__(self) -> int:
+        return len(self._plans)
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+Skompilowane tygodniowe okna recurring schedules.
+
+Konfiguracja schedule (dni + godziny albo multiday start_day/start_time ->
+end_day/end_time) jest zamieniana raz na listę przedziałów minut tygodnia
+(0 = poniedziałek 00:00, 10079 = niedziela 23:59) i bitmapę 7×1440.
+Sprawdzenie "czy teraz jest w oknie" to jeden odczyt z bitmapy, a
+next_window_start(now) mówi, kiedy okno otworzy się następnym razem.
+
+Rozdzielczość to minuta: minuta końcowa okna jest włączona w całości
+(okno do 22:00 obejmuje 22:00:00-22:00:59).
+
+countdown_edit_time(now, end) wyznacza kolejną edycję wiadomości z
+odliczaniem (tryb edit-in-place one-time eventów).
+
+next_fire_time(schedule, after) liczy analitycznie najbliższą wysyłkę
+(okno + interval_hours od last_sent + week_interval), więc dispatcher
+może spać dokładnie do niej zamiast sprawdzać schedules co kilka minut.
+"""
+import bisect
+import math
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+MINUTES_PER_DAY = 1440
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+# last_week_sent zapisane jako goły numer tygodnia ISO (1-53) - stary format
+LEGACY_WEEK_MAX = 53
+
+
+def minute_of_week(moment: datetime) -> int:
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def _week_start(moment: datetime) -> datetime:
+    """Poniedziałek 00:00 tygodnia, w którym leży moment (ta sama strefa)"""
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight - timedelta(days=moment.weekday())
+
+
+def _parse_hhmm(value: str) -> int:
+    hours, minutes = datetime.strptime(value, "%H:%M").timetuple()[3:5]
+    return hours * 60 + minutes
+
+
+class WeeklyWindow:
+    """
+    intervals: posortowane, rozłączne przedziały [start, end) w minutach tygodnia.
+    Okno przechodzące przez koniec tygodnia (np. niedziela -> poniedziałek)
+    jest zapisane jako dwa przedziały: [..., 10080) i [0, ...).
+    """
+
+    __slots__ = ("intervals", "_bitmap", "_starts")
+
+    def __init__(self, intervals: List[Tuple[int, int]]):
+        merged: List[Tuple[int, int]] = []
+        for start, end in sorted(i for i in intervals if i[0] < i[1]):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        self.intervals = merged
+
+        self._bitmap = bytearray(MINUTES_PER_WEEK)
+        for start, end in merged:
+            self._bitmap[start:end] = b"\x01" * (end - start)
+
+        # Początki okien; przedział od 0 będący ciągiem dalszym okna z niedzieli nie jest początkiem
+        wraps = len(merged) > 1 and merged[0][0] == 0 and merged[-1][1] == MINUTES_PER_WEEK
+        self._starts = [start for start, _ in (merged[1:] if wraps else merged)]
+
+    @classmethod
+    def from_schedule(cls, schedule: dict) -> "WeeklyWindow":
+        """Kompiluje okno schedule; błędna konfiguracja daje puste okno (nigdy nie wysyła)"""
+        try:
+            if schedule.get("is_multiday", False):
+                config = schedule.get("multiday_config", {})
+                start_day = int(config.get("start_day", 4))
+                end_day = int(config.get("end_day", 5))
+                start = start_day * MINUTES_PER_DAY + _parse_hhmm(config.get("start_time", "14:00"))
+                end = end_day * MINUTES_PER_DAY + _parse_hhmm(config.get("end_time", "20:00")) + 1
+                if start_day == end_day:
+                    # Jeden dzień - okno tylko gdy start <= koniec
+                    return cls([(start, end)])
+                if start < end:
+                    return cls([(start, end)])
+                # Przez koniec tygodnia (np. sobota -> poniedziałek)
+                return cls([(start, MINUTES_PER_WEEK), (0, end)])
+
+            start = _parse_hhmm(schedule.get("start_time", "00:00"))
+            end = _parse_hhmm(schedule.get("end_time", "23:59")) + 1
+            return cls([
+                (day * MINUTES_PER_DAY + start, day * MINUTES_PER_DAY + end)
+                for day in schedule.get("days", [])
+                if 0 <= int(day) <= 6
+            ])
+        except (TypeError, ValueError):
+            return cls([])
+
+    @staticmethod
+    def signature(schedule: dict) -> tuple:
+        """Pola, od których zależy okno - zmienia się tylko przy edycji schedule"""
+        if schedule.get("is_multiday", False):
+            config = schedule.get("multiday_config") or {}
+            return (
+                "multiday", config.get("start_day"), config.get("start_time"),
+                config.get("end_day"), config.get("end_time")
+            )
+        return (
+            "days", tuple(schedule.get("days") or ()),
+            schedule.get("start_time"), schedule.get("end_time")
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.intervals)
+
+    def contains(self, moment: datetime) -> bool:
+        return self._bitmap[minute_of_week(moment)] == 1
+
+    def next_window_start(self, now: datetime) -> Optional[datetime]:
+        """
+        Najbliższy początek okna po now (None dla pustego okna).
+        Jeśli now jest w oknie, zwracany jest początek kolejnego okna.
+        Okno obejmujące cały tydzień nie ma "następnego" początku - wtedy now.
+        """
+        if not self._starts:
+            return now if self.intervals else None
+
+        current = minute_of_week(now)
+        index = bisect.bisect_right(self._starts, current)
+        week = _week_start(now)
+        if index < len(self._starts):
+            return week + timedelta(minutes=self._starts[index])
+        return week + timedelta(days=7, minutes=self._starts[0])
+
+    def window_end(self, now: datetime) -> Optional[datetime]:
+        """Koniec okna, w którym jest now (pierwsza minuta poza oknem) albo None"""
+        if not self.contains(now):
+            return None
+        current = minute_of_week(now)
+        week = _week_start(now)
+        for start, end in self.intervals:
+            if start <= current < end:
+                if end == MINUTES_PER_WEEK and self.intervals[0][0] == 0 and len(self.intervals) > 1:
+                    # Okno trwa dalej od poniedziałku 00:00
+                    return week + timedelta(days=7, minutes=self.intervals[0][1])
+                return week + timedelta(minutes=end)
+        return None
+
+
+class WindowCache:
+    """Skompilowane okna współdzielone po sygnaturze (identyczne okna kompilujemy raz)"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._windows: Dict[tuple, WeeklyWindow] = {}
+
+    def get(self, schedule: dict) -> WeeklyWindow:
+        key = WeeklyWindow.signature(schedule)
+        window = self._windows.get(key)
+        if window is None:
+            if len(self._windows) >= self.max_entries:
+                self._windows.clear()
+            window = self._windows[key] = WeeklyWindow.from_schedule(schedule)
+        return window
+
+
+def week_index(moment) -> int:
+    """Numer tygodnia liczony ciągle od 0001-01-01 (poniedziałek) - rośnie także przez Nowy Rok"""
+    return (moment.toordinal() - 1) // 7
+
+
+def last_week_index(schedule: dict, moment: datetime) -> Optional[int]:
+    """
+    last_week_sent jako week_index. Stary format (numer tygodnia ISO bez roku) jest
+    przeliczany na najbliższy taki tydzień nie późniejszy niż last_sent (albo moment).
+    """
+    value = schedule.get("last_week_sent")
+    if value is None:
+        return None
+    value = int(value)
+    if value > LEGACY_WEEK_MAX:
+        return value
+    
+    last_sent = schedule.get("last_sent")
+    reference = datetime.fromisoformat(last_sent) if last_sent else moment
+    iso_year = reference.isocalendar()[0]
+    for year in (iso_year, iso_year - 1):
+        try:
+            monday = date.fromisocalendar(year, value, 1)
+        except ValueError:
+            # Tydzień 53 w roku, który ma 52 tygodnie
+            continue
+        if monday <= reference.date():
+            return week_index(monday)
+    return None
+
+
+def upgrade_last_week_sent(schedule: dict, moment: datetime) -> bool:
+    """Jednorazowo zamienia stary last_week_sent na week_index; True, jeśli schedule się zmienił"""
+    value = schedule.get("last_week_sent")
+    if value is None or int(value) > LEGACY_WEEK_MAX:
+        return False
+    schedule["last_week_sent"] = last_week_index(schedule, moment)
+    return True
+
+
+def week_allowed(schedule: dict, moment: datetime) -> bool:
+    """week_interval dla zwykłych (nie multiday) schedules - ta sama reguła co should_send_recurring_message"""
+    if schedule.get("is_multiday", False):
+        return True
+    week_interval = schedule.get("week_interval", 1)
+    if week_interval <= 1:
+        return True
+    last_week = last_week_index(schedule, moment)
+    return last_week is None or week_index(moment) - last_week >= week_interval
+
+
+def next_fire_time(
+    schedule: dict,
+    after: datetime,
+    window: Optional[WeeklyWindow] = None,
+    max_steps: int = 64
+) -> Optional[datetime]:
+    """
+    Najwcześniejszy moment >= after, w którym recurring schedule powinien wysłać wiadomość:
+    w oknie tygodniowym (także multiday przez koniec tygodnia), nie wcześniej niż
+    last_sent + interval_hours i w dozwolonym tygodniu (week_interval).
+    None - wyłączony schedule albo puste okno.
+    """
+    if not schedule.get("enabled", True):
+        return None
+    if window is None:
+        window = WeeklyWindow.from_schedule(schedule)
+    if not window:
+        return None
+
+    candidate = after
+    last_sent = schedule.get("last_sent")
+    if last_sent:
+        earliest = datetime.fromisoformat(last_sent) + timedelta(hours=schedule.get("interval_hours", 2))
+        if earliest > candidate:
+            candidate = earliest
+
+    for _ in range(max_steps):
+        if not window.contains(candidate):
+            candidate = window.next_window_start(candidate)
+            if candidate is None:
+                return None
+            continue
+        if week_allowed(schedule, candidate):
+            return candidate
+        # Niedozwolony tydzień - szukamy od poniedziałku następnego
+        candidate = _week_start(candidate) + timedelta(days=7)
+    return None
+
+
+def upcoming_fire_times(
+    schedule: dict,
+    after: datetime,
+    count: int,
+    window: Optional[WeeklyWindow] = None
+) -> List[datetime]:
+    """Kolejne count wysyłek (symulacja z last_sent przesuwanym po każdej z nich)"""
+    if window is None:
+        window = WeeklyWindow.from_schedule(schedule)
+    simulated = dict(schedule)
+    fires: List[datetime] = []
+    moment = after
+    while len(fires) < count:
+        fire = next_fire_time(simulated, moment, window)
+        if fire is None:
+            break
+        fires.append(fire)
+        simulated["last_sent"] = fire.isoformat()
+        simulated["last_week_sent"] = week_index(fire)
+        moment = fire
+    return fires
+
+
+def dynamic_interval(minutes_remaining: float, base_interval: int) -> int:
+    """Interwał wysyłek one-time eventu: base_interval, a w ostatnich 30 minutach 10/5/2/1 min"""
+    if minutes_remaining <= 10:
+        if minutes_remaining <= 1:
+            return 1
+        elif minutes_remaining <= 3:
+            return 1
+        elif minutes_remaining <= 5:
+            return 2
+        else:
+            return 5
+    elif minutes_remaining <= 30:
+        return 10
+    else:
+        return base_interval
+
+
+def countdown_edit_step(minutes_remaining: float) -> int:
+    """Krok edycji odliczania: końcówka jak dynamic_interval, dalej coraz rzadziej"""
+    if minutes_remaining <= 30:
+        return dynamic_interval(minutes_remaining, 30)
+    if minutes_remaining <= 120:
+        return 30
+    if minutes_remaining <= 360:
+        return 60
+    if minutes_remaining <= 1440:
+        return 180
+    return 720
+
+
+def countdown_edit_time(now: datetime, end_time: datetime) -> datetime:
+    """
+    Termin kolejnej edycji wiadomości z odliczaniem: najbliższa niższa wartość
+    {countdown} (w pełnych minutach) t, dla której t jest wielokrotnością kroku
+    countdown_edit_step(t). Krok liczymy dla docelowej wartości, więc w końcówce
+    obowiązują kroki 10/5/2/1 min. Termin wypada sekundę po zmianie minut,
+    więc każda edycja zmienia tekst. Po t = 0 zwraca moment po end_time
+    (zostaje tylko edycja końcowa "Event ended").
+    """
+    shown = math.floor((end_time - now).total_seconds() / 60)
+    for target in range(shown - 1, -1, -1):
+        if target % countdown_edit_step(target) == 0:
+            # {countdown} pokazuje `target` minut od chwili end_time - (target + 1) min
+            return end_time - timedelta(minutes=target + 1) + timedelta(seconds=1)
+    return end_time + timedelta(seconds=1)
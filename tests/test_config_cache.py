@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from config_cache import ConfigCache
+
+
+def test_unbounded_hit_is_a_plain_lookup():
+    cache = ConfigCache()
+    cache.put(1, {"a": 1})
+    cache.put(2, {"b": 2})
+
+    assert cache.get(1) == {"a": 1}
+    assert cache.get(3) is None
+    assert list(cache) == [1, 2]  # kolejność bez zmian
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (0, 1, None)
+
+
+def test_full_bounded_cache_evicts_least_recently_used():
+    cache = ConfigCache(capacity=2)
+    cache.put(1, {})
+    cache.put(2, {})
+    cache.get(1)
+    cache.put(3, {})
+
+    assert list(cache) == [1, 3]
+    assert cache.get(2) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["evictions"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_tracking_stops_when_cache_drops_below_capacity():
+    cache = ConfigCache(capacity=2)
+    cache.put(1, {})
+    cache.put(2, {})
+    cache.pop(2)
+    cache.get(1)
+
+    assert cache.stats()["hits"] == 0
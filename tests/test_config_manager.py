@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import logging
+
+import pytest
+
+from config_manager import GuildConfigManager
+
+GUILD_ID = 42
+
+
+@pytest.fixture
+def manager(tmp_path):
+    logging.getLogger('discord').setLevel(logging.WARNING)
+    return GuildConfigManager(str(tmp_path))
+
+
+def test_cached_leaf_is_dropped_on_update(manager):
+    key = manager.key("leaderboard.channel_id")
+    assert key.get(GUILD_ID) is None
+    assert manager.get_value(GUILD_ID, "leaderboard.channel_id") is None
+
+    manager.update_guild_config(GUILD_ID, "leaderboard.channel_id", 1234)
+
+    assert key.get(GUILD_ID) == 1234
+    assert manager.get_value(GUILD_ID, "leaderboard.channel_id") == 1234
+
+
+def test_missing_path_returns_each_callers_default(manager):
+    assert manager.get_value(GUILD_ID, "no.such.key", "a") == "a"
+    assert manager.get_value(GUILD_ID, "no.such.key", "b") == "b"
+
+
+def test_lists_are_not_served_from_leaf_cache(manager):
+    manager.enable_module(GUILD_ID, "schedule")
+    assert manager.get_value(GUILD_ID, "enabled_modules") == ["schedule"]
+    assert "enabled_modules" not in manager._leaf_values.get(GUILD_ID, {})
+
+
+def test_save_guild_config_drops_cached_leaves(manager):
+    assert manager.get_value(GUILD_ID, "embed_color") is not None
+    config = manager.get_guild_config(GUILD_ID)
+    config["embed_color"] = "#000000"
+    manager.save_guild_config(GUILD_ID, config)
+
+    assert manager.get_value(GUILD_ID, "embed_color") == "#000000"
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import copy
+
+from config_overlay import OverlayConfig, freeze
+
+DEFAULTS = freeze({
+    "enabled_modules": [],
+    "free_games": {"enabled_platforms": ["steam"], "channel_id": None},
+    "welcome_message": {"embed": {"title": "Hi"}},
+})
+
+
+def test_reads_do_not_grow_overrides():
+    config = OverlayConfig(DEFAULTS)
+
+    assert config["enabled_modules"] == []
+    assert config["free_games"]["enabled_platforms"] == ["steam"]
+    assert config.resolve(("free_games", "enabled_platforms")) == ["steam"]
+    assert config.resolve(("welcome_message", "embed", "title")) == "Hi"
+    assert config.resolve(("welcome_message", "embed")).to_dict() == {"title": "Hi"}
+
+    assert config.overrides == {}
+
+
+def test_default_list_is_copied_on_first_write():
+    config = OverlayConfig(DEFAULTS)
+
+    config["enabled_modules"].append("schedule")
+    platforms = config.resolve(("free_games", "enabled_platforms"))
+    platforms.append("epic")
+
+    assert config.overrides == {
+        "enabled_modules": ["schedule"],
+        "free_games": {"enabled_platforms": ["steam", "epic"]},
+    }
+    assert config["enabled_modules"] == ["schedule"]
+    # Defaults zostają nietknięte
+    assert OverlayConfig(DEFAULTS)["free_games"]["enabled_platforms"] == ["steam"]
+
+
+def test_default_list_copies_are_plain_lists():
+    config = OverlayConfig(DEFAULTS)
+    assert type(copy.deepcopy(config["enabled_modules"])) is list
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("discord")
+
+from language_manager import LanguageManager  # noqa: E402
+
+
+@pytest.fixture
+def manager(tmp_path):
+    languages = tmp_path / "languages"
+    languages.mkdir()
+    for lang in ("en", "pl"):
+        (languages / f"{lang}.json").write_text(json.dumps({"hello": {"text": lang}}), encoding="utf-8")
+    return LanguageManager(
+        SimpleNamespace(), languages_dir=str(languages), data_dir=str(tmp_path / "data"),
+        reload_interval=None, resolve_cache_size=3
+    )
+
+
+def test_save_pref_forgets_only_that_users_entries(manager):
+    for guild_id in (1, 2):
+        for user_id in (10, 20):
+            manager.resolve_language(user_id=user_id, guild_id=guild_id)
+
+    manager.save_pref(10, "pl")
+
+    assert list(manager._resolved) == [(1, 20), (2, 20)]
+    assert 10 not in manager._resolved_by_user
+    assert manager.resolve_language(user_id=10, guild_id=1) == "pl"
+
+
+def test_forget_guild_and_lru_keep_indexes_in_sync(manager):
+    for user_id in (10, 20, 30, 40):
+        manager.resolve_language(user_id=user_id, guild_id=1 if user_id < 40 else 2)
+
+    # Limit 3 - najstarszy wpis (1, 10) wyrzucony także z indeksów
+    assert list(manager._resolved) == [(1, 20), (1, 30), (2, 40)]
+    assert 10 not in manager._resolved_by_user
+
+    manager.forget_guild(1)
+
+    assert list(manager._resolved) == [(2, 40)]
+    assert set(manager._resolved_by_guild) == {2}
+    assert set(manager._resolved_by_user) == {40}
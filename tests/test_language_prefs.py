@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import json
+
+from language_prefs import LanguagePrefStore
+
+
+def test_cache_is_bounded_and_keeps_unflushed_changes(tmp_path):
+    store = LanguagePrefStore(tmp_path / "prefs.db", cache_size=2)
+
+    store.set(1, "PL")
+    for user_id in (2, 3, 4):
+        assert store.get(user_id) is None
+
+    assert len(store._cache) == 2
+    # Wypadł z cache przed flushem - odczyt z bufora, nie z bazy
+    assert store.get(1) == "pl"
+
+    assert store.flush() == 1
+    store._cache.clear()
+    assert store.get(1) == "pl"
+
+
+def test_legacy_import_skips_bad_user_ids(tmp_path, caplog):
+    legacy = tmp_path / "user_langs.json"
+    legacy.write_text(json.dumps({"123": "PL", "not-a-user": "DE", "": "FR"}), encoding="utf-8")
+
+    store = LanguagePrefStore(tmp_path / "prefs.db", legacy_files=[legacy])
+
+    assert store.get(123) == "pl"
+    assert "not-a-user" in caplog.text
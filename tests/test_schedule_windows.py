@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta, timezone
+
+from schedule_windows import (
+    countdown_edit_time, dynamic_interval, last_week_index, next_fire_time, upcoming_fire_times,
+    upgrade_last_week_sent, week_allowed, week_index
+)
+
+TZ = timezone(timedelta(hours=-2))
+
+
+def biweekly_monday():
+    return {
+        "name": "biweekly",
+        "enabled": True,
+        "days": [0],
+        "start_time": "10:00",
+        "end_time": "12:00",
+        "interval_hours": 2,
+        "week_interval": 2,
+    }
+
+
+def test_week_index_is_monotonic_across_new_year():
+    assert week_index(datetime(2027, 1, 4, tzinfo=TZ)) - week_index(datetime(2026, 12, 28, tzinfo=TZ)) == 1
+    # Poniedziałek i niedziela tego samego tygodnia
+    assert week_index(datetime(2026, 12, 28)) == week_index(datetime(2027, 1, 3))
+
+
+def test_biweekly_schedule_keeps_firing_from_december_into_january():
+    schedule = biweekly_monday()
+    fires = upcoming_fire_times(schedule, datetime(2026, 12, 1, tzinfo=TZ), 6)
+
+    assert [fire.date().isoformat() for fire in fires] == [
+        "2026-12-07", "2026-12-21", "2027-01-04", "2027-01-18", "2027-02-01", "2027-02-15",
+    ]
+    assert all(fire.hour == 10 and fire.minute == 0 for fire in fires)
+
+
+def test_next_fire_time_after_sending_in_last_week_of_year():
+    schedule = biweekly_monday()
+    sent = datetime(2026, 12, 28, 10, 0, tzinfo=TZ)
+    schedule["last_sent"] = sent.isoformat()
+    schedule["last_week_sent"] = week_index(sent)
+
+    assert next_fire_time(schedule, sent + timedelta(minutes=1)) == datetime(2027, 1, 11, 10, 0, tzinfo=TZ)
+
+
+def test_legacy_iso_week_is_converted_across_new_year():
+    schedule = biweekly_monday()
+    schedule["last_sent"] = datetime(2026, 12, 21, 10, 0, tzinfo=TZ).isoformat()
+    schedule["last_week_sent"] = 52  # ISO tydzień 52 roku 2026, stary format
+    january = datetime(2027, 1, 4, 10, 30, tzinfo=TZ)
+
+    assert last_week_index(schedule, january) == week_index(datetime(2026, 12, 21))
+    assert week_allowed(schedule, january)
+    assert next_fire_time(schedule, datetime(2026, 12, 22, tzinfo=TZ)) == datetime(2027, 1, 4, 10, 0, tzinfo=TZ)
+
+    assert upgrade_last_week_sent(schedule, january)
+    assert schedule["last_week_sent"] == week_index(datetime(2026, 12, 21))
+    assert not upgrade_last_week_sent(schedule, january)
+
+
+def test_week_interval_blocks_the_following_week():
+    schedule = biweekly_monday()
+    sent = datetime(2027, 1, 4, 10, 0, tzinfo=TZ)
+    schedule["last_sent"] = sent.isoformat()
+    schedule["last_week_sent"] = week_index(sent)
+
+    assert not week_allowed(schedule, datetime(2027, 1, 11, 10, 0, tzinfo=TZ))
+    assert week_allowed(schedule, datetime(2027, 1, 18, 10, 0, tzinfo=TZ))
+
+
+def edit_schedule(duration_minutes: int):
+    """Minuty do końca przy kolejnych edycjach (po pierwszej wysyłce na starcie, bez edycji końcowej)"""
+    end = datetime(2027, 1, 10, 12, 0, tzinfo=TZ)
+    now = end - timedelta(minutes=duration_minutes)
+    remaining = []
+    while True:
+        now = countdown_edit_time(now, end)
+        if now > end:
+            return remaining
+        remaining.append((end - now).total_seconds() / 60)
+
+
+def post_count(duration_minutes: int, base_interval: int) -> int:
+    """Wysyłki w zwykłym trybie (nowa wiadomość co dynamic_interval)"""
+    end = datetime(2027, 1, 10, 12, 0, tzinfo=TZ)
+    now = end - timedelta(minutes=duration_minutes)
+    posts = 0
+    while now <= end:
+        posts += 1
+        now += timedelta(minutes=dynamic_interval((end - now).total_seconds() / 60, base_interval))
+    return posts
+
+
+def test_countdown_edits_for_one_hour_event():
+    shown = [int(minutes) for minutes in edit_schedule(60)]
+    # Krok dobierany dla wartości docelowej - końcówka edytowana co 10/5/2/1 min
+    assert shown == [30, 20, 10, 4, 3, 2, 1, 0]
+    # Każda edycja sekundę po zmianie minut w {countdown}
+    assert all(abs(minutes - (int(minutes) + 1 - 1 / 60)) < 1e-9 for minutes in edit_schedule(60))
+
+
+def test_countdown_edits_for_one_day_event():
+    assert [int(minutes) for minutes in edit_schedule(1440)] == [
+        1260, 1080, 900, 720, 540, 360,
+        300, 240, 180, 120,
+        90, 60, 30,
+        20, 10, 4, 3, 2, 1, 0,
+    ]
+
+
+def test_countdown_edits_use_far_fewer_api_calls_than_posting():
+    for duration, base_interval, factor in ((1440, 30, 2), (7 * 1440, 60, 4)):
+        # Pierwsza wysyłka + edycje + edycja końcowa "Event ended"
+        calls = 1 + len(edit_schedule(duration)) + 1
+        assert calls * factor <= post_count(duration, base_interval)
+
+
+def test_countdown_edit_after_last_minute_is_past_end():
+    end = datetime(2027, 1, 10, 12, 0, tzinfo=TZ)
+    assert countdown_edit_time(end - timedelta(seconds=30), end) > end